@@ -112,7 +112,7 @@ BLOCK_CATEGORIES = {
         "oak_leaves", "spruce_leaves", "birch_leaves", "jungle_leaves",
         "acacia_leaves", "dark_oak_leaves", "mangrove_leaves", "azalea_leaves",
         "flowering_azalea_leaves", "cherry_leaves",
-        "grass", "tall_grass", "fern", "large_fern", "dead_bush",
+        "grass", "short_grass", "tall_grass", "fern", "large_fern", "dead_bush",
         "dandelion", "poppy", "blue_orchid", "allium", "azure_bluet",
         "red_tulip", "orange_tulip", "white_tulip", "pink_tulip",
         "oxeye_daisy", "cornflower", "lily_of_the_valley", "torchflower", "pitcher_plant",
@@ -385,6 +385,99 @@ BLOCK_CATEGORIES = {
 }
 
 
+# =============================================================================
+# BLOCK AVAILABILITY
+# =============================================================================
+
+# Pack format in which each block first appears. Blocks not listed here exist
+# in every version of VERSION_TO_PACK_FORMAT. A pack format covering several
+# releases counts a block as present if any of those releases has it, since
+# a blockstate for a missing block is harmless but a missing blockstate is not.
+# Blocks that shipped behind an experimental feature flag count from the
+# release that first registered them.
+BLOCKS_INTRODUCED = {
+    # 1.17 - Caves & Cliffs part I
+    7: [
+        "copper_ore", "deepslate_coal_ore", "deepslate_copper_ore", "deepslate_iron_ore",
+        "deepslate_gold_ore", "deepslate_lapis_ore", "deepslate_redstone_ore",
+        "deepslate_diamond_ore", "deepslate_emerald_ore",
+        "tuff", "calcite", "smooth_basalt", "amethyst_block", "budding_amethyst",
+        "dripstone_block", "pointed_dripstone", "rooted_dirt", "powder_snow",
+        "deepslate", "cobbled_deepslate", "polished_deepslate", "chiseled_deepslate",
+        "deepslate_bricks", "cracked_deepslate_bricks", "deepslate_tiles", "cracked_deepslate_tiles",
+        "deepslate_brick_stairs", "deepslate_tile_stairs", "polished_deepslate_stairs", "cobbled_deepslate_stairs",
+        "deepslate_brick_slab", "deepslate_tile_slab", "polished_deepslate_slab", "cobbled_deepslate_slab",
+        "deepslate_brick_wall", "deepslate_tile_wall", "polished_deepslate_wall", "cobbled_deepslate_wall",
+        "infested_deepslate", "tinted_glass",
+        "raw_iron_block", "raw_gold_block", "raw_copper_block",
+        "copper_block", "exposed_copper", "weathered_copper", "oxidized_copper",
+        "cut_copper", "exposed_cut_copper", "weathered_cut_copper", "oxidized_cut_copper",
+        "waxed_copper_block", "waxed_exposed_copper", "waxed_weathered_copper", "waxed_oxidized_copper",
+        "waxed_cut_copper", "waxed_exposed_cut_copper", "waxed_weathered_cut_copper", "waxed_oxidized_cut_copper",
+        "azalea_leaves", "flowering_azalea_leaves", "azalea", "flowering_azalea",
+        "glow_lichen", "hanging_roots", "moss_block", "moss_carpet",
+        "spore_blossom", "big_dripleaf", "small_dripleaf", "cave_vines", "cave_vines_plant",
+        "candle", "white_candle", "orange_candle", "magenta_candle", "light_blue_candle",
+        "yellow_candle", "lime_candle", "pink_candle", "gray_candle",
+        "light_gray_candle", "cyan_candle", "purple_candle", "blue_candle",
+        "brown_candle", "green_candle", "red_candle", "black_candle",
+        "sculk_sensor", "glow_item_frame", "light",
+    ],
+    # 1.19 - The Wild Update
+    9: [
+        "mud", "packed_mud", "mud_bricks", "mud_brick_stairs", "mud_brick_slab", "mud_brick_wall",
+        "mangrove_log", "stripped_mangrove_log", "mangrove_wood", "stripped_mangrove_wood",
+        "mangrove_planks", "mangrove_leaves", "mangrove_pressure_plate", "mangrove_button",
+        "mangrove_stairs", "mangrove_slab", "mangrove_fence", "mangrove_fence_gate",
+        "mangrove_door", "mangrove_trapdoor", "mangrove_sign",
+        "ochre_froglight", "verdant_froglight", "pearlescent_froglight",
+        "sculk", "sculk_vein", "sculk_catalyst", "sculk_shrieker",
+    ],
+    # 1.19.3 - bamboo wood, hanging signs and chiseled bookshelves (experimental)
+    12: [
+        "bamboo_block", "stripped_bamboo_block", "bamboo_planks", "bamboo_mosaic",
+        "bamboo_pressure_plate", "bamboo_button", "bamboo_stairs", "bamboo_slab",
+        "bamboo_fence", "bamboo_fence_gate", "bamboo_door", "bamboo_trapdoor", "bamboo_sign",
+        "oak_hanging_sign", "spruce_hanging_sign", "birch_hanging_sign", "jungle_hanging_sign",
+        "acacia_hanging_sign", "dark_oak_hanging_sign", "mangrove_hanging_sign", "bamboo_hanging_sign",
+        "crimson_hanging_sign", "warped_hanging_sign",
+        "chiseled_bookshelf", "piglin_head",
+    ],
+    # 1.19.4 - cherry grove and archaeology (experimental)
+    13: [
+        "cherry_log", "stripped_cherry_log", "cherry_wood", "stripped_cherry_wood",
+        "cherry_planks", "cherry_leaves", "cherry_pressure_plate", "cherry_button",
+        "cherry_stairs", "cherry_slab", "cherry_fence", "cherry_fence_gate",
+        "cherry_door", "cherry_trapdoor", "cherry_sign", "cherry_hanging_sign",
+        "torchflower", "decorated_pot",
+    ],
+    # 1.20 - Trails & Tales
+    15: [
+        "pitcher_plant", "calibrated_sculk_sensor",
+    ],
+    # 1.20.3 - copper building blocks (experimental), grass renamed to short_grass
+    22: [
+        "short_grass",
+        "copper_grate", "exposed_copper_grate", "weathered_copper_grate", "oxidized_copper_grate",
+        "waxed_copper_grate", "waxed_exposed_copper_grate", "waxed_weathered_copper_grate", "waxed_oxidized_copper_grate",
+        "copper_bulb", "exposed_copper_bulb", "weathered_copper_bulb", "oxidized_copper_bulb",
+        "waxed_copper_bulb", "waxed_exposed_copper_bulb", "waxed_weathered_copper_bulb", "waxed_oxidized_copper_bulb",
+        "chiseled_copper", "exposed_chiseled_copper", "weathered_chiseled_copper", "oxidized_chiseled_copper",
+        "waxed_chiseled_copper", "waxed_exposed_chiseled_copper", "waxed_weathered_chiseled_copper", "waxed_oxidized_chiseled_copper",
+        "copper_door", "exposed_copper_door", "weathered_copper_door", "oxidized_copper_door",
+        "waxed_copper_door", "waxed_exposed_copper_door", "waxed_weathered_copper_door", "waxed_oxidized_copper_door",
+        "copper_trapdoor", "exposed_copper_trapdoor", "weathered_copper_trapdoor", "oxidized_copper_trapdoor",
+        "waxed_copper_trapdoor", "waxed_exposed_copper_trapdoor", "waxed_weathered_copper_trapdoor", "waxed_oxidized_copper_trapdoor",
+    ],
+}
+
+# Pack format from which each block no longer exists (renamed or removed).
+BLOCKS_REMOVED = {
+    # 1.20.3 - renamed to short_grass
+    22: ["grass"],
+}
+
+
 # =============================================================================
 # PILLAR BLOCKS
 # =============================================================================
@@ -0,0 +1,320 @@
+"""
+Compiled Block Registry for Minecraft X-Ray Resource Pack Generator
+===================================================================
+
+Compiles the string-based tables in block_data into integer form.
+
+Every unique block ID gets a bit position. Categories, presets and the pillar
+flag are stored as integer bitmasks, so a selection of visible blocks is a
+single int: unions, differences and preset application are bitwise
+operations, and counts are popcounts.
+
+Blocks listed in more than one category share one bit, so they are counted
+and written once. Vanilla block IDs are bare ("stone"); blocks discovered in
+mod jars are namespaced ("create:andesite_casing").
+
+Block availability per pack format is compiled to an interval index: the
+sorted pack formats at which blocks appear or disappear, each with the mask
+of blocks that exist from that format up to the next one.
+
+The compiled block_data registry is cached on disk as a binary snapshot
+(see registry_snapshot), so block_data itself is only imported when it has
+changed since the snapshot was written.
+"""
+
+import bisect
+import hashlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    import re
+
+
+class BlockRegistry:
+    """
+    Block IDs, categories and presets compiled to bitmasks.
+
+    Attributes:
+        categories: Category name -> block IDs, as given
+        presets: Preset key -> name, description and categories, as given
+        pack_formats: Minecraft version range -> pack format
+        block_ids: Unique block IDs in first-appearance order (bit i = block_ids[i])
+        index: Block ID -> bit position
+        category_masks: Category name -> mask of its blocks
+        preset_masks: Preset key -> mask of the blocks it makes visible
+        pillar_mask: Mask of blocks that use axis-based blockstates
+        all_mask: Mask with every block set
+        format_bounds: Sorted pack formats at which block availability changes
+        format_masks: format_masks[i] is the mask of blocks that exist from
+            format_bounds[i - 1] (inclusive) to format_bounds[i] (exclusive);
+            format_masks[0] covers every format before the first bound
+    """
+
+    def __init__(
+        self,
+        categories: dict[str, list[str]],
+        pillar_blocks: Iterable[str],
+        presets: dict[str, dict],
+        introduced: Optional[dict[int, list[str]]] = None,
+        removed: Optional[dict[int, list[str]]] = None,
+        pack_formats: Optional[dict[str, int]] = None
+    ) -> None:
+        self.categories = categories
+        self.presets = presets
+        self.pack_formats = pack_formats or {}
+        self.block_ids: list[str] = []
+        self.index: dict[str, int] = {}
+        self.category_masks: dict[str, int] = {}
+
+        for blocks in categories.values():
+            for block in blocks:
+                if block not in self.index:
+                    self.index[block] = len(self.block_ids)
+                    self.block_ids.append(block)
+
+        for category, blocks in categories.items():
+            self.category_masks[category] = self.mask_of(blocks)
+
+        self.all_mask = (1 << len(self.block_ids)) - 1
+        self.pillar_mask = self.mask_of(block for block in pillar_blocks if block in self.index)
+        self.build_format_index(introduced or {}, removed or {})
+
+        self._fingerprint: Optional[str] = None
+        self._pattern_masks: dict[tuple[str, int], int] = {}
+        self.compile_presets()
+
+    @classmethod
+    def from_compiled(
+        cls,
+        block_ids: list[str],
+        category_positions: dict[str, list[int]],
+        pillar_mask: int,
+        presets: dict[str, dict],
+        format_bounds: list[int],
+        format_masks: list[int],
+        pack_formats: dict[str, int]
+    ) -> "BlockRegistry":
+        """
+        Restore a registry from its compiled form (see registry_snapshot).
+
+        Args:
+            block_ids: Unique block IDs in bit order
+            category_positions: Category name -> bit positions of its blocks,
+                in category order
+            pillar_mask: Mask of blocks that use axis-based blockstates
+            presets: Preset key -> name, description and categories
+            format_bounds: See the class attributes
+            format_masks: See the class attributes
+            pack_formats: Minecraft version range -> pack format
+        """
+        registry = cls.__new__(cls)
+        registry.block_ids = block_ids
+        registry.index = {block: position for position, block in enumerate(block_ids)}
+        registry.categories = {
+            category: [block_ids[position] for position in positions]
+            for category, positions in category_positions.items()
+        }
+        registry.category_masks = {
+            category: cls._mask_of_positions(positions)
+            for category, positions in category_positions.items()
+        }
+        registry.all_mask = (1 << len(block_ids)) - 1
+        registry.pillar_mask = pillar_mask
+        registry.format_bounds = format_bounds
+        registry.format_masks = format_masks
+        registry.presets = presets
+        registry.pack_formats = pack_formats
+        registry._fingerprint = None
+        registry._pattern_masks = {}
+        registry.compile_presets()
+        return registry
+
+    def compile_presets(self) -> None:
+        """Compile each preset's categories to the mask of blocks it makes visible."""
+        self.preset_masks: dict[str, int] = {}
+        for key, preset in self.presets.items():
+            mask = 0
+            for category_name in preset["categories"]:
+                mask |= self.category_masks.get(category_name, 0)
+            self.preset_masks[key] = mask
+
+    def build_format_index(
+        self,
+        introduced: dict[int, list[str]],
+        removed: dict[int, list[str]]
+    ) -> None:
+        """
+        Compile introduced-in/removed-in pack formats to the interval index.
+
+        Blocks that are not in the registry are ignored.
+        """
+        introduced_masks = {
+            pack_format: self.mask_of(block for block in blocks if block in self.index)
+            for pack_format, blocks in introduced.items()
+        }
+        removed_masks = {
+            pack_format: self.mask_of(block for block in blocks if block in self.index)
+            for pack_format, blocks in removed.items()
+        }
+
+        # Before the first bound every block exists except those introduced later
+        mask = self.all_mask
+        for introduced_mask in introduced_masks.values():
+            mask &= ~introduced_mask
+
+        self.format_bounds: list[int] = sorted(set(introduced_masks) | set(removed_masks))
+        self.format_masks: list[int] = [mask]
+        for pack_format in self.format_bounds:
+            mask |= introduced_masks.get(pack_format, 0)
+            mask &= ~removed_masks.get(pack_format, 0)
+            self.format_masks.append(mask)
+
+    def available_mask(self, pack_format: Optional[int] = None) -> int:
+        """Return the mask of blocks that exist in a pack format (None: all blocks)."""
+        if pack_format is None:
+            return self.all_mask
+        return self.format_masks[bisect.bisect_right(self.format_bounds, pack_format)]
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the block order, pillar flags and availability (changes when block_data does)."""
+        if self._fingerprint is None:
+            width = (len(self.block_ids) + 7) // 8
+            digest = hashlib.sha256("\n".join(self.block_ids).encode('utf-8'))
+            digest.update(self.pillar_mask.to_bytes(width, 'little'))
+            for pack_format, mask in zip([0] + self.format_bounds, self.format_masks):
+                digest.update(pack_format.to_bytes(4, 'little'))
+                digest.update(mask.to_bytes(width, 'little'))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def __len__(self) -> int:
+        return len(self.block_ids)
+
+    def __contains__(self, block: str) -> bool:
+        return block in self.index
+
+    def bit(self, block: str) -> int:
+        """Return the single-bit mask for a block."""
+        return 1 << self.index[block]
+
+    def mask_of(self, blocks: Iterable[str]) -> int:
+        """
+        Convert block IDs to a mask.
+
+        Raises:
+            KeyError: If a block is not in the registry
+        """
+        index = self.index
+        return self._mask_of_positions([index[block] for block in blocks])
+
+    @staticmethod
+    def _mask_of_positions(positions: list[int]) -> int:
+        """Convert bit positions to a mask."""
+        if not positions:
+            return 0
+
+        # Set bits in a byte buffer and convert once; OR-ing into a growing
+        # int would copy the whole mask for every block
+        buffer = bytearray((max(positions) >> 3) + 1)
+        for position in positions:
+            buffer[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def pattern_mask(self, pattern: "re.Pattern[str]") -> int:
+        """
+        Return the mask of blocks whose whole ID matches a regular expression.
+
+        Results are remembered per pattern, so each pattern scans the block
+        IDs once per registry.
+        """
+        key = (pattern.pattern, pattern.flags)
+        mask = self._pattern_masks.get(key)
+        if mask is None:
+            match = pattern.fullmatch
+            mask = self._mask_of_positions(
+                [position for position, block in enumerate(self.block_ids) if match(block)]
+            )
+            self._pattern_masks[key] = mask
+        return mask
+
+    def blocks_of(self, mask: int) -> set[str]:
+        """Convert a mask back to a set of block IDs."""
+        return set(self.iter_blocks(mask))
+
+    def iter_blocks(self, mask: int) -> Iterator[str]:
+        """Yield the block IDs set in a mask, in registry order."""
+        # One pass over the binary digits (LSB first) stays linear on large
+        # registries, unlike repeatedly clearing the lowest bit of a big int
+        block_ids = self.block_ids
+        bits = bin(mask)[:1:-1]
+        position = bits.find('1')
+        while position != -1:
+            yield block_ids[position]
+            position = bits.find('1', position + 1)
+
+    @staticmethod
+    def count(mask: int) -> int:
+        """Number of blocks set in a mask."""
+        return mask.bit_count()
+
+    def count_in_category(self, category: str, mask: int) -> tuple[int, int]:
+        """
+        Count selected and total blocks in a category.
+
+        Returns:
+            Tuple of (selected_count, total_count)
+        """
+        category_mask = self.category_masks[category]
+        return (mask & category_mask).bit_count(), category_mask.bit_count()
+
+
+@lru_cache(maxsize=None)
+def get_registry(mods_dir: Optional[str] = None) -> BlockRegistry:
+    """
+    Return the registry compiled from block_data (built once per process).
+
+    Without mods the registry is loaded from the snapshot, which is rebuilt
+    when block_data changes.
+
+    Args:
+        mods_dir: Also register the blocks of the mod jars in this folder
+            (see mod_scanner)
+    """
+    if mods_dir is None:
+        from registry_snapshot import load_registry
+        return load_registry()
+
+    from block_data import (
+        BLOCK_CATEGORIES,
+        BLOCKS_INTRODUCED,
+        BLOCKS_REMOVED,
+        PILLAR_BLOCKS,
+        PRESETS,
+        VERSION_TO_PACK_FORMAT,
+    )
+    from mod_scanner import load_mod_blocks
+
+    mod_categories, mod_pillars = load_mod_blocks(mods_dir)
+    return BlockRegistry(
+        {**BLOCK_CATEGORIES, **mod_categories}, PILLAR_BLOCKS | mod_pillars, PRESETS,
+        BLOCKS_INTRODUCED, BLOCKS_REMOVED, VERSION_TO_PACK_FORMAT
+    )
+
+
+def compile_block_data() -> BlockRegistry:
+    """Compile the registry from block_data's source tables."""
+    from block_data import (
+        BLOCK_CATEGORIES,
+        BLOCKS_INTRODUCED,
+        BLOCKS_REMOVED,
+        PILLAR_BLOCKS,
+        PRESETS,
+        VERSION_TO_PACK_FORMAT,
+    )
+
+    return BlockRegistry(
+        BLOCK_CATEGORIES, PILLAR_BLOCKS, PRESETS,
+        BLOCKS_INTRODUCED, BLOCKS_REMOVED, VERSION_TO_PACK_FORMAT
+    )
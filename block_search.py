@@ -0,0 +1,194 @@
+"""
+Block Search for Minecraft X-Ray Resource Pack Generator
+========================================================
+
+Ranked search over block IDs and category names for the interactive UI.
+
+Each registry gets one index, built on first use and reused after:
+
+    - a sorted list of the words of every name ("deepslate", "diamond",
+      "ore", ...), searched with bisect for queries shorter than a trigram,
+    - a trigram index (trigram -> entry positions), whose posting lists are
+      intersected to find substring matches and counted to find fuzzy
+      matches for misspelled queries.
+
+Lookups touch only the posting lists of the query's trigrams, so searches
+stay instant on registries with tens of thousands of modded blocks.
+
+Matches are ranked exact > prefix > word prefix > substring > fuzzy; ties go
+to the shorter name.
+"""
+
+import heapq
+import bisect
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from block_registry import BlockRegistry, get_registry
+
+
+KIND_BLOCK = "block"
+KIND_CATEGORY = "category"
+
+DEFAULT_LIMIT = 20
+
+SCORE_EXACT = 1000
+SCORE_PREFIX = 800
+SCORE_WORD_PREFIX = 600
+SCORE_SUBSTRING = 400
+SCORE_FUZZY = 200
+
+# A fuzzy match must share at least this fraction of the query's trigrams
+FUZZY_MIN_OVERLAP = 0.4
+
+_WORD_SEPARATORS = str.maketrans(":_()", "    ")
+_WORD_BOUNDARIES = str.maketrans(":()", "___")
+
+_indexes: "weakref.WeakKeyDictionary[BlockRegistry, SearchIndex]" = weakref.WeakKeyDictionary()
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """One ranked search result."""
+    kind: str
+    name: str
+    score: float
+
+
+def normalize(text: str) -> str:
+    """Lowercase and use '_' between words, so "Stone and" matches "stone_and"."""
+    return "_".join(text.lower().split())
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the set of three-character substrings of a normalized string."""
+    return {text[position:position + 3] for position in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    Prefix and trigram index over one registry's block IDs and category names.
+
+    Attributes:
+        entries: (kind, name) per entry position; categories come first
+        block_categories: Block ID -> first category listing it
+    """
+
+    def __init__(self, registry: BlockRegistry) -> None:
+        self.entries: list[tuple[str, str]] = (
+            [(KIND_CATEGORY, category) for category in registry.categories]
+            + [(KIND_BLOCK, block) for block in registry.block_ids]
+        )
+        self.block_categories: dict[str, str] = {}
+        for category, blocks in registry.categories.items():
+            for block in blocks:
+                self.block_categories.setdefault(block, category)
+
+        self._keys = [normalize(name) for _, name in self.entries]
+        # Keys with every word boundary as '_', for word-prefix matching
+        self._word_keys = ["_" + key.translate(_WORD_BOUNDARIES) for key in self._keys]
+
+        self._words: list[tuple[str, int]] = []
+        self._trigrams: dict[str, list[int]] = {}
+        for position, (_, name) in enumerate(self.entries):
+            for word in set(name.lower().translate(_WORD_SEPARATORS).split()):
+                self._words.append((word, position))
+            for trigram in trigrams(self._keys[position]):
+                self._trigrams.setdefault(trigram, []).append(position)
+        self._words.sort()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[SearchHit]:
+        """
+        Return the best matches for a query.
+
+        Args:
+            query: Text typed by the user (case and spacing are ignored)
+            limit: Maximum number of hits
+
+        Returns:
+            Hits, best first
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        scores: dict[int, float] = {}
+        if len(query) < 3:
+            candidates = self._word_prefix_candidates(query)
+        else:
+            candidates = self._substring_candidates(query)
+
+        keys = self._keys
+        word_keys = self._word_keys
+        word_query = f"_{query}"
+        for position in candidates:
+            key = keys[position]
+            if key == query:
+                scores[position] = SCORE_EXACT
+            elif key.startswith(query):
+                scores[position] = SCORE_PREFIX
+            elif word_query in word_keys[position]:
+                scores[position] = SCORE_WORD_PREFIX
+            elif query in key:
+                scores[position] = SCORE_SUBSTRING
+
+        if len(query) >= 3 and len(scores) < limit:
+            self._add_fuzzy(query, scores)
+
+        ranked = heapq.nsmallest(limit, scores, key=lambda position: (
+            -scores[position], len(keys[position]), keys[position]
+        ))
+        return [
+            SearchHit(self.entries[position][0], self.entries[position][1], scores[position])
+            for position in ranked
+        ]
+
+    def _word_prefix_candidates(self, query: str) -> set[int]:
+        """Entries having a word that starts with a short query."""
+        start = bisect.bisect_left(self._words, (query,))
+        candidates = set()
+        for word, position in self._words[start:]:
+            if not word.startswith(query):
+                break
+            candidates.add(position)
+        return candidates
+
+    def _substring_candidates(self, query: str) -> list[int]:
+        """Entries containing every trigram of the query (superset of substring matches)."""
+        postings = [self._trigrams.get(trigram, []) for trigram in trigrams(query)]
+        postings.sort(key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return list(candidates)
+
+    def _add_fuzzy(self, query: str, scores: dict[int, float]) -> None:
+        """Score entries that share enough of the query's trigrams."""
+        query_trigrams = trigrams(query)
+        shared: Counter = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+
+        needed = max(1, int(len(query_trigrams) * FUZZY_MIN_OVERLAP + 0.5))
+        for position, count in shared.items():
+            if count >= needed and position not in scores:
+                scores[position] = SCORE_FUZZY * count / len(query_trigrams)
+
+
+def get_search_index(registry: Optional[BlockRegistry] = None) -> SearchIndex:
+    """Return the search index of a registry, building it on first use."""
+    if registry is None:
+        registry = get_registry()
+    index = _indexes.get(registry)
+    if index is None:
+        index = _indexes[registry] = SearchIndex(registry)
+    return index
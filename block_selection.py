@@ -0,0 +1,308 @@
+"""
+Selection Expressions for Minecraft X-Ray Resource Pack Generator
+=================================================================
+
+A small expression language for naming sets of visible blocks, shared by
+the command line, batch manifests and the HTTP service:
+
+    diamond_ore                   one block ("minecraft:" is optional)
+    *_ore, deepslate_*            glob over block IDs (*, ?, [abc], [!abc])
+    /.*_(ore|debris)/             regular expression over block IDs
+    @Ores (Overworld)             every block in a category
+    @"Mod: create"                category name in quotes
+    preset:ore_finder             every block a preset makes visible
+    "my-mod:block"                quoted block ID or glob
+
+Terms are combined with set operators:
+
+    a | b,  a + b,  a , b         union
+    a - b                         difference
+    a & b                         intersection
+    ( ... )                       grouping
+
+"&" binds tighter than the other operators, which are applied left to right:
+"@Stairs | @Slabs - *oak*" is "(@Stairs | @Slabs) - *oak*". Block IDs that
+contain an operator character must be quoted.
+
+An expression is parsed once into a tree of closures (compile_selection is
+cached), and evaluated to a registry bitmask: blocks, categories and presets
+are mask lookups, and glob/regex matches are computed once per registry and
+pattern (see BlockRegistry.pattern_mask), so repeated evaluation stays cheap
+on registries with tens of thousands of modded blocks.
+"""
+
+import re
+import fnmatch
+import weakref
+from functools import lru_cache
+from typing import Callable, Optional
+
+from block_registry import BlockRegistry, get_registry
+
+
+# Evaluates a parsed expression against a registry
+Matcher = Callable[[BlockRegistry], int]
+
+PRESET_PREFIX = "preset:"
+
+VANILLA_NAMESPACE = "minecraft:"
+
+_UNION_OPERATORS = "|+,"
+_OPERATORS = "|+,-&()"
+_GLOB_CHARACTERS = "*?["
+
+
+class SelectionError(ValueError):
+    """Raised when a selection expression cannot be parsed or evaluated."""
+
+
+# =============================================================================
+# COMPILED SELECTIONS
+# =============================================================================
+
+class CompiledSelection:
+    """
+    A parsed selection expression.
+
+    Attributes:
+        expression: The source text
+    """
+
+    def __init__(self, expression: str, matcher: Matcher) -> None:
+        self.expression = expression
+        self._matcher = matcher
+        self._masks: "weakref.WeakKeyDictionary[BlockRegistry, int]" = weakref.WeakKeyDictionary()
+
+    def mask(self, registry: Optional[BlockRegistry] = None) -> int:
+        """
+        Evaluate the expression to a bitmask of visible blocks.
+
+        Raises:
+            SelectionError: If a block, category or preset does not exist
+        """
+        if registry is None:
+            registry = get_registry()
+        mask = self._masks.get(registry)
+        if mask is None:
+            mask = self._masks[registry] = self._matcher(registry)
+        return mask
+
+    def blocks(self, registry: Optional[BlockRegistry] = None) -> set[str]:
+        """Evaluate the expression to a set of block IDs."""
+        if registry is None:
+            registry = get_registry()
+        return registry.blocks_of(self.mask(registry))
+
+    def __repr__(self) -> str:
+        return f"CompiledSelection({self.expression!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_selection(expression: str) -> CompiledSelection:
+    """
+    Parse a selection expression (cached per expression text).
+
+    Raises:
+        SelectionError: If the expression is malformed
+    """
+    parser = _Parser(expression)
+    matcher = parser.parse()
+    return CompiledSelection(expression, matcher)
+
+
+def select_blocks(expression: str, registry: Optional[BlockRegistry] = None) -> set[str]:
+    """Parse and evaluate a selection expression to a set of block IDs."""
+    return compile_selection(expression).blocks(registry)
+
+
+# =============================================================================
+# TERMS
+# =============================================================================
+
+def _block_matcher(block: str) -> Matcher:
+    def match(registry: BlockRegistry) -> int:
+        if block not in registry:
+            raise SelectionError(f"unknown block {block!r}")
+        return registry.bit(block)
+    return match
+
+
+def _pattern_matcher(pattern: "re.Pattern[str]") -> Matcher:
+    def match(registry: BlockRegistry) -> int:
+        return registry.pattern_mask(pattern)
+    return match
+
+
+def _category_matcher(category: str) -> Matcher:
+    def match(registry: BlockRegistry) -> int:
+        if category not in registry.category_masks:
+            raise SelectionError(f"unknown category {category!r}")
+        return registry.category_masks[category]
+    return match
+
+
+def _preset_matcher(preset_key: str) -> Matcher:
+    def match(registry: BlockRegistry) -> int:
+        if preset_key not in registry.preset_masks:
+            raise SelectionError(f"unknown preset {preset_key!r}")
+        return registry.preset_masks[preset_key]
+    return match
+
+
+def _name_matcher(name: str) -> Matcher:
+    """Matcher for a bare or quoted name: a glob if it has wildcards, else one block."""
+    if name.startswith(VANILLA_NAMESPACE):
+        name = name[len(VANILLA_NAMESPACE):]
+    if any(character in name for character in _GLOB_CHARACTERS):
+        return _pattern_matcher(re.compile(fnmatch.translate(name)))
+    return _block_matcher(name)
+
+
+def _combine(operator: str, left: Matcher, right: Matcher) -> Matcher:
+    if operator == '&':
+        return lambda registry: left(registry) & right(registry)
+    if operator == '-':
+        return lambda registry: left(registry) & ~right(registry)
+    return lambda registry: left(registry) | right(registry)
+
+
+# =============================================================================
+# PARSER
+# =============================================================================
+
+class _Parser:
+    """
+    Recursive-descent parser over the expression text.
+
+    Grammar:
+        union        := intersection (("|" | "+" | "," | "-") intersection)*
+        intersection := term ("&" term)*
+        term         := "(" union ")" | "@" category | "/" regex "/"
+                        | quoted | name
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.position = 0
+
+    def error(self, message: str) -> SelectionError:
+        return SelectionError(f"{message} at position {self.position} in {self.text!r}")
+
+    def skip_spaces(self) -> None:
+        while self.position < len(self.text) and self.text[self.position].isspace():
+            self.position += 1
+
+    def peek(self) -> str:
+        self.skip_spaces()
+        return self.text[self.position] if self.position < len(self.text) else ""
+
+    def parse(self) -> Matcher:
+        if not self.peek():
+            raise self.error("empty selection")
+        matcher = self.parse_union()
+        if self.peek():
+            raise self.error(f"unexpected {self.peek()!r}")
+        return matcher
+
+    def parse_union(self) -> Matcher:
+        matcher = self.parse_intersection()
+        while self.peek() and self.peek() in _UNION_OPERATORS + '-':
+            operator = self.peek()
+            self.position += 1
+            matcher = _combine(operator, matcher, self.parse_intersection())
+        return matcher
+
+    def parse_intersection(self) -> Matcher:
+        matcher = self.parse_term()
+        while self.peek() == '&':
+            self.position += 1
+            matcher = _combine('&', matcher, self.parse_term())
+        return matcher
+
+    def parse_term(self) -> Matcher:
+        character = self.peek()
+        if not character:
+            raise self.error("expected a block, pattern, category or preset")
+
+        if character == '(':
+            self.position += 1
+            matcher = self.parse_union()
+            if self.peek() != ')':
+                raise self.error("expected ')'")
+            self.position += 1
+            return matcher
+
+        if character == '@':
+            self.position += 1
+            if self.peek() == '"':
+                category = self.read_quoted()
+            else:
+                category = self.read_category()
+            if not category:
+                raise self.error("expected a category name after '@'")
+            return _category_matcher(category)
+
+        if character == '/':
+            return _pattern_matcher(self.read_regex())
+
+        if character == '"':
+            return _name_matcher(self.read_quoted())
+
+        if character in _OPERATORS:
+            raise self.error(f"unexpected {character!r}")
+
+        name = self.read_name()
+        if name.startswith(PRESET_PREFIX):
+            return _preset_matcher(name[len(PRESET_PREFIX):])
+        return _name_matcher(name)
+
+    def read_name(self) -> str:
+        start = self.position
+        while (
+            self.position < len(self.text)
+            and not self.text[self.position].isspace()
+            and self.text[self.position] not in _OPERATORS
+        ):
+            self.position += 1
+        return self.text[start:self.position]
+
+    def read_category(self) -> str:
+        """Read an unquoted category name, which may hold spaces and balanced parentheses."""
+        start = self.position
+        depth = 0
+        while self.position < len(self.text):
+            character = self.text[self.position]
+            if character == '(':
+                depth += 1
+            elif character == ')':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif character in _OPERATORS:
+                break
+            self.position += 1
+        return self.text[start:self.position].strip()
+
+    def read_quoted(self) -> str:
+        start = self.position
+        end = self.text.find('"', start + 1)
+        if end == -1:
+            raise self.error("unterminated quote")
+        self.position = end + 1
+        return self.text[start + 1:end]
+
+    def read_regex(self) -> "re.Pattern[str]":
+        start = self.position
+        self.position += 1
+        while self.position < len(self.text) and self.text[self.position] != '/':
+            # "\/" is a literal slash inside the pattern
+            self.position += 2 if self.text[self.position] == '\\' else 1
+        if self.position >= len(self.text):
+            self.position = start
+            raise self.error("unterminated regular expression")
+        source = self.text[start + 1:self.position].replace('\\/', '/')
+        self.position += 1
+        try:
+            return re.compile(source)
+        except re.error as error:
+            raise SelectionError(f"invalid regular expression /{source}/: {error}")
@@ -0,0 +1,501 @@
+"""
+Ghost Backend for Minecraft X-Ray Resource Pack Generator
+=========================================================
+
+Alternative to fully invisible blocks: hidden blocks are drawn as faint,
+see-through versions of their real textures, so caves and tunnels stay
+recognizable while the visible blocks stand out. Needs a client jar (1.17+,
+pack format 7 and later), which the textures and models are read from.
+
+For every hidden block the jar has a blockstate for:
+
+    - its vanilla blockstate is copied with every model replaced by a ghost
+      model (variant keys, rotations and multipart conditions are kept),
+    - each ghost model has the vanilla model as parent and overrides every
+      texture variable with a ghost texture; it also asks for the
+      translucent render type, which Forge and NeoForge honor,
+    - each ghost texture is the vanilla texture with its alpha scaled by
+      alpha / 255, in a folder of its own, so visible blocks that share the
+      texture keep the original.
+
+Vanilla clients draw a block in a fixed render layer and ignore alpha in the
+solid and cutout layers, so the solid and cutout terrain shaders are patched
+with screen-door transparency: a texel below full alpha is discarded in a
+fraction of the pixels that matches its alpha. Textures of visible blocks
+are opaque there and unaffected; translucent blocks (glass, ice) blend as
+usual.
+
+Texture work is the expensive part of a build and runs at most once per
+client jar and alpha:
+
+    - alpha is rewritten for a whole batch of decoded textures in one
+      operation (NumPy if it is installed, bytes.translate otherwise),
+    - batches are decoded and encoded in a process pool,
+    - results are cached on disk by jar SHA-1 and alpha, so repeat builds
+      only read them back.
+
+Hidden blocks the jar has no blockstate for (modded blocks), and blocks with
+a model whose textures cannot all be ghosted (unreadable or unsupported
+PNGs, no texture variables), stay fully invisible rather than half drawn.
+Block entities (chests, signs, beds, ...) are not drawn from block models
+and are left untouched.
+"""
+
+import os
+import json
+import zipfile
+import zlib
+from functools import lru_cache
+from itertools import repeat
+from typing import Optional
+
+from block_registry import BlockRegistry
+from pack_metrics import STAGE_GHOST, ProgressCallback, progress_reporter
+from pack_writer import PackSink, write_file_atomic
+from shader_backend import SHADER_MIN_FORMAT, decode_png, encode_png, patch_fragment_shader
+from vanilla_assets import ASSETS_PREFIX, DEFAULT_INDEX_DIR, VanillaAssets
+
+
+DEFAULT_GHOST_ALPHA = 64
+
+# Full alpha would make ghosts opaque, zero invisible
+MIN_GHOST_ALPHA = 1
+MAX_GHOST_ALPHA = 254
+
+# Models and textures of ghost blocks, e.g. block/xray/ghost/stone
+GHOST_PREFIX = "block/xray/ghost"
+
+# Forge/NeoForge model property selecting the render layer
+TRANSLUCENT_RENDER_TYPE = "minecraft:translucent"
+
+# Terrain shaders that ignore alpha in vanilla; the ones a client jar lacks are skipped
+GHOST_SHADERS = (
+    "rendertype_solid",
+    "rendertype_cutout",
+    "rendertype_cutout_mipped",
+)
+
+GHOST_TEST = (
+    "    // x-ray: screen-door transparency for texels of ghost blocks\n"
+    "    float xrayAlpha = texture(Sampler0, texCoord0).a;\n"
+    "    if (xrayAlpha < 1.0 && xrayAlpha <= fract(52.9829189 * fract(dot(gl_FragCoord.xy, "
+    "vec2(0.06711056, 0.00583715))))) {\n"
+    "        discard;\n"
+    "    }\n"
+)
+
+# Bump when the processing of ghost textures changes
+GHOST_CACHE_VERSION = 1
+
+DEFAULT_GHOST_CACHE_DIR = os.path.join(DEFAULT_INDEX_DIR, "ghost")
+
+# Fewer textures than this are processed in-process; the pool would not pay off
+POOL_MIN_TEXTURES = 64
+
+# Textures per pool task
+BATCH_SIZE = 32
+
+
+# =============================================================================
+# TEXTURES
+# =============================================================================
+
+def validate_ghost_alpha(alpha: int) -> int:
+    """
+    Check a ghost alpha.
+
+    Raises:
+        ValueError: If it is outside MIN_GHOST_ALPHA..MAX_GHOST_ALPHA
+    """
+    if not MIN_GHOST_ALPHA <= alpha <= MAX_GHOST_ALPHA:
+        raise ValueError(f"ghost alpha must be between {MIN_GHOST_ALPHA} and {MAX_GHOST_ALPHA}")
+    return alpha
+
+
+@lru_cache(maxsize=None)
+def _load_numpy():
+    """Import NumPy on first use, so builds without ghosts never load it (None if missing)."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def scale_alpha(pixels: bytearray, alpha: int) -> None:
+    """Scale the alpha channel of 8-bit RGBA pixels in place by alpha / 255 (rounded)."""
+    numpy = _load_numpy()
+    if numpy is not None:
+        channel = numpy.frombuffer(pixels, dtype=numpy.uint8)[3::4]
+        channel[:] = (channel.astype(numpy.uint16) * alpha + 127) // 255
+    else:
+        table = bytes((value * alpha + 127) // 255 for value in range(256))
+        pixels[3::4] = pixels[3::4].translate(table)
+
+
+def ghost_textures(textures: list[bytes], alpha: int) -> list[Optional[bytes]]:
+    """
+    Turn a batch of PNG textures into ghost textures.
+
+    The pixels of the whole batch are decoded into one buffer, so the alpha
+    is rewritten in a single operation.
+
+    Returns:
+        Ghost PNG of every texture, or None for textures that cannot be
+        decoded
+    """
+    images = []
+    for data in textures:
+        try:
+            images.append(decode_png(data))
+        except (ValueError, zlib.error):
+            images.append(None)
+
+    pixels = bytearray().join(image[2] for image in images if image is not None)
+    scale_alpha(pixels, alpha)
+
+    results: list[Optional[bytes]] = []
+    offset = 0
+    for image in images:
+        if image is None:
+            results.append(None)
+            continue
+        width, height, _ = image
+        size = width * height * 4
+        results.append(encode_png(width, height, pixels[offset:offset + size]))
+        offset += size
+    return results
+
+
+def ghost_texture_batches(
+    textures: list[bytes],
+    alpha: int,
+    max_workers: Optional[int] = None
+) -> list[Optional[bytes]]:
+    """
+    Turn many PNG textures into ghost textures, in parallel processes.
+
+    Args:
+        textures: PNG data of the textures
+        alpha: Ghost alpha
+        max_workers: Upper bound on processes (defaults to CPU count; 1
+            processes everything in this process)
+
+    Returns:
+        Ghost PNGs in the order of textures (see ghost_textures)
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(textures) < POOL_MIN_TEXTURES:
+        return ghost_textures(textures, alpha)
+
+    # Only needed for large uncached builds
+    from concurrent.futures import ProcessPoolExecutor
+
+    batches = [textures[start:start + BATCH_SIZE] for start in range(0, len(textures), BATCH_SIZE)]
+    max_workers = min(max_workers, len(batches))
+    results: list[Optional[bytes]] = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for batch in executor.map(ghost_textures, batches, repeat(alpha)):
+            results.extend(batch)
+    return results
+
+
+def ghost_cache_dir(
+    vanilla: VanillaAssets,
+    alpha: int,
+    cache_dir: str = DEFAULT_GHOST_CACHE_DIR
+) -> str:
+    """Folder holding the cached ghost textures of a client jar at an alpha."""
+    return os.path.join(cache_dir, f"v{GHOST_CACHE_VERSION}", vanilla.jar_sha1, str(alpha))
+
+
+def load_ghost_textures(
+    vanilla: VanillaAssets,
+    paths: list[str],
+    alpha: int,
+    cache_dir: str = DEFAULT_GHOST_CACHE_DIR,
+    max_workers: Optional[int] = None
+) -> tuple[dict[str, bytes], int]:
+    """
+    Get the ghost textures of client jar textures, from the cache where possible.
+
+    Textures missing from the cache are processed and added to it; a cache
+    that cannot be written (read-only home directory) only costs the work.
+
+    Args:
+        vanilla: Client jar to read textures from
+        paths: Texture asset paths, e.g. "textures/block/stone.png"
+        alpha: Ghost alpha
+        cache_dir: Root of the ghost texture cache
+        max_workers: Upper bound on processes (see ghost_texture_batches)
+
+    Returns:
+        Tuple of (ghost PNG per texture path, number read from the cache);
+        textures that cannot be decoded are left out
+    """
+    directory = ghost_cache_dir(vanilla, alpha, cache_dir)
+    ghosts: dict[str, bytes] = {}
+    missing = []
+    for path in paths:
+        try:
+            with open(os.path.join(directory, path), 'rb') as file:
+                ghosts[path] = file.read()
+        except OSError:
+            missing.append(path)
+    cached = len(ghosts)
+
+    sources = []
+    for path in missing:
+        try:
+            sources.append(vanilla.read_asset(path))
+        except (KeyError, zipfile.BadZipFile, zlib.error):
+            sources.append(b"")
+
+    for path, data in zip(missing, ghost_texture_batches(sources, alpha, max_workers)):
+        if data is None:
+            continue
+        ghosts[path] = data
+        cache_path = os.path.join(directory, path)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            write_file_atomic(cache_path, data)
+        except OSError:
+            pass
+    return ghosts, cached
+
+
+def warm_ghost_cache(
+    vanilla: VanillaAssets,
+    registry: BlockRegistry,
+    alpha: int = DEFAULT_GHOST_ALPHA,
+    cache_dir: str = DEFAULT_GHOST_CACHE_DIR,
+    max_workers: Optional[int] = None
+) -> int:
+    """
+    Cache the ghost textures of every registry block the client jar has.
+
+    Lets many builds (batch workers) share one pass of texture work instead
+    of each processing the same textures.
+
+    Returns:
+        Number of ghost textures processed or read from the cache
+    """
+    textures: set[str] = set()
+    for block in registry.iter_blocks(registry.available_mask(None)):
+        if block in vanilla:
+            textures.update(vanilla.block_textures(block))
+    ghosts, _ = load_ghost_textures(vanilla, sorted(textures), alpha, cache_dir, max_workers)
+    return len(ghosts)
+
+
+# =============================================================================
+# MODELS AND BLOCKSTATES
+# =============================================================================
+
+def ghost_reference(reference: str) -> str:
+    """
+    Return the ghost counterpart of a model or texture reference.
+
+    "minecraft:block/stone" and "block/stone" both become
+    "block/xray/ghost/stone".
+    """
+    name = reference.split(':')[-1]
+    if name.startswith("block/"):
+        name = name[len("block/"):]
+    return f"{GHOST_PREFIX}/{name}"
+
+
+def texture_reference(path: str) -> str:
+    """Return the reference of a texture path ("textures/block/stone.png" -> "block/stone")."""
+    return path[len("textures/"):-len(".png")]
+
+
+def make_ghost_blockstate(blockstate: dict) -> dict:
+    """
+    Replace every model of a vanilla blockstate with its ghost model.
+
+    Unlike make_invisible_blockstate, rotations, uvlock and weights are kept,
+    since ghosts are drawn with the real model shape.
+
+    Raises:
+        ValueError: If the blockstate has neither variants nor multipart
+    """
+    def convert(models):
+        if isinstance(models, list):
+            return [convert(model) for model in models]
+        converted = dict(models)
+        if isinstance(converted.get("model"), str):
+            converted["model"] = ghost_reference(converted["model"])
+        return converted
+
+    if "variants" in blockstate:
+        return {"variants": {key: convert(value) for key, value in blockstate["variants"].items()}}
+
+    if "multipart" in blockstate:
+        parts = []
+        for part in blockstate["multipart"]:
+            converted = {"apply": convert(part.get("apply", {}))}
+            if "when" in part:
+                converted["when"] = part["when"]
+            parts.append(converted)
+        return {"multipart": parts}
+
+    raise ValueError("blockstate has neither 'variants' nor 'multipart'")
+
+
+def build_ghost_model(model: str, variables: dict[str, str], ghosts: dict[str, bytes]) -> dict:
+    """
+    Return the ghost model of a vanilla model.
+
+    Args:
+        model: Vanilla model reference, e.g. "minecraft:block/stone"
+        variables: Texture path of each of its texture variables (see
+            VanillaAssets.model_texture_variables)
+        ghosts: Ghost textures by texture path
+
+    Raises:
+        ValueError: If the model has no texture variables, or a variable's
+            texture has no ghost (the model would keep vanilla textures)
+    """
+    if not variables:
+        raise ValueError(f"model {model} has no texture variables")
+    missing = sorted(path for path in variables.values() if path not in ghosts)
+    if missing:
+        raise ValueError(f"model {model} has textures without ghosts: {', '.join(missing)}")
+    return {
+        "parent": model,
+        "render_type": TRANSLUCENT_RENDER_TYPE,
+        "textures": {
+            key: ghost_reference(texture_reference(path)) for key, path in variables.items()
+        },
+    }
+
+
+# =============================================================================
+# PACK ASSETS
+# =============================================================================
+
+def supports_ghost_backend(pack_format: int, vanilla: Optional[VanillaAssets]) -> bool:
+    """Whether a pack for this format can use the ghost backend with this client jar."""
+    return (
+        vanilla is not None
+        and pack_format >= SHADER_MIN_FORMAT
+        and any(vanilla.has_asset(f"shaders/core/{name}.fsh") for name in GHOST_SHADERS)
+    )
+
+
+def write_ghost_assets(
+    sink: PackSink,
+    visible_blocks: set[str],
+    registry: BlockRegistry,
+    vanilla: VanillaAssets,
+    alpha: int = DEFAULT_GHOST_ALPHA,
+    pack_format: Optional[int] = None,
+    verbose: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cache_dir: str = DEFAULT_GHOST_CACHE_DIR,
+    max_workers: Optional[int] = None
+) -> set[str]:
+    """
+    Write the patched terrain shaders and the ghost blockstates, models and textures.
+
+    A block is only drawn as a ghost if every texture variable of every one
+    of its models has a ghost texture. Hidden blocks that are not returned
+    still need invisible blockstates.
+
+    Args:
+        sink: Destination for the pack entries
+        visible_blocks: Blocks that should stay visible
+        registry: Block registry to generate from
+        vanilla: Client jar to copy shaders, blockstates, models and textures from
+        alpha: Alpha of a fully opaque ghost texel (MIN_GHOST_ALPHA..MAX_GHOST_ALPHA)
+        pack_format: Only write blocks that exist in this pack format
+        verbose: Print progress messages
+        progress: Report progress messages here instead of printing them
+        cache_dir: Root of the ghost texture cache
+        max_workers: Upper bound on texture processes (see ghost_texture_batches)
+
+    Returns:
+        The hidden blocks that were written as ghosts
+
+    Raises:
+        ValueError: If the alpha is out of range
+    """
+    validate_ghost_alpha(alpha)
+    progress = progress_reporter(progress, verbose)
+
+    shader_count = 0
+    for name in GHOST_SHADERS:
+        path = f"shaders/core/{name}.fsh"
+        if not vanilla.has_asset(path):
+            continue
+        source = vanilla.read_asset(path).decode('utf-8')
+        patched = patch_fragment_shader(source, GHOST_TEST)
+        sink.write_entry(f"{ASSETS_PREFIX}{path}", patched.encode('utf-8'))
+        shader_count += 1
+    if progress is not None:
+        progress(STAGE_GHOST, f"Patched {shader_count} terrain shaders")
+
+    available_mask = registry.available_mask(pack_format)
+    visible_mask = available_mask & registry.mask_of(
+        block for block in visible_blocks if block in registry
+    )
+
+    # Ghost blockstates, and the models and textures they need
+    blockstates: dict[str, dict] = {}
+    block_models: dict[str, set[str]] = {}
+    variables: dict[str, dict[str, str]] = {}
+    for block in registry.iter_blocks(available_mask & ~visible_mask):
+        if block not in vanilla:
+            continue
+        try:
+            blockstates[block] = make_ghost_blockstate(vanilla.read_blockstate(block))
+        except (KeyError, ValueError, zipfile.BadZipFile, zlib.error):
+            continue
+        block_models[block] = set(vanilla.block_models(block))
+        for model in block_models[block]:
+            if model not in variables:
+                variables[model] = vanilla.model_texture_variables(model)
+
+    textures = sorted({path for paths in variables.values() for path in paths.values()})
+    ghosts, cached = load_ghost_textures(vanilla, textures, alpha, cache_dir, max_workers)
+
+    # A model with an unghosted texture would draw part of the block opaque,
+    # so such blocks fall back to invisible blockstates
+    models: dict[str, dict] = {}
+    for model in sorted(variables):
+        try:
+            models[model] = build_ghost_model(model, variables[model], ghosts)
+        except ValueError:
+            continue
+    for block in list(blockstates):
+        if not block_models[block] or not block_models[block] <= models.keys():
+            del blockstates[block]
+    used_models = set().union(*(block_models[block] for block in blockstates))
+    textures = sorted({path for model in used_models for path in variables[model].values()})
+
+    for path in textures:
+        ghost_path = f"{ASSETS_PREFIX}textures/{ghost_reference(texture_reference(path))}.png"
+        sink.write_entry(ghost_path, ghosts[path])
+        # Animated textures need their metadata next to the image
+        if vanilla.has_asset(f"{path}.mcmeta"):
+            sink.write_entry(f"{ghost_path}.mcmeta", vanilla.read_asset(f"{path}.mcmeta"))
+    if progress is not None:
+        progress(STAGE_GHOST, f"Created {len(ghosts)} ghost textures ({cached} cached)")
+
+    # Sorted keys keep the bytes stable, as in the rest of the pack
+    for model in sorted(used_models):
+        sink.write_entry(
+            f"{ASSETS_PREFIX}models/{ghost_reference(model)}.json",
+            json.dumps(models[model], indent=4, sort_keys=True).encode('utf-8'),
+        )
+    for block, blockstate in blockstates.items():
+        sink.write_entry(
+            f"{ASSETS_PREFIX}blockstates/{block}.json",
+            json.dumps(blockstate, indent=4, sort_keys=True).encode('utf-8'),
+        )
+    if progress is not None:
+        progress(STAGE_GHOST, f"{len(blockstates)} blocks drawn as ghosts")
+
+    return set(blockstates)
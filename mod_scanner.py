@@ -0,0 +1,209 @@
+"""
+Mod Scanner for Minecraft X-Ray Resource Pack Generator
+=======================================================
+
+Discovers the blocks added by the mods in a mods folder, so they can be
+made invisible alongside the vanilla blocks.
+
+Every jar's blockstates are listed from its zip central directory only
+(assets/<namespace>/blockstates/<block>.json); no entry is ever inflated.
+Changed jars are scanned in parallel across a process pool. The listings are
+persisted in an index keyed by jar path, modification time and size, so
+unchanged jars are never reopened on later runs.
+
+Modded blocks use namespaced IDs ("create:andesite_casing") and get one
+category per namespace. Blockstates a mod places in the minecraft namespace
+only override vanilla blocks and are ignored.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import zipfile
+from typing import Optional
+
+from vanilla_assets import DEFAULT_INDEX_DIR
+
+
+# Bump when the index file layout changes
+MOD_INDEX_VERSION = 1
+
+MOD_CATEGORY_PREFIX = "Mod: "
+
+# Modded blocks named like vanilla logs and pillars get axis blockstates
+MOD_PILLAR_SUFFIXES = ("_log", "_wood", "_stem", "_hyphae", "_pillar")
+
+# Below this many changed jars the pool costs more than it saves
+MIN_PARALLEL_JARS = 4
+
+
+# =============================================================================
+# JAR SCANNING
+# =============================================================================
+
+def scan_jar(jar_path: str) -> dict[str, list[str]]:
+    """
+    List the blockstates in one mod jar (runs inside a worker process).
+
+    Unreadable jars yield no blocks; they are indexed like any other jar, so
+    they are not retried until they change.
+
+    Returns:
+        Namespace -> sorted block names
+    """
+    namespaces: dict[str, list[str]] = {}
+    try:
+        with zipfile.ZipFile(jar_path) as archive:
+            names = archive.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return namespaces
+
+    for name in names:
+        parts = name.split('/')
+        if (
+            len(parts) != 4
+            or parts[0] != "assets"
+            or parts[2] != "blockstates"
+            or not parts[3].endswith(".json")
+            or parts[1] == "minecraft"
+        ):
+            continue
+        namespaces.setdefault(parts[1], []).append(parts[3][:-len(".json")])
+
+    for blocks in namespaces.values():
+        blocks.sort()
+    return namespaces
+
+
+def list_mod_jars(mods_dir: str) -> list[str]:
+    """Return the absolute paths of the .jar files directly inside mods_dir."""
+    return sorted(
+        os.path.join(os.path.abspath(mods_dir), filename)
+        for filename in os.listdir(mods_dir)
+        if filename.lower().endswith(".jar")
+    )
+
+
+# =============================================================================
+# INDEX
+# =============================================================================
+
+def mod_index_path(mods_dir: str, index_dir: str = DEFAULT_INDEX_DIR) -> str:
+    """Return the index file used for a mods folder."""
+    key = hashlib.sha1(os.path.abspath(mods_dir).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(index_dir, f"mods_{key}.json")
+
+
+def load_mod_index(index_path: str) -> dict[str, dict]:
+    """Load a mod index, or an empty one if it is missing or outdated."""
+    try:
+        with open(index_path, 'r') as file:
+            index = json.load(file)
+        if index.get("index_version") == MOD_INDEX_VERSION:
+            return index["jars"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def save_mod_index(index_path: str, jars: dict[str, dict]) -> None:
+    """Write a mod index atomically."""
+    index_dir = os.path.dirname(index_path)
+    os.makedirs(index_dir, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump({"index_version": MOD_INDEX_VERSION, "jars": jars}, file)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def scan_mods(
+    mods_dir: str,
+    index_dir: str = DEFAULT_INDEX_DIR,
+    max_workers: Optional[int] = None
+) -> dict[str, dict[str, list[str]]]:
+    """
+    Scan a mods folder, reusing the index for jars that have not changed.
+
+    Args:
+        mods_dir: Folder holding the mod jars
+        index_dir: Where the index is persisted
+        max_workers: Upper bound on scanning processes (defaults to CPU count)
+
+    Returns:
+        Jar path -> (namespace -> sorted block names)
+
+    Raises:
+        OSError: If mods_dir cannot be listed
+    """
+    index_path = mod_index_path(mods_dir, index_dir)
+    previous = load_mod_index(index_path)
+
+    jars: dict[str, dict] = {}
+    changed: list[str] = []
+    for jar_path in list_mod_jars(mods_dir):
+        stat = os.stat(jar_path)
+        entry = previous.get(jar_path)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            jars[jar_path] = entry
+        else:
+            jars[jar_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            changed.append(jar_path)
+
+    if len(changed) >= MIN_PARALLEL_JARS:
+        # Imported here: multiprocessing is slow to import and rarely needed
+        from concurrent.futures import ProcessPoolExecutor
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(changed)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            listings = list(executor.map(scan_jar, changed, chunksize=8))
+    else:
+        listings = [scan_jar(jar_path) for jar_path in changed]
+
+    for jar_path, namespaces in zip(changed, listings):
+        jars[jar_path]["namespaces"] = namespaces
+
+    # Rewriting also drops jars that were removed from the folder
+    if changed or jars.keys() != previous.keys():
+        save_mod_index(index_path, jars)
+
+    return {jar_path: entry["namespaces"] for jar_path, entry in jars.items()}
+
+
+# =============================================================================
+# REGISTRY TABLES
+# =============================================================================
+
+def mod_block_tables(scan: dict[str, dict[str, list[str]]]) -> tuple[dict[str, list[str]], set[str]]:
+    """
+    Turn a scan into block tables shaped like those in block_data.
+
+    Returns:
+        Tuple of (categories, pillar_blocks); categories map
+        "Mod: <namespace>" to namespaced block IDs
+    """
+    by_namespace: dict[str, set[str]] = {}
+    for namespaces in scan.values():
+        for namespace, blocks in namespaces.items():
+            by_namespace.setdefault(namespace, set()).update(blocks)
+
+    categories: dict[str, list[str]] = {}
+    pillars: set[str] = set()
+    for namespace in sorted(by_namespace):
+        block_ids = [f"{namespace}:{block}" for block in sorted(by_namespace[namespace])]
+        categories[f"{MOD_CATEGORY_PREFIX}{namespace}"] = block_ids
+        pillars.update(block for block in block_ids if block.endswith(MOD_PILLAR_SUFFIXES))
+
+    return categories, pillars
+
+
+def load_mod_blocks(mods_dir: str, index_dir: str = DEFAULT_INDEX_DIR) -> tuple[dict[str, list[str]], set[str]]:
+    """Scan a mods folder and return its (categories, pillar_blocks) tables."""
+    return mod_block_tables(scan_mods(mods_dir, index_dir))
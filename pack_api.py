@@ -0,0 +1,219 @@
+"""
+Library API for Minecraft X-Ray Resource Pack Generator
+=======================================================
+
+Build packs from other Python programs (bots, web front ends) in-process,
+without prompts, console output or paths relative to the working directory.
+
+Example:
+
+    from pack_api import PackSpec, build_pack
+
+    result = build_pack(PackSpec(version="1.21.4", preset="ore_finder"))
+    upload(result.data, sha1=result.sha1)
+
+The output of build_pack is chosen by its output argument:
+
+    None                  the ZIP is built in memory and returned as
+                          PackResult.data
+    path (str/PathLike)   the ZIP is staged in a temporary file and renamed
+                          to that path when complete (see AtomicZipPackSink)
+    binary file object    the ZIP is streamed into it sequentially (no seeks,
+                          so pipes and sockets work); the caller closes it
+    PackSink              entries go to that sink, which is closed when the
+                          build ends, e.g. AtomicDirectoryPackSink(path) for
+                          an unpacked pack, AtomicZipPackSink(path,
+                          content_addressed=True) or a custom sink
+
+Progress is reported to an optional callback with (stage, message) pairs;
+the stage names are those of pack_metrics. Invalid specs raise ValueError
+before anything is written.
+"""
+
+import io
+import os
+from dataclasses import dataclass, field
+from typing import BinaryIO, Optional, Union
+
+from block_registry import BlockRegistry, get_registry
+from ghost_backend import DEFAULT_GHOST_ALPHA, validate_ghost_alpha
+from pack_metrics import STAGE_ARCHIVE, BuildMetrics, MeteredSink, ProgressCallback
+from pack_writer import AtomicZipPackSink, PackSink, ZipPackSink
+from vanilla_assets import VanillaAssets, check_pack_format, load_client_jar
+from xray_pack_generator import (
+    BACKEND_BLOCKSTATES,
+    BACKENDS,
+    DEFAULT_PACK_NAME,
+    UNIVERSAL_VERSION,
+    resolve_selection,
+    resolve_version,
+    write_pack_entries,
+)
+
+
+PackOutput = Union[None, str, os.PathLike, BinaryIO, PackSink]
+
+
+@dataclass
+class PackSpec:
+    """
+    Everything that determines a pack.
+
+    The visible set is the union of preset, blocks, categories and select
+    (a selection expression, see block_selection).
+
+    Attributes:
+        version: Version key of the registry's pack_formats, or "universal"
+        name: Pack name (used in the pack description)
+        preset: Preset key
+        blocks: Block IDs to keep visible
+        categories: Categories whose blocks stay visible
+        select: Selection expression
+        backend: One of BACKENDS
+        ghost_alpha: Opacity of hidden blocks with the ghost backend
+        reproducible: Byte-identical archives for identical specs
+        client_jar: Local vanilla client jar to copy blockstate variants from
+        vanilla: Already opened client jar (takes precedence over client_jar)
+        registry: Block registry (defaults to block_data)
+    """
+    version: str
+    name: str = DEFAULT_PACK_NAME
+    preset: Optional[str] = None
+    blocks: list[str] = field(default_factory=list)
+    categories: list[str] = field(default_factory=list)
+    select: Optional[str] = None
+    backend: str = BACKEND_BLOCKSTATES
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+    reproducible: bool = False
+    client_jar: Optional[str] = None
+    vanilla: Optional[VanillaAssets] = None
+    registry: Optional[BlockRegistry] = None
+
+
+@dataclass
+class PackResult:
+    """
+    Outcome of build_pack.
+
+    Attributes:
+        name: Pack name
+        version: Version key the pack was built for
+        pack_format: Resource pack format number
+        invisible_count: Blocks hidden by the pack
+        visible_count: Blocks kept visible
+        entry_count: Entries written
+        size: Archive size in bytes (bytes of file content for directories)
+        sha1: Hex SHA-1 of the archive (None unless the output is a ZIP)
+        data: The archive, if it was built in memory
+        output_path: The file or folder published, if the output was a path
+            or an atomic sink
+    """
+    name: str
+    version: str
+    pack_format: int
+    invisible_count: int
+    visible_count: int
+    entry_count: int
+    size: int
+    sha1: Optional[str] = None
+    data: Optional[bytes] = None
+    output_path: Optional[str] = None
+
+
+def resolve_spec(spec: PackSpec) -> tuple[BlockRegistry, Optional[VanillaAssets], int, set[str]]:
+    """
+    Validate a spec.
+
+    Returns:
+        Tuple of (registry, vanilla, pack_format, visible_blocks)
+
+    Raises:
+        ValueError: If the version, backend, ghost alpha, preset, blocks,
+            categories or selection expression are invalid, or the client jar
+            is unreadable or for another pack format
+    """
+    registry = spec.registry if spec.registry is not None else get_registry()
+    pack_format = resolve_version(spec.version, registry)
+    if spec.backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {', '.join(BACKENDS)}")
+    validate_ghost_alpha(spec.ghost_alpha)
+    visible_blocks = resolve_selection(
+        spec.preset, spec.blocks, spec.categories, registry, spec.select
+    )
+
+    vanilla = spec.vanilla
+    if vanilla is None and spec.client_jar is not None:
+        try:
+            vanilla = load_client_jar(spec.client_jar)
+        except OSError as error:
+            raise ValueError(f"cannot read client jar: {error}")
+    if spec.version != UNIVERSAL_VERSION:
+        check_pack_format(vanilla, pack_format)
+    return registry, vanilla, pack_format, visible_blocks
+
+
+def build_pack(
+    spec: PackSpec,
+    output: PackOutput = None,
+    progress: Optional[ProgressCallback] = None,
+    metrics: Optional[BuildMetrics] = None
+) -> PackResult:
+    """
+    Build a pack without any console output.
+
+    Args:
+        spec: What to build
+        output: Where to write it (see the module docstring)
+        progress: Called with (stage, message) as the build advances
+        metrics: Record per-stage measurements here (see pack_metrics); the
+            caller finishes and publishes them
+
+    Returns:
+        Block counts, archive size, entry count and SHA-1, plus the archive
+        itself for in-memory builds
+
+    Raises:
+        ValueError: If the spec is invalid
+        OSError: If the output cannot be written
+    """
+    registry, vanilla, pack_format, visible_blocks = resolve_spec(spec)
+
+    buffer = None
+    if output is None:
+        buffer = io.BytesIO()
+        sink: PackSink = ZipPackSink(buffer, reproducible=spec.reproducible)
+    elif isinstance(output, (str, os.PathLike)):
+        sink = AtomicZipPackSink(output, reproducible=spec.reproducible)
+    elif isinstance(output, PackSink):
+        sink = output
+    elif hasattr(output, "write"):
+        sink = ZipPackSink(output, reproducible=spec.reproducible)
+    else:
+        raise ValueError(f"unsupported output {type(output).__name__}")
+
+    with (MeteredSink(sink, metrics) if metrics is not None else sink) as target:
+        invisible_count, visible_count = write_pack_entries(
+            target, spec.name, spec.version, pack_format, visible_blocks,
+            registry=registry, vanilla=vanilla, backend=spec.backend,
+            metrics=metrics, progress=progress, ghost_alpha=spec.ghost_alpha
+        )
+
+    # Atomic sinks know their final (possibly content-addressed) path once closed
+    output_path = getattr(sink, "path", None)
+    entry_count = getattr(sink, "entry_count", 0)
+    size = getattr(sink, "size", 0)
+    if progress is not None:
+        progress(STAGE_ARCHIVE, f"Wrote {entry_count} entries ({size} bytes)")
+
+    return PackResult(
+        name=spec.name,
+        version=spec.version,
+        pack_format=pack_format,
+        invisible_count=invisible_count,
+        visible_count=visible_count,
+        entry_count=entry_count,
+        size=size,
+        sha1=sink.sha1 if isinstance(sink, ZipPackSink) else None,
+        data=buffer.getvalue() if buffer is not None else None,
+        output_path=output_path,
+    )
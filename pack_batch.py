@@ -0,0 +1,504 @@
+"""
+Batch Mode for Minecraft X-Ray Resource Pack Generator
+======================================================
+
+Builds many resource packs without any prompts, from a JSON or TOML manifest.
+Jobs are spread across a bounded process pool and a summary is printed once
+all of them have finished.
+
+Manifest format (JSON):
+
+    {
+        "output_dir": "packs",
+        "packs": [
+            {"name": "Ore_Finder_1214", "version": "1.21.4", "preset": "ore_finder"},
+            {"name": "Custom", "version": "1.20 - 1.20.1",
+             "blocks": ["diamond_ore", "deepslate_diamond_ore"]}
+        ]
+    }
+
+The same structure in TOML uses a [[packs]] table per pack. "version" must be
+a key of VERSION_TO_PACK_FORMAT, or "universal" for one pack serving all of
+them. "preset", "categories", "blocks" and "select" (a selection expression
+such as "*_ore - @Ores (Nether)", see block_selection) may be combined; the
+visible set is their union.
+
+An optional top-level "cache_dir" enables the content-addressed build cache,
+so packs with a selection that was already built are copied, not rebuilt.
+Cached archives are always built reproducibly, since one entry serves every
+later run with the same selection.
+Setting "reproducible": true makes every archive byte-identical for
+identical inputs, and "sha1_files": true writes a <name>.zip.sha1 sidecar
+next to each archive. With "incremental": true (and no cache), existing
+archives in output_dir are patched from their build manifests instead of
+being rebuilt. "client_jar" names a local vanilla client jar whose
+blockstate variants are copied (see vanilla_assets), and "mods_dir" a
+folder of mod jars whose blocks are hidden too and may be named in "blocks"
+and "categories" (see mod_scanner). "backend": "shader" hides blocks with
+patched core shaders instead of blockstates (needs "client_jar"; packs for
+formats without core shaders still use blockstates), and "backend": "ghost"
+draws hidden blocks as see-through copies of their real textures, at an
+opacity of "ghost_alpha" (see ghost_backend).
+
+Archives are written to a private temporary file and renamed into place, so
+workers never see or clobber each other's partial output. With
+"content_addressed": true each archive is published as <name>-<sha1>.zip
+(not with "incremental", which patches the archive under its plain name).
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+from block_registry import BlockRegistry, get_registry
+from ghost_backend import DEFAULT_GHOST_ALPHA, validate_ghost_alpha, warm_ghost_cache
+from pack_cache import PackCache, selection_fingerprint
+from pack_incremental import incremental_build
+from pack_metrics import (
+    STAGE_SETUP,
+    BuildMetrics,
+    MeteredSink,
+    build_metrics_from_dict,
+    metrics_enabled,
+    publish_metrics,
+    stage,
+)
+from pack_writer import (
+    AtomicZipPackSink,
+    ZipPackSink,
+    content_addressed_path,
+    copy_file_atomic,
+    write_file_atomic,
+)
+from vanilla_assets import check_pack_format, load_client_jar
+from xray_pack_generator import (
+    BACKEND_BLOCKSTATES,
+    BACKEND_GHOST,
+    BACKENDS,
+    UNIVERSAL_VERSION,
+    backend_fingerprint,
+    build_labels,
+    count_pack_blocks,
+    resolve_selection,
+    resolve_version,
+    write_pack_entries,
+)
+
+
+# =============================================================================
+# JOB DEFINITIONS
+# =============================================================================
+
+@dataclass
+class PackJob:
+    """A single pack to build."""
+    name: str
+    version_string: str
+    pack_format: int
+    visible_blocks: frozenset[str]
+
+
+@dataclass
+class JobResult:
+    """Outcome of building one pack."""
+    name: str
+    output_path: str
+    success: bool
+    invisible_count: int = 0
+    visible_count: int = 0
+    seconds: float = 0.0
+    size: int = 0
+    sha1: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+    # BuildMetrics.to_dict() of the build, if metrics were collected
+    metrics: Optional[dict] = None
+
+
+@dataclass
+class BatchManifest:
+    """Parsed manifest: the jobs to run and where to put the results."""
+    jobs: list[PackJob] = field(default_factory=list)
+    output_dir: str = "."
+    cache_dir: Optional[str] = None
+    reproducible: bool = False
+    sha1_files: bool = False
+    incremental: bool = False
+    client_jar: Optional[str] = None
+    mods_dir: Optional[str] = None
+    backend: str = BACKEND_BLOCKSTATES
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+    content_addressed: bool = False
+
+
+# =============================================================================
+# MANIFEST LOADING
+# =============================================================================
+
+def load_manifest(path: str, mods_dir: Optional[str] = None) -> BatchManifest:
+    """
+    Read and validate a JSON or TOML batch manifest.
+
+    Args:
+        path: Path to a .json or .toml manifest file
+        mods_dir: Mods folder to validate block names against (overrides
+            the manifest's "mods_dir")
+
+    Returns:
+        Parsed manifest
+
+    Raises:
+        ValueError: If the manifest is malformed or references unknown
+            versions, presets or blocks
+        OSError: If the mods folder cannot be scanned
+    """
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("TOML manifests require Python 3.11+ or the 'tomli' package")
+        with open(path, 'rb') as file:
+            data = tomllib.load(file)
+    else:
+        with open(path, 'r') as file:
+            data = json.load(file)
+
+    if not isinstance(data, dict) or not isinstance(data.get("packs"), list):
+        raise ValueError("Manifest must contain a 'packs' list")
+
+    output_dir = str(data.get("output_dir", "."))
+    cache_dir = data.get("cache_dir")
+    client_jar = data.get("client_jar")
+    if mods_dir is None and data.get("mods_dir") is not None:
+        mods_dir = str(data["mods_dir"])
+    registry = get_registry(mods_dir)
+
+    backend = str(data.get("backend", BACKEND_BLOCKSTATES))
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}")
+    ghost_alpha = data.get("ghost_alpha", DEFAULT_GHOST_ALPHA)
+    if not isinstance(ghost_alpha, int) or isinstance(ghost_alpha, bool):
+        raise ValueError("'ghost_alpha' must be an integer")
+    validate_ghost_alpha(ghost_alpha)
+
+    jobs = []
+    seen_names: set[str] = set()
+
+    for index, spec in enumerate(data["packs"], start=1):
+        jobs.append(parse_job(spec, index, registry))
+        if jobs[-1].name in seen_names:
+            raise ValueError(f"Pack #{index}: duplicate pack name '{jobs[-1].name}'")
+        seen_names.add(jobs[-1].name)
+
+    return BatchManifest(
+        jobs=jobs,
+        output_dir=output_dir,
+        cache_dir=str(cache_dir) if cache_dir is not None else None,
+        reproducible=bool(data.get("reproducible", False)),
+        sha1_files=bool(data.get("sha1_files", False)),
+        incremental=bool(data.get("incremental", False)),
+        client_jar=str(client_jar) if client_jar is not None else None,
+        mods_dir=mods_dir,
+        backend=backend,
+        ghost_alpha=ghost_alpha,
+        content_addressed=bool(data.get("content_addressed", False)),
+    )
+
+
+def parse_job(spec: dict, index: int, registry: Optional[BlockRegistry] = None) -> PackJob:
+    """
+    Convert one manifest entry into a PackJob.
+
+    Raises:
+        ValueError: If the entry is invalid
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Pack #{index}: expected a table/object")
+
+    name = str(spec.get("name", "")).strip().replace(' ', '_')
+    if not name:
+        raise ValueError(f"Pack #{index}: missing 'name'")
+
+    for key in ("version", "preset", "select"):
+        if spec.get(key) is not None and not isinstance(spec[key], str):
+            raise ValueError(f"Pack '{name}': '{key}' must be a string")
+    for key in ("blocks", "categories"):
+        items = spec.get(key, [])
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError(f"Pack '{name}': '{key}' must be a list of strings")
+
+    version_string = spec.get("version")
+    try:
+        pack_format = resolve_version(version_string, registry)
+    except ValueError as error:
+        raise ValueError(f"Pack '{name}': {error}")
+
+    try:
+        visible_blocks = resolve_selection(
+            spec.get("preset"), spec.get("blocks", []), spec.get("categories", []),
+            registry, spec.get("select")
+        )
+    except ValueError as error:
+        raise ValueError(f"Pack '{name}': {error}")
+
+    return PackJob(
+        name=name,
+        version_string=version_string,
+        pack_format=pack_format,
+        visible_blocks=frozenset(visible_blocks),
+    )
+
+
+# =============================================================================
+# EXECUTION
+# =============================================================================
+
+def build_job(
+    job: PackJob,
+    output_dir: str,
+    cache_dir: Optional[str] = None,
+    reproducible: bool = False,
+    sha1_files: bool = False,
+    incremental: bool = False,
+    client_jar: Optional[str] = None,
+    mods_dir: Optional[str] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    content_addressed: bool = False,
+    collect_metrics: bool = False,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> JobResult:
+    """
+    Build a single pack (runs inside a worker process).
+
+    Errors are captured in the result instead of being raised, so one bad job
+    does not abort the rest of the batch. With collect_metrics, the result
+    carries the build's per-stage measurements (see pack_metrics).
+    """
+    output_path = os.path.join(output_dir, f"{job.name}.zip")
+    start = time.perf_counter()
+    cached = False
+    metrics = None
+    if collect_metrics:
+        metrics = BuildMetrics(build_labels(job.name, job.version_string, backend, "batch"))
+
+    def write_archive(zip_sink: ZipPackSink) -> str:
+        with (MeteredSink(zip_sink, metrics) if metrics is not None else zip_sink) as sink:
+            write_pack_entries(
+                sink, job.name, job.version_string, job.pack_format, set(job.visible_blocks),
+                registry=registry, vanilla=vanilla, backend=backend, metrics=metrics,
+                ghost_alpha=ghost_alpha
+            )
+        return zip_sink.sha1
+
+    def build(file) -> str:
+        # Cache entries outlive this run, so they must satisfy --reproducible
+        # runs too; the fingerprint does not record the flag
+        return write_archive(ZipPackSink(file, reproducible=True))
+
+    try:
+        with stage(metrics, STAGE_SETUP):
+            registry = get_registry(mods_dir)
+            vanilla = load_client_jar(client_jar) if client_jar is not None else None
+        if cache_dir is None and incremental:
+            sha1 = incremental_build(
+                output_path, job.name, job.version_string, job.pack_format,
+                set(job.visible_blocks), reproducible=reproducible,
+                registry=registry, vanilla=vanilla, backend=backend, metrics=metrics,
+                ghost_alpha=ghost_alpha
+            ).sha1
+        elif cache_dir is None:
+            zip_sink = AtomicZipPackSink(
+                output_path, reproducible=reproducible, content_addressed=content_addressed
+            )
+            sha1 = write_archive(zip_sink)
+            output_path = zip_sink.path
+        else:
+            cache = PackCache(cache_dir)
+            fingerprint = selection_fingerprint(
+                job.pack_format, job.visible_blocks, job.name, job.version_string,
+                vanilla.jar_sha1 if vanilla is not None else None,
+                registry.fingerprint if mods_dir is not None else None,
+                backend_fingerprint(backend, ghost_alpha)
+            )
+            cached_path, cached = cache.get_or_build(fingerprint, build)
+            sha1 = cache.read_sha1(fingerprint)
+            if content_addressed and sha1 is not None:
+                output_path = content_addressed_path(output_path, sha1)
+            copy_file_atomic(cached_path, output_path)
+        if sha1_files and sha1 is not None:
+            write_file_atomic(f"{output_path}.sha1", f"{sha1}\n".encode('ascii'))
+        invisible_count, visible_count = count_pack_blocks(
+            set(job.visible_blocks), job.pack_format, registry
+        )
+    except Exception as error:
+        return JobResult(
+            name=job.name,
+            output_path=output_path,
+            success=False,
+            seconds=time.perf_counter() - start,
+            error=f"{type(error).__name__}: {error}",
+        )
+
+    return JobResult(
+        name=job.name,
+        output_path=output_path,
+        success=True,
+        invisible_count=invisible_count,
+        visible_count=visible_count,
+        seconds=time.perf_counter() - start,
+        size=os.path.getsize(output_path),
+        sha1=sha1,
+        cached=cached,
+        metrics=metrics.finish().to_dict() if metrics is not None else None,
+    )
+
+
+def run_batch(manifest: BatchManifest, max_workers: Optional[int] = None) -> list[JobResult]:
+    """
+    Build every job in the manifest across a process pool.
+
+    If metrics hooks are registered, the workers measure their builds and the
+    measurements are published here, in the parent process.
+
+    Args:
+        manifest: Parsed manifest
+        max_workers: Upper bound on worker processes (defaults to CPU count)
+
+    Returns:
+        One result per job, in manifest order
+    """
+    if not manifest.jobs:
+        return []
+
+    os.makedirs(manifest.output_dir, exist_ok=True)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(manifest.jobs)))
+
+    collect_metrics = metrics_enabled()
+    results: dict[str, JobResult] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                build_job, job, manifest.output_dir, manifest.cache_dir,
+                manifest.reproducible, manifest.sha1_files, manifest.incremental,
+                manifest.client_jar, manifest.mods_dir, manifest.backend,
+                manifest.content_addressed, collect_metrics, manifest.ghost_alpha
+            ): job
+            for job in manifest.jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:  # worker crashed or result not picklable
+                result = JobResult(
+                    name=job.name,
+                    output_path=os.path.join(manifest.output_dir, f"{job.name}.zip"),
+                    success=False,
+                    error=f"{type(error).__name__}: {error}",
+                )
+            results[job.name] = result
+            if result.metrics is not None:
+                publish_metrics(build_metrics_from_dict(result.metrics))
+
+            if not result.success:
+                status = "FAIL"
+            elif result.cached:
+                status = "HIT "
+            else:
+                status = "OK  "
+            print(f"  [{status}] {result.name} ({result.seconds:.2f}s) {result.sha1 or ''}")
+
+    return [results[job.name] for job in manifest.jobs]
+
+
+def print_batch_summary(results: list[JobResult], elapsed: float) -> None:
+    """Print the end-of-run summary."""
+    succeeded = [result for result in results if result.success]
+    failed = [result for result in results if not result.success]
+
+    print()
+    print("=" * 60)
+    print("  BATCH SUMMARY")
+    print("=" * 60)
+    print(f"  Packs built:  {len(succeeded)}/{len(results)}")
+    print(f"  From cache:   {sum(1 for result in succeeded if result.cached)}")
+    print(f"  Failed:       {len(failed)}")
+    print(f"  Total time:   {elapsed:.2f}s")
+
+    for result in failed:
+        print(f"  - {result.name}: {result.error}")
+    print()
+
+
+def main_batch(manifest_path: str, max_workers: Optional[int] = None,
+               output_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+               reproducible: bool = False, incremental: bool = False,
+               client_jar: Optional[str] = None, mods_dir: Optional[str] = None,
+               backend: Optional[str] = None, content_addressed: bool = False,
+               ghost_alpha: Optional[int] = None) -> int:
+    """
+    Entry point for the --batch command line mode.
+
+    Returns:
+        Process exit code (0 if every pack was built)
+    """
+    try:
+        manifest = load_manifest(manifest_path, mods_dir)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 2
+
+    if output_dir is not None:
+        manifest.output_dir = output_dir
+    if cache_dir is not None:
+        manifest.cache_dir = cache_dir
+    if reproducible:
+        manifest.reproducible = True
+    if incremental:
+        manifest.incremental = True
+    if client_jar is not None:
+        manifest.client_jar = client_jar
+    if backend is not None:
+        manifest.backend = backend
+    if content_addressed:
+        manifest.content_addressed = True
+    if ghost_alpha is not None:
+        manifest.ghost_alpha = ghost_alpha
+
+    # Index the client jar once up front, so workers all load the cached index
+    if manifest.client_jar is not None:
+        try:
+            vanilla = load_client_jar(manifest.client_jar)
+        except (OSError, ValueError) as error:
+            print(f"ERROR: cannot read client jar: {error}")
+            return 2
+        try:
+            for job in manifest.jobs:
+                if job.version_string != UNIVERSAL_VERSION:
+                    check_pack_format(vanilla, job.pack_format)
+        except ValueError as error:
+            print(f"ERROR: {job.name}: {error}")
+            return 2
+
+    # Likewise process the ghost textures once, instead of in every worker
+    if manifest.backend == BACKEND_GHOST and manifest.client_jar is not None:
+        warm_ghost_cache(
+            load_client_jar(manifest.client_jar), get_registry(manifest.mods_dir),
+            manifest.ghost_alpha
+        )
+
+    print(f"Building {len(manifest.jobs)} packs into '{manifest.output_dir}'...")
+    start = time.perf_counter()
+    results = run_batch(manifest, max_workers)
+    print_batch_summary(results, time.perf_counter() - start)
+
+    return 0 if all(result.success for result in results) else 1
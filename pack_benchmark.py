@@ -0,0 +1,374 @@
+"""
+Generation Benchmarks for Minecraft X-Ray Resource Pack Generator
+=================================================================
+
+Measures how the generation pipeline scales, against the real block_data
+registry and against synthetic registries the size of large modded setups.
+
+Every case runs in a fresh worker process, so peak RSS is per case. For each
+case the harness reports wall time per stage, entries/sec, peak RSS, read and
+write syscall counts (Linux only, from /proc/self/io) and output size.
+
+With --startup it instead measures cold-start latency: each startup case runs
+in a fresh interpreter, and the fastest of --repeat runs is reported.
+
+Usage:
+    python pack_benchmark.py
+    python pack_benchmark.py --sizes 1000 10000 100000 --engines zip-memory zip-file
+    python pack_benchmark.py --json bench_output.json
+    python pack_benchmark.py --startup --repeat 10
+
+Results are printed as a table and, with --json, written as a JSON document
+so runs can be compared between engines and releases.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from block_data import BLOCK_CATEGORIES, PILLAR_BLOCKS, PRESETS
+from block_registry import BlockRegistry
+from pack_writer import PackSink, PrecompressedEntry, ZipPackSink, DirectoryPackSink
+from xray_pack_generator import GENERATOR_VERSION, write_blockstate_files, write_pack_entries
+
+
+ENGINES = ("zip-memory", "zip-file", "directory")
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Fraction of blocks kept visible in every case
+VISIBLE_RATIO = 0.1
+
+# Code timed in a fresh interpreter for each startup case
+STARTUP_CASES = {
+    "interpreter": "pass",
+    "import generator": "import xray_pack_generator",
+    "registry compile": "import block_registry; block_registry.compile_block_data()",
+    "registry snapshot": "import block_registry; block_registry.get_registry()",
+    "generator ready": (
+        "import xray_pack_generator as generator; "
+        "generator.resolve_version('1.21.4'); generator.get_preset_blocks('ore_finder')"
+    ),
+}
+
+
+# =============================================================================
+# MEASUREMENT HELPERS
+# =============================================================================
+
+class CountingSink(PackSink):
+    """Sink that discards entries and only counts them (isolates generation cost)."""
+
+    def __init__(self) -> None:
+        self.entries = 0
+        self.bytes = 0
+
+    def write_entry(self, arcname: str, data: bytes) -> None:
+        self.entries += 1
+        self.bytes += len(data)
+
+    def write_shared_entry(self, arcname: str, entry: PrecompressedEntry) -> None:
+        self.entries += 1
+        self.bytes += len(entry.compressed)
+
+
+def read_syscall_counts() -> Optional[tuple[int, int]]:
+    """Return (read_syscalls, write_syscalls) for this process, if the OS exposes them."""
+    try:
+        with open("/proc/self/io") as file:
+            fields = dict(line.split(":", 1) for line in file if ":" in line)
+        return int(fields["syscr"]), int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def read_peak_rss_kb() -> Optional[int]:
+    """Return the peak resident set size of this process in KiB, if available."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(stage: Callable[[], object], repeat: int) -> tuple[object, dict]:
+    """
+    Run a stage several times and keep the fastest run.
+
+    Returns:
+        Tuple of (last_return_value, stage_metrics)
+    """
+    best_wall = None
+    best_cpu = None
+    syscalls = None
+    result = None
+
+    for _ in range(repeat):
+        before = read_syscall_counts()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = stage()
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        after = read_syscall_counts()
+
+        if best_wall is None or wall < best_wall:
+            best_wall = wall
+            best_cpu = cpu
+            if before is not None and after is not None:
+                syscalls = {"read": after[0] - before[0], "write": after[1] - before[1]}
+
+    return result, {"wall_s": best_wall, "cpu_s": best_cpu, "syscalls": syscalls}
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of all files below a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total
+
+
+# =============================================================================
+# REGISTRIES
+# =============================================================================
+
+def synthetic_tables(block_count: int) -> tuple[dict[str, list[str]], set[str], dict[str, dict]]:
+    """
+    Build block tables shaped like a large modded registry.
+
+    Blocks are grouped in categories of 100; every tenth block is a pillar.
+    The single preset covers the first tenth of the categories.
+    """
+    categories: dict[str, list[str]] = {}
+    pillars: set[str] = set()
+
+    for index in range(block_count):
+        block = f"synthetic_block_{index:06d}"
+        categories.setdefault(f"Synthetic {index // 100:04d}", []).append(block)
+        if index % 10 == 0:
+            pillars.add(block)
+
+    category_names = list(categories)
+    presets = {
+        "synthetic": {
+            "name": "Synthetic",
+            "description": "First tenth of the synthetic categories",
+            "categories": category_names[:max(1, len(category_names) // 10)],
+        },
+    }
+    return categories, pillars, presets
+
+
+def load_tables(size: Optional[int]) -> tuple[dict[str, list[str]], set[str], dict[str, dict]]:
+    """Return the real block tables (size None) or synthetic ones of the given size."""
+    if size is None:
+        return BLOCK_CATEGORIES, PILLAR_BLOCKS, PRESETS
+    return synthetic_tables(size)
+
+
+# =============================================================================
+# BENCHMARK CASES
+# =============================================================================
+
+def run_case(size: Optional[int], engine: str, repeat: int) -> dict:
+    """
+    Benchmark one (registry, engine) combination (runs in a worker process).
+
+    Returns:
+        Machine-readable result for the case
+    """
+    categories, pillars, presets = load_tables(size)
+
+    registry, registry_metrics = measure(
+        lambda: BlockRegistry(categories, pillars, presets), repeat
+    )
+    visible_blocks = set(registry.block_ids[::int(1 / VISIBLE_RATIO)])
+
+    counting_sink = CountingSink()
+
+    def blockstates_stage() -> None:
+        counting_sink.entries = 0
+        write_blockstate_files(counting_sink, visible_blocks, registry)
+
+    _, blockstate_metrics = measure(blockstates_stage, repeat)
+
+    work_dir = tempfile.mkdtemp(prefix="xray_bench_")
+    output_path = os.path.join(work_dir, "bench_pack")
+
+    def archive_stage() -> int:
+        if engine == "zip-memory":
+            buffer = io.BytesIO()
+            with ZipPackSink(buffer) as sink:
+                write_pack_entries(sink, "Bench", "bench", 46, visible_blocks, registry=registry)
+            return len(buffer.getvalue())
+
+        if engine == "zip-file":
+            with ZipPackSink(f"{output_path}.zip") as sink:
+                write_pack_entries(sink, "Bench", "bench", 46, visible_blocks, registry=registry)
+            return os.path.getsize(f"{output_path}.zip")
+
+        if engine == "directory":
+            if os.path.exists(output_path):
+                shutil.rmtree(output_path)
+            with DirectoryPackSink(output_path) as sink:
+                write_pack_entries(sink, "Bench", "bench", 46, visible_blocks, registry=registry)
+            return directory_size(output_path)
+
+        raise ValueError(f"Unknown engine: {engine!r}")
+
+    try:
+        output_bytes, archive_metrics = measure(archive_stage, repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # pack.mcmeta, texture and model, plus one blockstate per invisible block
+    entries = counting_sink.entries + 3
+
+    return {
+        "registry": "block_data" if size is None else "synthetic",
+        "blocks": len(registry),
+        "engine": engine,
+        "entries": entries,
+        "entries_per_sec": entries / archive_metrics["wall_s"] if archive_metrics["wall_s"] else None,
+        "output_bytes": output_bytes,
+        "peak_rss_kb": read_peak_rss_kb(),
+        "stages": {
+            "registry": registry_metrics,
+            "blockstates": blockstate_metrics,
+            "archive": archive_metrics,
+        },
+    }
+
+
+def run_benchmarks(sizes: list[Optional[int]], engines: list[str], repeat: int) -> dict:
+    """
+    Run every (registry, engine) case, each in its own process.
+
+    Returns:
+        Report with environment info and one result per case
+    """
+    results = []
+    for size in sizes:
+        for engine in engines:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(run_case, size, engine, repeat).result())
+            print_result(results[-1])
+
+    return {
+        "generator_version": GENERATOR_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def run_startup(repeat: int) -> list[dict]:
+    """
+    Time every startup case in fresh interpreters.
+
+    The snapshot case's first run also writes the snapshot if it is missing
+    or stale, so the fastest run reflects a warm snapshot.
+
+    Returns:
+        One result per case, with the fastest wall time in seconds
+    """
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for name, code in STARTUP_CASES.items():
+        best_wall = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=source_dir, check=True)
+            wall = time.perf_counter() - start
+            if best_wall is None or wall < best_wall:
+                best_wall = wall
+        results.append({"case": name, "wall_s": best_wall})
+        print(f"  {name:<20} {best_wall * 1000:>9.1f}")
+    return results
+
+
+def print_result(result: dict) -> None:
+    """Print one result as a table row."""
+    stages = result["stages"]
+    rss = result["peak_rss_kb"]
+    syscalls = stages["archive"]["syscalls"]
+    syscall_text = f"{syscalls['read'] + syscalls['write']:>8}" if syscalls else f"{'n/a':>8}"
+
+    print(
+        f"  {result['registry']:<10} {result['blocks']:>7} {result['engine']:<11}"
+        f" {stages['blockstates']['wall_s'] * 1000:>9.1f}"
+        f" {stages['archive']['wall_s'] * 1000:>9.1f}"
+        f" {result['entries_per_sec'] or 0:>11.0f}"
+        f" {syscall_text}"
+        f" {(rss or 0) / 1024:>8.1f}"
+        f" {result['output_bytes'] / 1024:>10.1f}"
+    )
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Benchmark entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark x-ray pack generation.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES),
+        help="synthetic registry sizes to run in addition to block_data",
+    )
+    parser.add_argument(
+        "--engines", nargs="+", choices=ENGINES, default=list(ENGINES),
+        help="output engines to benchmark",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (best is kept)")
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results here")
+    parser.add_argument(
+        "--startup", action="store_true",
+        help="measure cold-start latency instead of generation",
+    )
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        print(f"  {'case':<20} {'wall (ms)':>9}")
+        report = {
+            "generator_version": GENERATOR_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": max(1, args.repeat),
+            "startup": run_startup(max(1, args.repeat)),
+        }
+    else:
+        report = run_generation(args)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=4)
+        print(f"\nResults written to {args.json}")
+
+    return 0
+
+
+def run_generation(args: argparse.Namespace) -> dict:
+    """Run the generation benchmarks selected on the command line."""
+    print(
+        f"  {'registry':<10} {'blocks':>7} {'engine':<11} {'bs (ms)':>9} {'zip (ms)':>9}"
+        f" {'entries/s':>11} {'syscalls':>8} {'rss (MB)':>8} {'size (KB)':>10}"
+    )
+    return run_benchmarks([None] + args.sizes, args.engines, max(1, args.repeat))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
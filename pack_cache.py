@@ -0,0 +1,245 @@
+"""
+Build Cache for Minecraft X-Ray Resource Pack Generator
+=======================================================
+
+Content-addressed on-disk cache of finished pack ZIPs.
+
+Every pack is fully determined by its selection fingerprint: the sorted,
+deduplicated visible block set hashed together with the pack format, the
+pack.mcmeta description inputs and GENERATOR_VERSION, plus the client jar,
+mod registry and backend when those are used. A repeat request with the same
+fingerprint is served from the cache instead of being rebuilt.
+
+Old entries are evicted by age and, least recently used first, by total size.
+Each archive may carry a <fingerprint>.sha1 sidecar holding the archive hash
+computed while it was built, together with the inode and size of the file it
+describes. A sidecar that does not match the archive (another process
+published a different build of the same fingerprint in between) is ignored
+and the hash is recomputed from the archive.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import BinaryIO, Callable, Iterable, Optional
+
+from pack_writer import file_sha1, write_file_atomic
+from xray_pack_generator import GENERATOR_VERSION
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+
+# =============================================================================
+# FINGERPRINTS
+# =============================================================================
+
+def selection_fingerprint(
+    pack_format: int,
+    visible_blocks: Iterable[str],
+    pack_name: str,
+    version_string: str,
+    client_jar_sha1: Optional[str] = None,
+    registry_fingerprint: Optional[str] = None,
+    backend: Optional[str] = None
+) -> str:
+    """
+    Compute the canonical fingerprint of a pack selection.
+
+    The visible blocks are deduplicated and sorted, so equivalent selections
+    in any order produce the same fingerprint. Packs whose blockstates were
+    shaped from a client jar also hash that jar's SHA-1, packs built from a
+    registry other than block_data's (e.g. with mod blocks) hash the
+    registry fingerprint, and packs from a non-default backend hash its name.
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = {
+        "generator": GENERATOR_VERSION,
+        "pack_format": pack_format,
+        "pack_name": pack_name,
+        "version": version_string,
+        "visible": sorted(set(visible_blocks)),
+    }
+    if client_jar_sha1 is not None:
+        canonical["client_jar"] = client_jar_sha1
+    if registry_fingerprint is not None:
+        canonical["registry"] = registry_fingerprint
+    if backend is not None:
+        canonical["backend"] = backend
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class PackCache:
+    """
+    Directory of finished pack archives named <fingerprint>.zip.
+
+    Writes go to a temporary file in the cache directory and are published
+    with an atomic rename, so several processes can share one cache.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, fingerprint: str) -> str:
+        """Return the cache path for a fingerprint (whether or not it exists)."""
+        return os.path.join(self.cache_dir, f"{fingerprint}.zip")
+
+    def sha1_path_for(self, fingerprint: str) -> str:
+        """Return the path of the SHA-1 sidecar for a fingerprint."""
+        return os.path.join(self.cache_dir, f"{fingerprint}.sha1")
+
+    def read_sha1(self, fingerprint: str) -> Optional[str]:
+        """
+        Return the archive SHA-1 for a fingerprint.
+
+        The sidecar is trusted only if it was written for the archive now in
+        the cache; otherwise the archive is hashed again.
+
+        Returns:
+            Hex SHA-1, or None if the fingerprint is not cached
+        """
+        try:
+            stat = os.stat(self.path_for(fingerprint))
+        except FileNotFoundError:
+            return None
+        try:
+            with open(self.sha1_path_for(fingerprint), 'r') as file:
+                fields = file.read().split()
+            if fields[1:] == [str(stat.st_ino), str(stat.st_size)]:
+                return fields[0]
+        except (FileNotFoundError, IndexError):
+            pass
+
+        try:
+            return file_sha1(self.path_for(fingerprint))
+        except FileNotFoundError:
+            return None
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        """
+        Look up a cached pack.
+
+        A hit refreshes the entry's modification time, which is what the
+        LRU eviction orders by.
+
+        Returns:
+            Path to the cached archive, or None on a miss
+        """
+        path = self.path_for(fingerprint)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, fingerprint: str, build: Callable[[BinaryIO], Optional[str]]) -> str:
+        """
+        Build a pack into the cache.
+
+        Args:
+            fingerprint: Selection fingerprint of the pack
+            build: Callable that writes the complete archive to a file object
+                and returns its SHA-1 (or None if it was not computed)
+
+        Returns:
+            Path to the cached archive
+        """
+        path = self.path_for(fingerprint)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                sha1 = build(file)
+            # The rename keeps the inode, so the sidecar can name the exact
+            # file it describes even if another build replaces it meanwhile
+            stat = os.stat(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        # Written after the archive is published, and only ever whole
+        if sha1 is not None:
+            write_file_atomic(
+                self.sha1_path_for(fingerprint),
+                f"{sha1} {stat.st_ino} {stat.st_size}\n".encode('ascii'),
+            )
+
+        self.evict()
+        return path
+
+    def get_or_build(
+        self,
+        fingerprint: str,
+        build: Callable[[BinaryIO], Optional[str]]
+    ) -> tuple[str, bool]:
+        """
+        Return the cached pack, building it first on a miss.
+
+        Returns:
+            Tuple of (archive_path, was_cache_hit)
+        """
+        path = self.get(fingerprint)
+        if path is not None:
+            return path, True
+        return self.put(fingerprint, build), False
+
+    def evict(self) -> int:
+        """
+        Remove expired entries, then least recently used entries until the
+        cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".zip"):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            try:
+                os.remove(path[:-len(".zip")] + ".sha1")
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+        return removed
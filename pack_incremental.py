@@ -0,0 +1,304 @@
+"""
+Incremental Rebuilds for Minecraft X-Ray Resource Pack Generator
+================================================================
+
+Rebuilds an existing pack archive after a selection change without
+regenerating it from scratch.
+
+Every build records a manifest next to the archive (<pack>.zip.build.json)
+with the selection, pack format and entry list. On the next build the new
+visible set is diffed against the recorded one:
+
+    - blockstates of blocks that became visible, or do not exist in the new
+      pack format, are dropped,
+    - blockstates of blocks that became invisible, or only exist in the new
+      pack format, are written,
+    - pack.mcmeta is rewritten only if its inputs changed,
+    - every other entry is copied raw from the old archive, without being
+      inflated or recompressed.
+
+If the manifest is missing, was written by another GENERATOR_VERSION, for
+a different block registry or client jar, or the archive does not match it,
+a full build is done instead. Universal packs and shader- or ghost-backend
+packs are always rebuilt in full: the overlay layout, the marked textures and
+the ghost models depend on the whole selection.
+"""
+
+import os
+import json
+from typing import Optional
+
+from block_registry import BlockRegistry, get_registry
+from ghost_backend import DEFAULT_GHOST_ALPHA
+from pack_metrics import STAGE_PATCH, BuildMetrics, MeteredSink, stage
+from pack_writer import (
+    AtomicZipPackSink,
+    PackSink,
+    ZipPackSink,
+    ZipRawReader,
+    file_sha1,
+    write_file_atomic,
+)
+from vanilla_assets import VanillaAssets
+from xray_pack_generator import (
+    BACKEND_BLOCKSTATES,
+    GENERATOR_VERSION,
+    UNIVERSAL_VERSION,
+    PackBuildResult,
+    blockstate_path,
+    build_blockstate_payloads,
+    count_pack_blocks,
+    write_pack_entries,
+    write_pack_metadata,
+)
+
+
+BUILD_MANIFEST_SUFFIX = ".build.json"
+
+
+# =============================================================================
+# BUILD MANIFESTS
+# =============================================================================
+
+def build_manifest_path(archive_path: str) -> str:
+    """Return the path of the build manifest kept next to an archive."""
+    return f"{archive_path}{BUILD_MANIFEST_SUFFIX}"
+
+
+def read_build_manifest(archive_path: str) -> Optional[dict]:
+    """Load the build manifest for an archive, or None if there is none."""
+    try:
+        with open(build_manifest_path(archive_path), 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def write_build_manifest(
+    archive_path: str,
+    pack_name: str,
+    version_string: str,
+    pack_format: int,
+    visible_blocks: set[str],
+    entries: list[str],
+    sink: ZipPackSink,
+    registry: BlockRegistry,
+    vanilla: Optional[VanillaAssets] = None,
+    backend: str = BACKEND_BLOCKSTATES
+) -> None:
+    """Record what was just built so the next build can be incremental."""
+    manifest = {
+        "generator_version": GENERATOR_VERSION,
+        "backend": backend,
+        "registry": registry.fingerprint,
+        "client_jar": vanilla.jar_sha1 if vanilla is not None else None,
+        "pack_name": pack_name,
+        "version": version_string,
+        "pack_format": pack_format,
+        "visible": sorted(visible_blocks),
+        "entries": entries,
+        "size": sink.size,
+        "sha1": sink.sha1,
+    }
+    write_file_atomic(
+        build_manifest_path(archive_path), json.dumps(manifest, indent=4).encode('utf-8')
+    )
+
+
+def manifest_matches(
+    manifest: Optional[dict],
+    archive_path: str,
+    registry: BlockRegistry,
+    vanilla: Optional[VanillaAssets] = None
+) -> bool:
+    """
+    Check whether a manifest can be used to patch the archive it describes.
+
+    The archive must still be the one the manifest was written for: same
+    size and same SHA-1, so an archive replaced or edited outside the tool
+    (or by a concurrent build) is never patched from a stale entry list.
+    """
+    if manifest is None:
+        return False
+    if manifest.get("generator_version") != GENERATOR_VERSION:
+        return False
+    if manifest.get("backend", BACKEND_BLOCKSTATES) != BACKEND_BLOCKSTATES:
+        return False
+    if manifest.get("registry") != registry.fingerprint:
+        return False
+    if manifest.get("client_jar") != (vanilla.jar_sha1 if vanilla is not None else None):
+        return False
+    try:
+        if os.path.getsize(archive_path) != manifest.get("size"):
+            return False
+        return file_sha1(archive_path) == manifest.get("sha1")
+    except OSError:
+        return False
+
+
+# =============================================================================
+# ENTRY RECORDING
+# =============================================================================
+
+class _RecordingZipSink(AtomicZipPackSink):
+    """AtomicZipPackSink that also remembers the names of the entries it wrote."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.names: list[str] = []
+
+    def write_shared_entry(self, arcname, entry) -> None:
+        self.names.append(arcname)
+        super().write_shared_entry(arcname, entry)
+
+
+# =============================================================================
+# BUILDS
+# =============================================================================
+
+def incremental_build(
+    archive_path: str,
+    pack_name: str,
+    version_string: str,
+    pack_format: int,
+    visible_blocks: set[str],
+    reproducible: bool = False,
+    verbose: bool = False,
+    registry: Optional[BlockRegistry] = None,
+    vanilla: Optional[VanillaAssets] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    metrics: Optional[BuildMetrics] = None,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> PackBuildResult:
+    """
+    Build or patch a pack archive in place.
+
+    The new archive is staged and published by AtomicZipPackSink, so readers
+    never see a partial archive and a failed build leaves the old one intact.
+
+    Args:
+        archive_path: Path of the .zip to create or update
+        pack_name: Name for the resource pack (used in the description)
+        version_string: Minecraft version string for description
+        pack_format: Resource pack format number
+        visible_blocks: Set of block IDs that should NOT be made invisible
+        reproducible: Produce a byte-identical ZIP for identical inputs
+        verbose: Print progress messages
+        registry: Block registry to generate from (defaults to block_data)
+        vanilla: Client jar blockstates to copy variant keys from
+        backend: One of BACKENDS; only blockstate packs are patched
+        metrics: Record per-stage measurements here (see pack_metrics)
+        ghost_alpha: Opacity of hidden blocks with the ghost backend
+
+    Returns:
+        Build result; reused_entries counts entries copied from the old archive
+    """
+    if registry is None:
+        registry = get_registry()
+    visible_blocks = {block for block in visible_blocks if block in registry}
+
+    previous = read_build_manifest(archive_path)
+    patchable = (
+        version_string != UNIVERSAL_VERSION
+        and backend == BACKEND_BLOCKSTATES
+        and manifest_matches(previous, archive_path, registry, vanilla)
+    )
+
+    # The old archive is read while the new one is staged next to it
+    sink = _RecordingZipSink(archive_path, reproducible=reproducible)
+    with (MeteredSink(sink, metrics) if metrics is not None else sink) as target:
+        if patchable:
+            with stage(metrics, STAGE_PATCH):
+                reused, written, removed = patch_entries(
+                    target, archive_path, previous, pack_name, version_string,
+                    pack_format, visible_blocks, registry, vanilla
+                )
+            if verbose:
+                print(f"  - Reused {reused} entries, wrote {written}, removed {removed}")
+        else:
+            reused = 0
+            if verbose:
+                print("  - No usable previous build; doing a full build")
+            write_pack_entries(
+                target, pack_name, version_string, pack_format, visible_blocks,
+                verbose=verbose, registry=registry, vanilla=vanilla, backend=backend,
+                metrics=metrics, ghost_alpha=ghost_alpha
+            )
+
+    write_build_manifest(
+        archive_path, pack_name, version_string, pack_format,
+        visible_blocks, sink.names, sink, registry, vanilla, backend
+    )
+
+    invisible_count, visible_count = count_pack_blocks(visible_blocks, pack_format, registry)
+    return PackBuildResult(
+        output_path=archive_path,
+        invisible_count=invisible_count,
+        visible_count=visible_count,
+        entry_count=sink.entry_count,
+        size=sink.size,
+        sha1=sink.sha1,
+        reused_entries=reused,
+    )
+
+
+def patch_entries(
+    sink: PackSink,
+    archive_path: str,
+    previous: dict,
+    pack_name: str,
+    version_string: str,
+    pack_format: int,
+    visible_blocks: set[str],
+    registry: BlockRegistry,
+    vanilla: Optional[VanillaAssets] = None
+) -> tuple[int, int, int]:
+    """
+    Write the new archive from the old one plus the selection difference.
+
+    Returns:
+        Tuple of (reused_count, written_count, removed_count)
+    """
+    # Blockstates are written for the invisible blocks that exist in the
+    # pack format, so a format change can add or drop entries too
+    old_visible_mask = registry.mask_of(
+        block for block in previous.get("visible", []) if block in registry
+    )
+    old_invisible_mask = registry.available_mask(previous.get("pack_format")) & ~old_visible_mask
+    invisible_mask = registry.available_mask(pack_format) & ~registry.mask_of(visible_blocks)
+
+    newly_visible = old_invisible_mask & ~invisible_mask
+    newly_invisible = invisible_mask & ~old_invisible_mask
+
+    dropped = {blockstate_path(block) for block in registry.iter_blocks(newly_visible)}
+    metadata_changed = (
+        previous.get("pack_format") != pack_format
+        or previous.get("pack_name") != pack_name
+        or previous.get("version") != version_string
+    )
+
+    reused = written = removed = 0
+
+    with ZipRawReader(archive_path) as old_archive:
+        for name in old_archive.names():
+            if name in dropped:
+                removed += 1
+            elif name == "pack.mcmeta" and metadata_changed:
+                write_pack_metadata(sink, pack_format, pack_name, version_string)
+                written += 1
+            else:
+                sink.write_shared_entry(name, old_archive.raw_entry(name))
+                reused += 1
+
+    simple_entry, pillar_entry = build_blockstate_payloads()
+    for block in registry.iter_blocks(newly_invisible):
+        blockstate_entry = vanilla.invisible_entry(block) if vanilla is not None else None
+        if blockstate_entry is None and registry.bit(block) & registry.pillar_mask:
+            blockstate_entry = pillar_entry
+        elif blockstate_entry is None:
+            blockstate_entry = simple_entry
+        sink.write_shared_entry(blockstate_path(block), blockstate_entry)
+        written += 1
+
+    return reused, written, removed
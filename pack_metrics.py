@@ -0,0 +1,362 @@
+"""
+Build Metrics for Minecraft X-Ray Resource Pack Generator
+=========================================================
+
+Optional instrumentation of pack builds. A BuildMetrics passed down the
+generation functions records, per stage:
+
+    - wall time and CPU time (of the building thread, so concurrent service
+      builds do not count each other's work),
+    - entries written,
+    - bytes written to the output (archive bytes for ZIP output, file bytes
+      for directory output),
+    - file operations (writes to the archive stream; files and directories
+      created for directory output).
+
+Stages (see STAGES) are timed where the generator does the work; the
+archive stage is the closing write of the archive (sorted entries of a
+reproducible build and the central directory). The hashing stage is the
+time spent updating the archive SHA-1; that time is also included in the
+stages that wrote the bytes.
+
+Finished builds are handed to the hooks registered with add_metrics_hook,
+which is how the batch and service modes feed external monitoring. Builds
+can also be summarized as JSON or as a Prometheus textfile (for the
+node_exporter textfile collector). Without a BuildMetrics nothing is
+measured and the generator runs exactly as before.
+
+Progress messages use the same stage names: the generation functions call
+a ProgressCallback with (stage, message) instead of printing, and the
+command line passes print_progress.
+"""
+
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Callable, ContextManager, Iterable, Iterator, Optional
+
+from pack_writer import PackSink, PrecompressedEntry, write_file_atomic
+
+
+STAGE_SETUP = "setup"
+STAGE_METADATA = "pack.mcmeta"
+STAGE_TEXTURE = "texture"
+STAGE_MODEL = "model"
+STAGE_BLOCKSTATES = "blockstates"
+STAGE_SHADERS = "shaders"
+STAGE_GHOST = "ghost"
+STAGE_UNIVERSAL = "universal"
+STAGE_PATCH = "patch"
+STAGE_ARCHIVE = "archive"
+STAGE_HASHING = "hashing"
+STAGE_OTHER = "other"
+
+STAGES = (
+    STAGE_SETUP, STAGE_METADATA, STAGE_TEXTURE, STAGE_MODEL, STAGE_BLOCKSTATES,
+    STAGE_SHADERS, STAGE_GHOST, STAGE_UNIVERSAL, STAGE_PATCH, STAGE_ARCHIVE,
+    STAGE_HASHING, STAGE_OTHER,
+)
+
+PROMETHEUS_PREFIX = "xray_build"
+
+
+# =============================================================================
+# MEASUREMENTS
+# =============================================================================
+
+@dataclass
+class StageMetrics:
+    """Totals for one stage of one or more builds."""
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    entries: int = 0
+    bytes: int = 0
+    file_ops: int = 0
+
+    def add(self, other: "StageMetrics") -> None:
+        self.wall_s += other.wall_s
+        self.cpu_s += other.cpu_s
+        self.entries += other.entries
+        self.bytes += other.bytes
+        self.file_ops += other.file_ops
+
+
+class BuildMetrics:
+    """
+    Measurements of a single pack build.
+
+    Attributes:
+        labels: Free-form description of the build (pack, version, mode, ...)
+        stages: Stage name -> measurements, in the order stages first ran
+        wall_s: Wall time from creation to finish()
+        cpu_s: CPU time of the building thread from creation to finish()
+    """
+
+    def __init__(self, labels: Optional[dict[str, str]] = None) -> None:
+        self.labels = dict(labels or {})
+        self.stages: dict[str, StageMetrics] = {}
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self._current: Optional[StageMetrics] = None
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Time a stage; entries written inside it are attributed to it."""
+        metrics = self.stages.setdefault(name, StageMetrics())
+        previous = self._current
+        self._current = metrics
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_s += time.perf_counter() - wall_start
+            metrics.cpu_s += time.thread_time() - cpu_start
+            self._current = previous
+
+    def record_output(self, entries: int, written: int, file_ops: int) -> None:
+        """Attribute output to the running stage (or STAGE_OTHER)."""
+        metrics = self._current
+        if metrics is None:
+            metrics = self.stages.setdefault(STAGE_OTHER, StageMetrics())
+        metrics.entries += entries
+        metrics.bytes += written
+        metrics.file_ops += file_ops
+
+    def record_hashing(self, seconds: float, hashed: int) -> None:
+        """Record the time spent hashing the archive."""
+        metrics = self.stages.setdefault(STAGE_HASHING, StageMetrics())
+        metrics.wall_s += seconds
+        metrics.cpu_s += seconds
+        metrics.bytes += hashed
+
+    def finish(self) -> "BuildMetrics":
+        """Stop the build clock."""
+        self.wall_s = time.perf_counter() - self._wall_start
+        self.cpu_s = time.thread_time() - self._cpu_start
+        return self
+
+    def to_dict(self) -> dict:
+        """Structured report of the build."""
+        return {
+            "labels": self.labels,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "stages": {name: asdict(metrics) for name, metrics in self.stages.items()},
+        }
+
+
+def stage(metrics: Optional[BuildMetrics], name: str) -> ContextManager:
+    """Return metrics.stage(name), or a no-op context without metrics."""
+    if metrics is None:
+        return nullcontext()
+    return metrics.stage(name)
+
+
+class MeteredSink(PackSink):
+    """
+    Forward entries to another sink and count what it writes.
+
+    Bytes and file operations are read from the wrapped sink's size and
+    file_ops counters where it has them, so they reflect real output.
+    """
+
+    def __init__(self, sink: PackSink, metrics: BuildMetrics) -> None:
+        self.sink = sink
+        self.metrics = metrics
+
+    def _counters(self) -> tuple[int, int]:
+        return getattr(self.sink, "size", 0), getattr(self.sink, "file_ops", 0)
+
+    def _record(self, before: tuple[int, int], entries: int, fallback_bytes: int) -> None:
+        size, file_ops = self._counters()
+        written = size - before[0] if hasattr(self.sink, "size") else fallback_bytes
+        self.metrics.record_output(entries, written, file_ops - before[1])
+
+    def write_entry(self, arcname: str, data: bytes) -> None:
+        before = self._counters()
+        self.sink.write_entry(arcname, data)
+        self._record(before, 1, len(data))
+
+    def write_shared_entry(self, arcname: str, entry: PrecompressedEntry) -> None:
+        before = self._counters()
+        self.sink.write_shared_entry(arcname, entry)
+        self._record(before, 1, entry.size)
+
+    def close(self) -> None:
+        # Sorted (reproducible) archives and central directories are written here
+        with self.metrics.stage(STAGE_ARCHIVE):
+            before = self._counters()
+            self.sink.close()
+            self._record(before, 0, 0)
+        hash_seconds = getattr(self.sink, "hash_seconds", None)
+        if hash_seconds is not None:
+            self.metrics.record_hashing(hash_seconds, self.sink.size)
+
+    def abort(self) -> None:
+        self.sink.abort()
+
+
+# =============================================================================
+# PROGRESS
+# =============================================================================
+
+ProgressCallback = Callable[[str, str], None]
+
+
+def print_progress(stage_name: str, message: str) -> None:
+    """ProgressCallback of the command line: one indented line per message."""
+    print(f"  - {message}")
+
+
+def progress_reporter(
+    progress: Optional[ProgressCallback],
+    verbose: bool = False
+) -> Optional[ProgressCallback]:
+    """Return progress, else print_progress if verbose, else None (report nothing)."""
+    if progress is not None:
+        return progress
+    return print_progress if verbose else None
+
+
+# =============================================================================
+# HOOKS
+# =============================================================================
+
+MetricsHook = Callable[[BuildMetrics], None]
+
+_hooks: list[MetricsHook] = []
+_hooks_lock = threading.Lock()
+
+
+def add_metrics_hook(hook: MetricsHook) -> None:
+    """
+    Call hook with every finished build passed to publish_metrics.
+
+    Hooks run on the thread that finished the build (one of many in the
+    service), so they must be thread-safe.
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_metrics_hook(hook: MetricsHook) -> None:
+    """Stop calling a hook registered with add_metrics_hook."""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def metrics_enabled() -> bool:
+    """Return True if any hook wants build metrics (front ends measure only then)."""
+    with _hooks_lock:
+        return bool(_hooks)
+
+
+def publish_metrics(metrics: BuildMetrics) -> None:
+    """Hand a finished build to every hook; a failing hook never fails the build."""
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(metrics)
+        except Exception as error:
+            print(f"WARNING: metrics hook failed: {type(error).__name__}: {error}", file=sys.stderr)
+
+
+# =============================================================================
+# REPORTS
+# =============================================================================
+
+class MetricsTotals:
+    """Running totals over many builds (thread-safe)."""
+
+    def __init__(self) -> None:
+        self.builds = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.stages: dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metrics: BuildMetrics) -> None:
+        with self._lock:
+            self.builds += 1
+            self.wall_s += metrics.wall_s
+            self.cpu_s += metrics.cpu_s
+            for name, stage_metrics in metrics.stages.items():
+                self.stages.setdefault(name, StageMetrics()).add(stage_metrics)
+
+    def to_prometheus(self) -> str:
+        """Render the totals in the Prometheus text exposition format."""
+        with self._lock:
+            stages = {name: StageMetrics(**asdict(metrics)) for name, metrics in self.stages.items()}
+            builds, wall_s, cpu_s = self.builds, self.wall_s, self.cpu_s
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{labels} {value!r}")
+
+        def per_stage(field: str) -> list[tuple[str, float]]:
+            return [
+                (f'{{stage="{name}"}}', getattr(metrics, field))
+                for name, metrics in stages.items()
+            ]
+
+        metric("builds_total", "counter", "Pack builds measured.", [("", builds)])
+        metric("seconds_total", "counter", "Wall time of measured builds.", [("", wall_s)])
+        metric("cpu_seconds_total", "counter", "CPU time of measured builds.", [("", cpu_s)])
+        metric("stage_seconds_total", "counter", "Wall time per build stage.", per_stage("wall_s"))
+        metric("stage_cpu_seconds_total", "counter", "CPU time per build stage.", per_stage("cpu_s"))
+        metric("stage_entries_total", "counter", "Entries written per build stage.", per_stage("entries"))
+        metric("stage_bytes_total", "counter", "Bytes written per build stage.", per_stage("bytes"))
+        metric("stage_file_ops_total", "counter", "File operations per build stage.", per_stage("file_ops"))
+        return "\n".join(lines) + "\n"
+
+
+def write_json_report(path: str, builds: Iterable[BuildMetrics]) -> None:
+    """Write the structured report of several builds as JSON."""
+    report = {"builds": [metrics.to_dict() for metrics in builds]}
+    write_file_atomic(path, json.dumps(report, indent=4).encode('utf-8'))
+
+
+def write_prometheus_textfile(path: str, builds: Iterable[BuildMetrics]) -> None:
+    """Write the totals of several builds as a Prometheus textfile (atomically, as collectors require)."""
+    totals = MetricsTotals()
+    for metrics in builds:
+        totals.add(metrics)
+    write_file_atomic(path, totals.to_prometheus().encode('utf-8'))
+
+
+def write_metrics_reports(
+    builds: list[BuildMetrics],
+    json_path: Optional[str] = None,
+    textfile_path: Optional[str] = None
+) -> None:
+    """Write the reports requested on the command line; failures are warnings."""
+    for path, write in ((json_path, write_json_report), (textfile_path, write_prometheus_textfile)):
+        if path is None:
+            continue
+        try:
+            write(path, builds)
+        except OSError as error:
+            print(f"WARNING: cannot write metrics report {path}: {error}", file=sys.stderr)
+
+
+def build_metrics_from_dict(report: dict) -> BuildMetrics:
+    """Rebuild a BuildMetrics from to_dict() output (e.g. sent back by a worker process)."""
+    metrics = BuildMetrics(report.get("labels"))
+    metrics.wall_s = report.get("wall_s", 0.0)
+    metrics.cpu_s = report.get("cpu_s", 0.0)
+    metrics.stages = {
+        name: StageMetrics(**values) for name, values in report.get("stages", {}).items()
+    }
+    return metrics
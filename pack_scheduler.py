@@ -0,0 +1,180 @@
+"""
+Build Scheduler for Minecraft X-Ray Resource Pack Generator
+===========================================================
+
+Runs pack builds for the HTTP service on a bounded pool of worker threads.
+
+    - Coalescing ("singleflight"): a build requested while an identical one
+      (same key, i.e. the same canonical selection) is queued or running
+      joins that build instead of starting another, and every requester
+      gets the same result.
+    - Bounded concurrency: at most max_workers builds run at once.
+    - Backpressure: at most max_queue further builds wait for a worker. A
+      request that finds the queue full waits up to admission_timeout for a
+      slot and is then rejected with SchedulerBusy, so a burst of distinct
+      requests cannot pile up unbounded work.
+
+The counters (coalesced requests, queue depth, rejections, ...) are exposed
+as a dict and in the Prometheus text format, for sizing the pool.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_ADMISSION_TIMEOUT = 5.0
+
+PROMETHEUS_PREFIX = "xray_scheduler"
+
+
+class SchedulerBusy(Exception):
+    """Raised when the build queue stays full for the whole admission timeout."""
+
+
+class BuildScheduler:
+    """
+    Coalescing, bounded build pool.
+
+    Attributes:
+        max_workers: Builds that run concurrently
+        max_queue: Builds that may wait for a worker
+        admission_timeout: Seconds a new build waits for queue space
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        admission_timeout: float = DEFAULT_ADMISSION_TIMEOUT
+    ) -> None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers must be at least 1 and max_queue at least 0")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.admission_timeout = admission_timeout
+
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="pack-build")
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._in_flight: dict[str, Future] = {}
+        self._running = 0
+
+        self.requests = 0
+        self.coalesced = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Accepted builds waiting for a worker."""
+        with self._lock:
+            return len(self._in_flight) - self._running
+
+    def submit(self, key: str, build: Callable[[], object]) -> Future:
+        """
+        Schedule a build, or join the identical build already in flight.
+
+        Args:
+            key: Canonical identity of the build (e.g. a selection fingerprint)
+            build: Produces the result; called on a worker thread
+
+        Returns:
+            Future of the build's result, shared by all coalesced requests
+
+        Raises:
+            SchedulerBusy: If no queue space became free within admission_timeout
+        """
+        with self._space:
+            self.requests += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            capacity = self.max_workers + self.max_queue
+            if not self._space.wait_for(
+                lambda: len(self._in_flight) < capacity or key in self._in_flight,
+                timeout=self.admission_timeout,
+            ):
+                self.rejected += 1
+                raise SchedulerBusy(f"build queue is full ({self.max_queue} waiting)")
+
+            # The same build may have been admitted while this one waited
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+            future = self._executor.submit(self._run, key, build)
+            self._in_flight[key] = future
+            return future
+
+    def _run(self, key: str, build: Callable[[], object]) -> object:
+        with self._lock:
+            self._running += 1
+            self.started += 1
+        succeeded = False
+        try:
+            result = build()
+            succeeded = True
+            return result
+        finally:
+            with self._space:
+                self._running -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                # Later requests start a fresh build (results are not cached)
+                del self._in_flight[key]
+                self._space.notify()
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of the counters and gauges."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.max_queue,
+                "running": self._running,
+                "queue_depth": len(self._in_flight) - self._running,
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "started": self.started,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the counters in the Prometheus text exposition format."""
+        stats = self.stats()
+        metrics = (
+            ("workers", "gauge", "Maximum concurrent builds."),
+            ("queue_limit", "gauge", "Maximum builds waiting for a worker."),
+            ("running", "gauge", "Builds running now."),
+            ("queue_depth", "gauge", "Builds waiting for a worker now."),
+            ("requests", "counter", "Build requests received."),
+            ("coalesced", "counter", "Requests that joined an identical in-flight build."),
+            ("started", "counter", "Builds started."),
+            ("completed", "counter", "Builds that succeeded."),
+            ("failed", "counter", "Builds that raised an error."),
+            ("rejected", "counter", "Requests rejected because the queue was full."),
+        )
+        lines = []
+        for name, kind, help_text in metrics:
+            suffix = "_total" if kind == "counter" else ""
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name}{suffix} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name}{suffix} {kind}")
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{suffix} {stats[name]}")
+        return "\n".join(lines) + "\n"
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and (optionally) wait for running builds."""
+        self._executor.shutdown(wait=wait)
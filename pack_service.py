@@ -0,0 +1,430 @@
+"""
+HTTP Pack Service for Minecraft X-Ray Resource Pack Generator
+=============================================================
+
+Small built-in HTTP server that builds x-ray packs on demand.
+
+Every pack is built in memory with the regular generation code and returned
+as the response body; nothing is written to the working directory, so any
+number of requests can be served concurrently.
+
+Usage:
+    python pack_service.py [--host 127.0.0.1] [--port 8080] [--client-jar JAR] [--mods-dir DIR]
+                           [--workers N] [--queue N] [--queue-timeout SECONDS]
+
+Endpoints:
+    GET  /pack?version=1.21.4&preset=ore_finder
+    GET  /pack?version=universal&preset=ore_finder
+    GET  /pack?version=1.21.4&blocks=diamond_ore,ancient_debris&categories=Ores%20(Nether)
+    GET  /pack?version=1.21.4&preset=ore_finder&backend=shader
+    GET  /pack?version=1.21.4&preset=ore_finder&backend=ghost&ghost_alpha=48
+    GET  /pack?version=1.21.4&select=*_ore%20-%20deepslate_*
+    POST /pack   JSON body: {"version": ..., "preset": ..., "blocks": [...],
+                             "categories": [...], "select": ..., "name": ...,
+                             "backend": ..., "ghost_alpha": ...}
+    GET  /versions, /presets, /health
+    GET  /metrics   build and scheduler totals in the Prometheus text format
+
+"select" takes a selection expression (see block_selection); it is combined
+with "preset", "blocks" and "categories" by union.
+
+Pack responses carry the archive's SHA-1 (as used by resource-pack-sha1 in
+server.properties) in the X-Resource-Pack-SHA1 and ETag headers. Archives
+are reproducible, so the same request always yields the same hash.
+
+With --client-jar, blockstates copy the variant keys of that vanilla client
+jar (see vanilla_assets), and the shader and ghost backends can be used (see
+shader_backend and ghost_backend). With --mods-dir, the blocks of the mod
+jars in that folder are hidden too and can be requested by namespaced ID
+(see mod_scanner).
+
+Builds run on a bounded worker pool (see pack_scheduler). Requests for a
+selection that is already being built wait for that build instead of
+starting another, so a burst of identical requests costs one build. When
+the queue stays full, requests are answered with 503 and Retry-After.
+
+Every pack build is measured (see pack_metrics): the totals are served on
+/metrics and each build is handed to the registered metrics hooks.
+"""
+
+import io
+import re
+import sys
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from block_registry import BlockRegistry, get_registry
+from ghost_backend import DEFAULT_GHOST_ALPHA, validate_ghost_alpha
+from pack_cache import selection_fingerprint
+from pack_metrics import BuildMetrics, MeteredSink, MetricsTotals, publish_metrics
+from pack_scheduler import DEFAULT_ADMISSION_TIMEOUT, DEFAULT_MAX_QUEUE, BuildScheduler, SchedulerBusy
+from pack_writer import ZipPackSink
+from vanilla_assets import VanillaAssets, check_pack_format
+from xray_pack_generator import (
+    BACKEND_BLOCKSTATES,
+    BACKENDS,
+    DEFAULT_PACK_NAME,
+    UNIVERSAL_VERSION,
+    backend_fingerprint,
+    build_labels,
+    resolve_selection,
+    resolve_version,
+    write_pack_entries,
+)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Largest JSON request body accepted by POST /pack
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Retry-After (seconds) sent when the build queue is full
+BUSY_RETRY_AFTER = 1
+
+# Pack names end up in the Content-Disposition header and pack.mcmeta
+PACK_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class RequestError(Exception):
+    """A client error that is reported as an HTTP 4xx response."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# =============================================================================
+# REQUEST PARSING
+# =============================================================================
+
+def parse_pack_request(
+    params: dict,
+    registry: Optional[BlockRegistry] = None
+) -> tuple[str, str, int, set[str], str, int]:
+    """
+    Validate a pack request.
+
+    Args:
+        params: Request fields (version, preset, blocks, categories, select,
+            name, backend, ghost_alpha)
+        registry: Block registry to validate against (defaults to block_data)
+
+    Returns:
+        Tuple of (pack_name, version_string, pack_format, visible_blocks,
+        backend, ghost_alpha)
+
+    Raises:
+        RequestError: If the request is invalid
+    """
+    for key in ("version", "preset", "select", "name", "backend"):
+        if params.get(key) is not None and not isinstance(params[key], str):
+            raise RequestError(f"'{key}' must be a string")
+    for key in ("blocks", "categories"):
+        items = params.get(key, [])
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise RequestError(f"'{key}' must be a list of strings")
+    ghost_alpha = params.get("ghost_alpha", DEFAULT_GHOST_ALPHA)
+    if not isinstance(ghost_alpha, int) or isinstance(ghost_alpha, bool):
+        raise RequestError("ghost_alpha must be an integer")
+
+    version_string = params.get("version")
+    try:
+        pack_format = resolve_version(version_string, registry)
+    except ValueError as error:
+        raise RequestError(str(error))
+
+    pack_name = str(params.get("name") or DEFAULT_PACK_NAME).replace(' ', '_')
+    if not PACK_NAME_PATTERN.match(pack_name):
+        raise RequestError("name may only contain letters, digits, '_', '.' and '-'")
+
+    backend = params.get("backend") or BACKEND_BLOCKSTATES
+    if backend not in BACKENDS:
+        raise RequestError(f"backend must be one of {', '.join(BACKENDS)}")
+    try:
+        validate_ghost_alpha(ghost_alpha)
+    except ValueError as error:
+        raise RequestError(str(error))
+
+    try:
+        visible_blocks = resolve_selection(
+            params.get("preset"), params.get("blocks", []), params.get("categories", []),
+            registry, params.get("select")
+        )
+    except ValueError as error:
+        raise RequestError(str(error))
+
+    return pack_name, version_string, pack_format, visible_blocks, backend, ghost_alpha
+
+
+def query_to_params(query: str) -> dict:
+    """Convert a query string to request fields; list fields are comma-separated."""
+    raw = parse_qs(query, keep_blank_values=False)
+    params: dict = {}
+    for key in ("version", "preset", "select", "name", "backend"):
+        if key in raw:
+            params[key] = raw[key][-1]
+    if "ghost_alpha" in raw:
+        # Left as a string (and rejected) unless it is a number
+        value = raw["ghost_alpha"][-1]
+        params["ghost_alpha"] = int(value) if value.strip().lstrip('-').isdigit() else value
+    for key in ("blocks", "categories"):
+        if key in raw:
+            params[key] = [
+                item.strip()
+                for value in raw[key]
+                for item in value.split(',')
+                if item.strip()
+            ]
+    return params
+
+
+# =============================================================================
+# HTTP HANDLER
+# =============================================================================
+
+class PackRequestHandler(BaseHTTPRequestHandler):
+    """Serves pack builds and the version/preset listings."""
+
+    server_version = "XRayPackService/1.0"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+
+        if url.path == "/pack":
+            self.handle_pack(query_to_params(url.query))
+        elif url.path == "/versions":
+            self.send_json(200, self.server.registry.pack_formats)
+        elif url.path == "/presets":
+            self.send_json(200, {
+                key: {"name": preset["name"], "description": preset["description"]}
+                for key, preset in self.server.registry.presets.items()
+            })
+        elif url.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif url.path == "/metrics":
+            body = (
+                self.server.metrics_totals.to_prometheus() + self.server.scheduler.to_prometheus()
+            ).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/pack":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_REQUEST_BYTES:
+                raise RequestError("request body too large", status=413)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise RequestError("request body must be a JSON object")
+        except (ValueError, RequestError) as error:
+            status = error.status if isinstance(error, RequestError) else 400
+            self.send_json(status, {"error": str(error)})
+            return
+
+        self.handle_pack(params)
+
+    def handle_pack(self, params: dict) -> None:
+        """Build a pack in memory and send it."""
+        try:
+            (pack_name, version_string, pack_format, visible_blocks,
+             backend, ghost_alpha) = parse_pack_request(params, self.server.registry)
+        except RequestError as error:
+            self.send_json(error.status, {"error": str(error)})
+            return
+        if version_string != UNIVERSAL_VERSION:
+            try:
+                check_pack_format(self.server.vanilla, pack_format)
+            except ValueError as error:
+                self.send_json(400, {"error": str(error)})
+                return
+
+        # The registry and client jar are fixed per server, so the selection
+        # identifies the archive
+        key = selection_fingerprint(pack_format, visible_blocks, pack_name, version_string,
+                                    backend=backend_fingerprint(backend, ghost_alpha))
+        try:
+            data, sha1 = self.server.scheduler.submit(key, lambda: build_archive(
+                self.server, pack_name, version_string, pack_format, visible_blocks, backend,
+                ghost_alpha
+            )).result()
+        except SchedulerBusy as error:
+            body = json.dumps({"error": str(error)}, indent=4).encode('utf-8')
+            self.send_response(503)
+            self.send_header("Retry-After", str(BUSY_RETRY_AFTER))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        except Exception as error:
+            self.send_json(500, {"error": f"build failed: {type(error).__name__}: {error}"})
+            return
+
+        if self.headers.get("If-None-Match", "").strip('"') == sha1:
+            self.send_response(304)
+            self.send_header("ETag", f'"{sha1}"')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Disposition", f'attachment; filename="{pack_name}.zip"')
+        self.send_header("X-Resource-Pack-SHA1", sha1)
+        self.send_header("ETag", f'"{sha1}"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status: int, content: dict) -> None:
+        """Send a JSON response."""
+        body = json.dumps(content, indent=4).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def build_archive(
+    server: ThreadingHTTPServer,
+    pack_name: str,
+    version_string: str,
+    pack_format: int,
+    visible_blocks: set[str],
+    backend: str,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> tuple[bytes, str]:
+    """
+    Build a pack in memory (runs on a scheduler worker).
+
+    Returns:
+        Tuple of (archive_bytes, sha1)
+    """
+    metrics = BuildMetrics(build_labels(pack_name, version_string, backend, "service"))
+
+    # Always reproducible, so the SHA-1 and ETag only depend on the request.
+    # The sink hashes the archive while writing it, so no second pass
+    buffer = io.BytesIO()
+    zip_sink = ZipPackSink(buffer, reproducible=True)
+    with MeteredSink(zip_sink, metrics) as sink:
+        write_pack_entries(
+            sink, pack_name, version_string, pack_format, visible_blocks,
+            registry=server.registry, vanilla=server.vanilla, backend=backend,
+            metrics=metrics, ghost_alpha=ghost_alpha
+        )
+
+    server.metrics_totals.add(metrics.finish())
+    publish_metrics(metrics)
+    return buffer.getvalue(), zip_sink.sha1
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+def create_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    vanilla: Optional[VanillaAssets] = None,
+    registry: Optional[BlockRegistry] = None,
+    workers: Optional[int] = None,
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    admission_timeout: float = DEFAULT_ADMISSION_TIMEOUT
+) -> ThreadingHTTPServer:
+    """
+    Create the pack server (one thread per connection).
+
+    Args:
+        host: Interface to bind
+        port: Port to listen on (0 picks a free port)
+        vanilla: Client jar blockstates to copy variant keys from
+        registry: Block registry to serve (defaults to block_data)
+        workers: Concurrent builds (defaults to the CPU count)
+        max_queue: Builds that may wait for a worker
+        admission_timeout: Seconds a request waits for queue space before 503
+    """
+    scheduler = BuildScheduler(workers, max_queue, admission_timeout)
+    server = ThreadingHTTPServer((host, port), PackRequestHandler)
+    server.daemon_threads = True
+    server.vanilla = vanilla
+    server.registry = registry if registry is not None else get_registry()
+    server.metrics_totals = MetricsTotals()
+    server.scheduler = scheduler
+    return server
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Service entry point."""
+    parser = argparse.ArgumentParser(description="Serve x-ray resource packs over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="interface to bind (default: localhost)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument(
+        "--client-jar", metavar="JAR", default=None,
+        help="copy blockstate variants from a local vanilla client jar",
+    )
+    parser.add_argument(
+        "--mods-dir", metavar="DIR", default=None,
+        help="also hide the blocks of the mod jars in this folder",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="maximum concurrent pack builds (default: CPU count)",
+    )
+    parser.add_argument(
+        "--queue", type=int, default=DEFAULT_MAX_QUEUE,
+        help="builds that may wait for a worker before requests are delayed",
+    )
+    parser.add_argument(
+        "--queue-timeout", type=float, default=DEFAULT_ADMISSION_TIMEOUT, metavar="SECONDS",
+        help="how long a request waits for queue space before getting 503",
+    )
+    args = parser.parse_args(argv)
+
+    vanilla = None
+    if args.client_jar:
+        try:
+            vanilla = VanillaAssets(args.client_jar)
+        except (OSError, ValueError) as error:
+            print(f"ERROR: cannot read client jar: {error}")
+            return 2
+
+    try:
+        registry = get_registry(args.mods_dir)
+    except OSError as error:
+        print(f"ERROR: cannot scan mods folder: {error}")
+        return 2
+
+    try:
+        server = create_server(
+            args.host, args.port, vanilla, registry, args.workers, args.queue, args.queue_timeout
+        )
+    except ValueError as error:
+        print(f"ERROR: {error}")
+        return 2
+    print(f"Serving x-ray packs on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+        server.scheduler.shutdown(wait=False)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,526 @@
+"""
+Terminal UI for Minecraft X-Ray Resource Pack Generator
+=======================================================
+
+Full-screen curses front end for the interactive builder: pack name,
+version, category, block, preset, search and expression screens.
+
+Unlike the prompt-driven menus, nothing is re-printed on each keystroke:
+every screen is rendered to a list of lines, and only the lines that differ
+from what is already on the terminal are rewritten (curses then sends only
+the changed cells). Keys act immediately, without Enter, and long lists
+scroll around the cursor.
+
+Keys:
+    Up/Down, j/k, PgUp/PgDn, Home/End   move
+    Enter, Right                        open / choose
+    Space                               toggle
+    Esc, Left, b                        back
+    /                                   search (live, as you type)
+    e                                   selection expression
+    p                                   presets
+    a / c                               all visible / clear
+    d                                   done
+    q                                   quit
+
+curses is not available on every platform (e.g. Windows without
+windows-curses); tui_available() tells the caller to fall back to the
+prompt-driven menus.
+"""
+
+import os
+import sys
+from typing import Optional
+
+try:
+    import curses
+except ImportError:
+    curses = None
+
+from block_registry import BlockRegistry, get_registry
+from block_search import KIND_CATEGORY, get_search_index
+from block_selection import compile_selection
+from ghost_backend import DEFAULT_GHOST_ALPHA
+from pack_metrics import BuildMetrics, metrics_enabled, publish_metrics
+from vanilla_assets import VanillaAssets, check_pack_format
+from xray_pack_generator import (
+    BACKEND_BLOCKSTATES,
+    DEFAULT_PACK_NAME,
+    UNIVERSAL_VERSION,
+    build_labels,
+    count_pack_blocks,
+    generate_resource_pack,
+    get_universal_version_range,
+    print_completion,
+    resolve_version,
+)
+
+
+HEADER_LINES = [
+    "=" * 60,
+    "  MINECRAFT X-RAY RESOURCE PACK GENERATOR",
+    "=" * 60,
+]
+
+KEY_ENTER = ("\n", "\r")
+KEY_ESCAPE = "\x1b"
+KEY_BACKSPACE = ("\x7f", "\b")
+
+# Milliseconds curses waits after Esc for the rest of an escape sequence
+ESCAPE_DELAY = "25"
+
+
+def tui_available() -> bool:
+    """Whether the curses front end can run on this terminal."""
+    return curses is not None and sys.stdin.isatty() and sys.stdout.isatty()
+
+
+# =============================================================================
+# SCREEN
+# =============================================================================
+
+class Screen:
+    """
+    Line-diffing renderer over a curses window.
+
+    Remembers the text and attribute of every row, and rewrites only the rows
+    that changed since the previous draw.
+    """
+
+    def __init__(self, window) -> None:
+        self.window = window
+        self._rows: list[tuple[str, int]] = []
+
+    @property
+    def height(self) -> int:
+        return self.window.getmaxyx()[0]
+
+    def invalidate(self) -> None:
+        """Forget the screen contents, e.g. after a terminal resize."""
+        self._rows = []
+        self.window.clear()
+
+    def draw(self, lines: list[tuple[str, int]]) -> None:
+        """Show lines of (text, curses attribute), rewriting only changed rows."""
+        height, width = self.window.getmaxyx()
+        # The bottom-right cell cannot be written without an error
+        rows = [(text[:width - 1], attribute) for text, attribute in lines[:height]]
+        rows += [("", 0)] * (height - len(rows))
+        if len(self._rows) != height:
+            self._rows = [("\0", 0)] * height
+
+        for row, line in enumerate(rows):
+            if self._rows[row] == line:
+                continue
+            text, attribute = line
+            self.window.move(row, 0)
+            self.window.clrtoeol()
+            if text:
+                self.window.addstr(row, 0, text, attribute)
+        self._rows = rows
+        self.window.refresh()
+
+    def read_key(self):
+        """Wait for one key: a str for characters, an int for special keys."""
+        key = self.window.get_wch()
+        if key == curses.KEY_RESIZE:
+            self.invalidate()
+        elif key == curses.KEY_ENTER:
+            key = "\n"
+        elif key == curses.KEY_BACKSPACE:
+            key = "\b"
+        return key
+
+
+def move_cursor(key, cursor: int, count: int, page: int) -> Optional[int]:
+    """Return the cursor after a navigation key, or None if key does not navigate."""
+    if key in (curses.KEY_UP, "k"):
+        cursor -= 1
+    elif key in (curses.KEY_DOWN, "j"):
+        cursor += 1
+    elif key == curses.KEY_PPAGE:
+        cursor -= page
+    elif key == curses.KEY_NPAGE:
+        cursor += page
+    elif key == curses.KEY_HOME:
+        cursor = 0
+    elif key == curses.KEY_END:
+        cursor = count - 1
+    else:
+        return None
+    return max(0, min(cursor, count - 1))
+
+
+# =============================================================================
+# APPLICATION
+# =============================================================================
+
+class XrayTui:
+    """
+    The interactive screens, sharing one Screen and one selection bitmask.
+
+    Attributes:
+        registry: Block registry being selected from
+        selection: Bitmask of visible blocks
+    """
+
+    def __init__(self, window, registry: BlockRegistry, selection: int = 0) -> None:
+        self.screen = Screen(window)
+        self.registry = registry
+        self.selection = selection
+        self.status = ""
+        self._offsets: dict[str, int] = {}
+
+    # -------------------------------------------------------------------------
+    # Rendering helpers
+    # -------------------------------------------------------------------------
+
+    def render(
+        self,
+        title: str,
+        rows: list[str],
+        cursor: Optional[int],
+        footer: list[str],
+        view: str,
+        above: Optional[list[str]] = None
+    ) -> int:
+        """
+        Draw a titled, scrolling list around the cursor.
+
+        Returns:
+            Number of list rows that fit on the screen (the page size)
+        """
+        bold = curses.A_BOLD
+        top = [(line, 0) for line in HEADER_LINES] + [("", 0), (title, bold), ("-" * 50, 0)]
+        top += [(line, 0) for line in above or []]
+        bottom = [("-" * 50, 0)] + [(line, 0) for line in footer] + [(self.status, bold)]
+        page = max(1, self.screen.height - len(top) - len(bottom))
+
+        # Keep the cursor inside the visible window of rows
+        offset = self._offsets.get(view, 0)
+        if cursor is not None:
+            if cursor < offset:
+                offset = cursor
+            elif cursor >= offset + page:
+                offset = cursor - page + 1
+        offset = max(0, min(offset, max(0, len(rows) - page)))
+        self._offsets[view] = offset
+
+        middle = []
+        for index, text in enumerate(rows[offset:offset + page], start=offset):
+            middle.append((text, curses.A_REVERSE if index == cursor else 0))
+        middle += [("", 0)] * (page - len(middle))
+
+        self.screen.draw(top + middle + bottom)
+        return page
+
+    def read_text(self, title: str, prompt: str, text: str = "") -> Optional[str]:
+        """Edit one line of text; Enter accepts, Esc cancels (returns None)."""
+        while True:
+            self.render(title, [], None, [f"{prompt}{text}_", "", "Enter accept   Esc cancel"], "text")
+            key = self.screen.read_key()
+            if key in KEY_ENTER:
+                self.status = ""
+                return text
+            if key == KEY_ESCAPE:
+                self.status = ""
+                return None
+            if key in KEY_BACKSPACE:
+                text = text[:-1]
+            elif isinstance(key, str) and key.isprintable():
+                text += key
+
+    def category_status(self, category: str) -> str:
+        visible_count, total_count = self.registry.count_in_category(category, self.selection)
+        if visible_count == total_count:
+            return "[ALL VISIBLE]"
+        if visible_count > 0:
+            return f"[{visible_count}/{total_count} visible]"
+        return "(all invisible)"
+
+    def toggle_mask(self, mask: int) -> None:
+        """Make a group visible, or invisible if it already is."""
+        if self.selection & mask == mask:
+            self.selection &= ~mask
+        else:
+            self.selection |= mask
+
+    # -------------------------------------------------------------------------
+    # Screens
+    # -------------------------------------------------------------------------
+
+    def choose_version(self) -> Optional[tuple[str, int]]:
+        """Version menu; returns (version_string, pack_format) or None on quit."""
+        versions = list(self.registry.pack_formats.items())
+        rows = [f"  {version:<20} (pack format {pack_format})" for version, pack_format in versions]
+        rows.append(f"  All versions, one universal pack ({get_universal_version_range()})")
+        cursor = 0
+
+        while True:
+            page = self.render(
+                "SELECT MINECRAFT VERSION", rows, cursor,
+                ["Enter select   q quit"], "versions"
+            )
+            key = self.screen.read_key()
+            moved = move_cursor(key, cursor, len(rows), page)
+            if moved is not None:
+                cursor = moved
+            elif key in KEY_ENTER or key == curses.KEY_RIGHT:
+                if cursor == len(versions):
+                    return UNIVERSAL_VERSION, resolve_version(UNIVERSAL_VERSION)
+                return versions[cursor]
+            elif key in ("q", KEY_ESCAPE):
+                return None
+
+    def choose_blocks(self) -> bool:
+        """Category menu; returns True when done, False on quit."""
+        categories = list(self.registry.categories)
+        cursor = 0
+
+        while True:
+            rows = [
+                f"  {category:<30} {self.category_status(category)}"
+                for category in categories
+            ]
+            visible = self.registry.count(self.selection)
+            page = self.render(
+                f"SELECT BLOCKS TO KEEP VISIBLE ({visible} visible)", rows, cursor,
+                [
+                    "Enter open   Space toggle category   / search   e expression",
+                    "p presets   a all visible   c clear   d done   q quit",
+                ],
+                "categories",
+                ["By default, ALL blocks will be invisible (x-ray mode)."],
+            )
+            key = self.screen.read_key()
+            self.status = ""
+            moved = move_cursor(key, cursor, len(rows), page)
+            if moved is not None:
+                cursor = moved
+            elif key in KEY_ENTER or key == curses.KEY_RIGHT:
+                self.choose_in_category(categories[cursor])
+            elif key == " ":
+                self.toggle_mask(self.registry.category_masks[categories[cursor]])
+            elif key == "a":
+                self.selection = self.registry.all_mask
+                self.status = "-> All blocks set to visible!"
+            elif key == "c":
+                self.selection = 0
+                self.status = "-> All blocks set to invisible!"
+            elif key == "p":
+                self.choose_preset()
+            elif key == "/":
+                self.search()
+            elif key == "e":
+                self.enter_expression()
+            elif key == "d":
+                return True
+            elif key == "q":
+                return False
+
+    def choose_in_category(self, category: str) -> None:
+        """Block list of one category."""
+        blocks = self.registry.categories[category]
+        category_mask = self.registry.category_masks[category]
+        cursor = 0
+
+        while True:
+            rows = [
+                f"  {block:<40} {'[VISIBLE]' if self.selection & self.registry.bit(block) else ''}"
+                for block in blocks
+            ]
+            page = self.render(
+                f"CATEGORY: {category.upper()}", rows, cursor,
+                ["Space toggle   a toggle all   v all visible   i all invisible   Esc back"],
+                f"category:{category}",
+            )
+            key = self.screen.read_key()
+            moved = move_cursor(key, cursor, len(rows), page)
+            if moved is not None:
+                cursor = moved
+            elif key in (" ", *KEY_ENTER):
+                self.selection ^= self.registry.bit(blocks[cursor])
+            elif key == "a":
+                self.toggle_mask(category_mask)
+            elif key == "v":
+                self.selection |= category_mask
+            elif key == "i":
+                self.selection &= ~category_mask
+            elif key in (KEY_ESCAPE, "b", curses.KEY_LEFT):
+                return
+
+    def choose_preset(self) -> None:
+        """Preset menu; Enter applies a preset."""
+        presets = self.registry.presets
+        keys = list(presets)
+        rows = [f"  {presets[key]['name']:<20} {presets[key]['description']}" for key in keys]
+        cursor = 0
+
+        while True:
+            page = self.render(
+                "PRESET CONFIGURATIONS", rows, cursor, ["Enter apply   Esc back"], "presets"
+            )
+            key = self.screen.read_key()
+            moved = move_cursor(key, cursor, len(rows), page)
+            if moved is not None:
+                cursor = moved
+            elif key in KEY_ENTER:
+                self.selection = self.registry.preset_masks[keys[cursor]]
+                self.status = f"-> Applied preset: {presets[keys[cursor]]['name']}"
+                return
+            elif key in (KEY_ESCAPE, "b", curses.KEY_LEFT):
+                return
+
+    def search(self) -> None:
+        """Live search: hits are re-ranked on every key; Enter toggles the hit under the cursor."""
+        index = get_search_index(self.registry)
+        query = ""
+        cursor = 0
+
+        while True:
+            hits = index.search(query, limit=200)
+            cursor = max(0, min(cursor, len(hits) - 1))
+            rows = []
+            for hit in hits:
+                if hit.kind == KIND_CATEGORY:
+                    rows.append(f"  @ {hit.name:<38} {self.category_status(hit.name)}")
+                else:
+                    status = "[VISIBLE]" if self.selection & self.registry.bit(hit.name) else ""
+                    category = index.block_categories.get(hit.name, "")
+                    rows.append(f"  {hit.name:<40} {status:<10} {category}")
+
+            page = self.render(
+                "SEARCH", rows, cursor if hits else None,
+                ["Type to search   Enter toggle   Up/Down move   Esc back"],
+                "search", [f"Search: {query}_"],
+            )
+            key = self.screen.read_key()
+            # Letters are search text here, so only arrow keys navigate
+            moved = None if isinstance(key, str) else move_cursor(key, cursor, len(rows), page)
+            if moved is not None:
+                cursor = moved
+            elif key in KEY_ENTER:
+                if hits:
+                    hit = hits[cursor]
+                    if hit.kind == KIND_CATEGORY:
+                        self.toggle_mask(self.registry.category_masks[hit.name])
+                    else:
+                        self.selection ^= self.registry.bit(hit.name)
+            elif key == KEY_ESCAPE:
+                return
+            elif key in KEY_BACKSPACE:
+                query = query[:-1]
+                cursor = 0
+            elif isinstance(key, str) and key.isprintable():
+                query += key
+                cursor = 0
+
+    def enter_expression(self) -> None:
+        """Replace the selection with the blocks matched by a selection expression."""
+        expression = self.read_text("SELECTION EXPRESSION", "Expression: ")
+        if not expression:
+            return
+        try:
+            self.selection = compile_selection(expression).mask(self.registry)
+            self.status = f"-> {self.registry.count(self.selection)} blocks set to visible!"
+        except ValueError as error:
+            self.status = f"ERROR: {error}"
+
+    def confirm(self, pack_name: str, version_string: str, pack_format: int) -> bool:
+        """Summary screen; returns True to generate, False to go back."""
+        invisible_count, visible_count = count_pack_blocks(
+            self.registry.blocks_of(self.selection), pack_format, self.registry
+        )
+        summary = [
+            f"  Pack Name:         {pack_name}",
+            f"  Minecraft Version: {version_string}",
+            f"  Pack Format:       {pack_format}",
+            f"  Visible Blocks:    {visible_count}",
+            f"  Invisible Blocks:  {invisible_count}",
+        ]
+        while True:
+            self.render("SUMMARY", summary, None, ["Generate resource pack? y/Enter yes   n back"], "summary")
+            key = self.screen.read_key()
+            if key in ("y", *KEY_ENTER):
+                return True
+            if key in ("n", KEY_ESCAPE):
+                return False
+
+    def run(self) -> Optional[tuple[str, str, int, set[str]]]:
+        """
+        Walk through all screens.
+
+        Returns:
+            Tuple of (pack_name, version_string, pack_format, visible_blocks),
+            or None if the user quit
+        """
+        pack_name = self.read_text("RESOURCE PACK NAME", "Enter a name for your resource pack: ")
+        if pack_name is None:
+            return None
+        pack_name = pack_name.strip().replace(' ', '_') or DEFAULT_PACK_NAME
+
+        version_result = self.choose_version()
+        if version_result is None:
+            return None
+        version_string, pack_format = version_result
+
+        while True:
+            if not self.choose_blocks():
+                return None
+            if self.confirm(pack_name, version_string, pack_format):
+                return pack_name, version_string, pack_format, self.registry.blocks_of(self.selection)
+
+
+# =============================================================================
+# ENTRY POINT
+# =============================================================================
+
+def main_tui(
+    vanilla: Optional[VanillaAssets] = None,
+    registry: Optional[BlockRegistry] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    selection: int = 0,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> int:
+    """
+    Run the curses front end, then generate the pack on the normal terminal.
+
+    Returns:
+        Process exit code
+    """
+    if registry is None:
+        registry = get_registry()
+
+    os.environ.setdefault("ESCDELAY", ESCAPE_DELAY)
+
+    def session(window) -> Optional[tuple[str, str, int, set[str]]]:
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+        return XrayTui(window, registry, selection).run()
+
+    choices = curses.wrapper(session)
+    if choices is None:
+        print("Exiting.")
+        return 0
+
+    pack_name, version_string, pack_format, visible_blocks = choices
+    if version_string != UNIVERSAL_VERSION:
+        try:
+            check_pack_format(vanilla, pack_format)
+        except ValueError as error:
+            print(f"ERROR: {error}")
+            return 2
+    metrics = None
+    if metrics_enabled():
+        metrics = BuildMetrics(build_labels(pack_name, version_string, backend, "tui"))
+    result = generate_resource_pack(
+        pack_name, version_string, pack_format, visible_blocks,
+        vanilla=vanilla, registry=registry, backend=backend, metrics=metrics,
+        ghost_alpha=ghost_alpha
+    )
+    if metrics is not None:
+        publish_metrics(metrics.finish())
+    print_completion(pack_name, result)
+    return 0
@@ -0,0 +1,246 @@
+"""
+Registry Snapshot for Minecraft X-Ray Resource Pack Generator
+=============================================================
+
+Binary snapshot of the registry compiled from block_data, so startup does
+not import block_data or rebuild its tables and masks on every run.
+
+File layout (little-endian):
+
+    header   magic "XRAYREG\\0", u32 SNAPSHOT_VERSION, then the u64
+             modification time (ns) and u64 size of the block_data source
+             the snapshot was compiled from and of the block_registry source
+             that compiled it
+    sections each a u32 length followed by that many bytes, in order:
+             metadata    marshal: category names and sizes, presets, pack
+                         formats, format bounds
+             block IDs   UTF-8, newline-separated, in bit order
+             categories  u32 bit positions of every category's blocks,
+                         concatenated in category order
+             pillars     pillar mask
+             formats     one section per availability mask
+
+A snapshot is loaded with a single read, using only modules that are built
+into the interpreter. It is rebuilt automatically when its version or source
+stamp no longer matches, i.e. after block_data, the registry compiler or the
+snapshot layout changes; a snapshot that cannot be written (read-only home directory) only
+costs the compile.
+"""
+
+import os
+import sys
+import array
+import struct
+import marshal
+import tempfile
+from typing import Optional
+
+from block_registry import BlockRegistry, compile_block_data
+
+
+# Bump when the file layout or the compiled form of the registry changes
+SNAPSHOT_VERSION = 2
+
+SNAPSHOT_MAGIC = b"XRAYREG\0"
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "xray_pack_generator", "registry.bin"
+)
+
+_HEADER = struct.Struct("<8sLQQQQ")
+_LENGTH = struct.Struct("<L")
+
+
+# =============================================================================
+# SOURCE STAMP
+# =============================================================================
+
+BLOCK_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "block_data.py")
+
+# The compiler: a snapshot of an older compile_block_data is stale as well
+BLOCK_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "block_registry.py")
+
+SourceStamp = tuple[int, int, int, int]
+
+
+def source_stamp(
+    path: str = BLOCK_DATA_PATH,
+    compiler_path: str = BLOCK_REGISTRY_PATH
+) -> SourceStamp:
+    """
+    Return the (modification_time_ns, size) of the block_data source followed
+    by those of the block_registry source.
+
+    Like the mod index, a changed stamp is taken as changed content; the
+    sources are never read or imported for the check.
+
+    Raises:
+        OSError: If a source does not exist
+    """
+    data_stat = os.stat(path)
+    compiler_stat = os.stat(compiler_path)
+    return (
+        data_stat.st_mtime_ns, data_stat.st_size,
+        compiler_stat.st_mtime_ns, compiler_stat.st_size,
+    )
+
+
+# =============================================================================
+# ENCODING
+# =============================================================================
+
+def mask_bytes(mask: int) -> bytes:
+    """Little-endian bytes of a mask, as short as possible."""
+    return mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+
+
+def u32_array(data: bytes = b"") -> array.array:
+    """Array of unsigned 32-bit ints, stored little-endian in snapshots."""
+    values = array.array('I')
+    if values.itemsize != 4:
+        raise ValueError("no 32-bit array type on this platform")
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def encode_snapshot(registry: BlockRegistry, stamp: SourceStamp) -> bytes:
+    """Serialize a registry to the snapshot format."""
+    positions = u32_array()
+    for blocks in registry.categories.values():
+        positions.extend(registry.index[block] for block in blocks)
+    if sys.byteorder != 'little':
+        positions.byteswap()
+
+    metadata = {
+        "categories": [[name, len(blocks)] for name, blocks in registry.categories.items()],
+        "presets": registry.presets,
+        "pack_formats": registry.pack_formats,
+        "format_bounds": registry.format_bounds,
+    }
+    sections = [
+        marshal.dumps(metadata),
+        "\n".join(registry.block_ids).encode('utf-8'),
+        positions.tobytes(),
+        mask_bytes(registry.pillar_mask),
+    ] + [mask_bytes(mask) for mask in registry.format_masks]
+
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, *stamp)]
+    for section in sections:
+        parts.append(_LENGTH.pack(len(section)))
+        parts.append(section)
+    return b"".join(parts)
+
+
+def decode_snapshot(data: bytes, stamp: Optional[SourceStamp] = None) -> BlockRegistry:
+    """
+    Restore a registry from snapshot bytes.
+
+    Args:
+        data: Snapshot file contents
+        stamp: Expected source stamp (None: accept any)
+
+    Raises:
+        ValueError: If the snapshot is corrupt, from another SNAPSHOT_VERSION
+            or compiled from a different block_data or block_registry
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("snapshot is truncated")
+    magic, version, *snapshot_stamp = _HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a registry snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot version {version} is not {SNAPSHOT_VERSION}")
+    if stamp is not None and tuple(snapshot_stamp) != stamp:
+        raise ValueError("snapshot was compiled from a different block_data or block_registry")
+
+    view = memoryview(data)
+    sections = []
+    position = _HEADER.size
+    while position < len(data):
+        if position + _LENGTH.size > len(data):
+            raise ValueError("snapshot is truncated")
+        (length,) = _LENGTH.unpack_from(data, position)
+        position += _LENGTH.size
+        if position + length > len(data):
+            raise ValueError("snapshot is truncated")
+        sections.append(view[position:position + length])
+        position += length
+    if len(sections) < 5:
+        raise ValueError("snapshot is truncated")
+
+    try:
+        metadata = marshal.loads(sections[0])
+    except (EOFError, TypeError) as error:
+        raise ValueError(f"snapshot metadata is corrupt: {error}")
+    block_ids = str(sections[1], 'utf-8').split("\n") if len(sections[1]) else []
+
+    positions = u32_array(sections[2])
+
+    category_positions: dict[str, list[int]] = {}
+    start = 0
+    for name, size in metadata["categories"]:
+        category_positions[name] = positions[start:start + size].tolist()
+        start += size
+
+    format_masks = [int.from_bytes(section, 'little') for section in sections[4:]]
+    if len(format_masks) != len(metadata["format_bounds"]) + 1:
+        raise ValueError("snapshot availability index is inconsistent")
+
+    return BlockRegistry.from_compiled(
+        block_ids,
+        category_positions,
+        int.from_bytes(sections[3], 'little'),
+        metadata["presets"],
+        metadata["format_bounds"],
+        format_masks,
+        metadata["pack_formats"],
+    )
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def write_snapshot(path: str, data: bytes) -> None:
+    """Write a snapshot atomically."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_registry(path: str = DEFAULT_SNAPSHOT_PATH) -> BlockRegistry:
+    """
+    Load the block_data registry from its snapshot, rebuilding a stale one.
+
+    Returns:
+        The registry; identical to compiling block_data directly
+    """
+    try:
+        stamp = source_stamp()
+    except OSError:
+        # No source to compare against (e.g. a frozen build): always compile
+        return compile_block_data()
+
+    try:
+        with open(path, 'rb') as file:
+            return decode_snapshot(file.read(), stamp)
+    except (OSError, ValueError, KeyError, TypeError):
+        # Also covers marshal data written by an incompatible Python version
+        pass
+
+    registry = compile_block_data()
+    try:
+        write_snapshot(path, encode_snapshot(registry, stamp))
+    except (OSError, ValueError):
+        pass
+    return registry
@@ -0,0 +1,323 @@
+"""
+Core Shader Backend for Minecraft X-Ray Resource Pack Generator
+===============================================================
+
+Alternative to per-block blockstate overrides for clients with core shaders
+(1.17+, pack format 7 and later).
+
+Core shaders never see block IDs, so the hidden set is marked in the
+textures instead:
+
+    - The terrain fragment shaders (solid, cutout, cutout_mipped,
+      translucent, tripwire) are copied from the client jar with one line
+      added at the top of main(): every fragment whose texel alpha is
+      MARKER_ALPHA is discarded.
+    - The textures of the hidden blocks are copied from the client jar with
+      the alpha of every non-transparent texel set to MARKER_ALPHA.
+
+The pack then holds a handful of shaders plus the hidden blocks' textures,
+instead of one blockstate per hidden block, and the client has almost
+nothing to parse and bake on resource reload.
+
+Only marked texels are discarded, so everything the pack does not mark is
+drawn as usual: visible blocks, fluids (water and lava use their own
+textures), blocks that are not in the registry and blocks the client jar
+has no textures for.
+
+Limitations, compared with the blockstate backend:
+
+    - Visibility is per texture: a hidden block drawn with a texture of a
+      visible block (stone stairs and stone) stays visible, and so do hidden
+      blocks whose textures decode_png cannot read (16-bit, interlaced).
+    - Block entities (chests, signs, beds, ...) and modded blocks are drawn
+      by other shaders or from other jars, and are left untouched.
+"""
+
+import re
+import zlib
+import struct
+from typing import Optional
+
+from block_registry import BlockRegistry
+from pack_metrics import STAGE_SHADERS, ProgressCallback, progress_reporter
+from pack_writer import PackSink
+from vanilla_assets import VanillaAssets
+
+
+# First pack format (1.17) whose clients load core shaders from resource packs
+SHADER_MIN_FORMAT = 7
+
+# Texel alpha that marks a texture as belonging to a hidden block
+MARKER_ALPHA = 254
+
+# Core shaders used to draw terrain; the ones a client jar lacks are skipped
+TERRAIN_SHADERS = (
+    "rendertype_solid",
+    "rendertype_cutout",
+    "rendertype_cutout_mipped",
+    "rendertype_translucent",
+    "rendertype_tripwire",
+)
+
+MARKER_TEST = (
+    "    // x-ray: only texels of hidden blocks carry the marker alpha\n"
+    f"    if (int(texture(Sampler0, texCoord0).a * 255.0 + 0.5) == {MARKER_ALPHA}) {{\n"
+    "        discard;\n"
+    "    }\n"
+)
+
+_MAIN_PATTERN = re.compile(r"void\s+main\s*\(\s*\)\s*\{[^\n]*\n")
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# =============================================================================
+# PNG CODEC
+# =============================================================================
+
+def decode_png(data: bytes) -> tuple[int, int, bytearray]:
+    """
+    Decode a non-interlaced PNG to 8-bit RGBA.
+
+    Supports every color type at bit depth 8, and palette images at depths
+    1, 2, 4 and 8 (the formats vanilla textures use).
+
+    Returns:
+        Tuple of (width, height, rgba_pixels)
+
+    Raises:
+        ValueError: If the PNG is malformed or uses an unsupported format
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+
+    header = None
+    palette = b""
+    transparency = b""
+    compressed = bytearray()
+
+    position = len(_PNG_SIGNATURE)
+    while position + 8 <= len(data):
+        length, chunk_type = struct.unpack_from(">L4s", data, position)
+        chunk = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">2L5B", chunk)
+        elif chunk_type == b"PLTE":
+            palette = chunk
+        elif chunk_type == b"tRNS":
+            transparency = chunk
+        elif chunk_type == b"IDAT":
+            compressed += chunk
+        elif chunk_type == b"IEND":
+            break
+
+    if header is None:
+        raise ValueError("PNG has no IHDR chunk")
+    width, height, depth, color_type, _, _, interlace = header
+    if interlace:
+        raise ValueError("interlaced PNGs are not supported")
+
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type)
+    if channels is None or (depth != 8 and not (color_type == 3 and depth in (1, 2, 4))):
+        raise ValueError(f"unsupported PNG format (color type {color_type}, depth {depth})")
+
+    stride = (width * channels * depth + 7) // 8
+    pixel_bytes = max(1, channels * depth // 8)
+    raw = zlib.decompress(bytes(compressed))
+    if len(raw) < height * (stride + 1):
+        raise ValueError("PNG image data is truncated")
+
+    # Undo the per-row filters
+    rows = []
+    previous = bytearray(stride)
+    for y in range(height):
+        offset = y * (stride + 1)
+        filter_type = raw[offset]
+        row = bytearray(raw[offset + 1:offset + 1 + stride])
+        for x in range(stride):
+            left = row[x - pixel_bytes] if x >= pixel_bytes else 0
+            up = previous[x]
+            if filter_type == 1:
+                row[x] = (row[x] + left) & 0xFF
+            elif filter_type == 2:
+                row[x] = (row[x] + up) & 0xFF
+            elif filter_type == 3:
+                row[x] = (row[x] + ((left + up) >> 1)) & 0xFF
+            elif filter_type == 4:
+                up_left = previous[x - pixel_bytes] if x >= pixel_bytes else 0
+                estimate = left + up - up_left
+                distances = (abs(estimate - left), abs(estimate - up), abs(estimate - up_left))
+                if distances[0] <= distances[1] and distances[0] <= distances[2]:
+                    predictor = left
+                elif distances[1] <= distances[2]:
+                    predictor = up
+                else:
+                    predictor = up_left
+                row[x] = (row[x] + predictor) & 0xFF
+            elif filter_type != 0:
+                raise ValueError(f"unknown PNG filter type {filter_type}")
+        rows.append(row)
+        previous = row
+
+    # Expand to RGBA
+    pixels = bytearray()
+    for row in rows:
+        for x in range(width):
+            if color_type == 3:
+                bit = x * depth
+                index = (row[bit >> 3] >> (8 - depth - (bit & 7))) & ((1 << depth) - 1)
+                alpha = transparency[index] if index < len(transparency) else 255
+                pixels += palette[index * 3:index * 3 + 3] + bytes((alpha,))
+            elif color_type == 6:
+                pixels += row[x * 4:x * 4 + 4]
+            elif color_type == 2:
+                rgb = row[x * 3:x * 3 + 3]
+                alpha = 0 if transparency[1::2] == rgb else 255
+                pixels += rgb + bytes((alpha,))
+            elif color_type == 4:
+                gray, alpha = row[x * 2], row[x * 2 + 1]
+                pixels += bytes((gray, gray, gray, alpha))
+            else:
+                gray = row[x]
+                alpha = 0 if transparency[1:2] == bytes((gray,)) else 255
+                pixels += bytes((gray, gray, gray, alpha))
+
+    return width, height, pixels
+
+
+def encode_png(width: int, height: int, pixels: bytes) -> bytes:
+    """Encode 8-bit RGBA pixels as a PNG (no filtering, maximum compression)."""
+    stride = width * 4
+    raw = b"".join(
+        b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(height)
+    )
+
+    def chunk(chunk_type: bytes, body: bytes) -> bytes:
+        return (
+            struct.pack(">L", len(body)) + chunk_type + body
+            + struct.pack(">L", zlib.crc32(chunk_type + body))
+        )
+
+    return (
+        _PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">2L5B", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def mark_texture(data: bytes) -> bytes:
+    """Return a PNG with the alpha of every non-transparent texel set to MARKER_ALPHA."""
+    width, height, pixels = decode_png(data)
+    for alpha_index in range(3, len(pixels), 4):
+        if pixels[alpha_index]:
+            pixels[alpha_index] = MARKER_ALPHA
+    return encode_png(width, height, pixels)
+
+
+# =============================================================================
+# SHADERS
+# =============================================================================
+
+def patch_fragment_shader(source: str, test: str = MARKER_TEST) -> str:
+    """
+    Insert a texel test at the top of a vanilla fragment shader's main().
+
+    Args:
+        source: GLSL source of the shader
+        test: Lines to insert (the marker test by default)
+
+    Raises:
+        ValueError: If the shader does not sample Sampler0 at texCoord0 or
+            has no main()
+    """
+    if "Sampler0" not in source or "texCoord0" not in source:
+        raise ValueError("shader does not sample Sampler0 at texCoord0")
+    match = _MAIN_PATTERN.search(source)
+    if match is None:
+        raise ValueError("shader has no main()")
+    return source[:match.end()] + test + source[match.end():]
+
+
+def supports_shader_backend(pack_format: int, vanilla: Optional[VanillaAssets]) -> bool:
+    """Whether a pack for this format can use the shader backend with this client jar."""
+    return (
+        vanilla is not None
+        and pack_format >= SHADER_MIN_FORMAT
+        and any(vanilla.has_asset(f"shaders/core/{name}.fsh") for name in TERRAIN_SHADERS)
+    )
+
+
+# =============================================================================
+# PACK ASSETS
+# =============================================================================
+
+def write_shader_assets(
+    sink: PackSink,
+    visible_blocks: set[str],
+    registry: BlockRegistry,
+    vanilla: VanillaAssets,
+    pack_format: Optional[int] = None,
+    verbose: bool = False,
+    progress: Optional[ProgressCallback] = None
+) -> tuple[int, int]:
+    """
+    Write the patched terrain shaders and the marked textures of the hidden blocks.
+
+    Textures that a visible block also uses are left unmarked, so that block
+    stays visible.
+
+    Args:
+        sink: Destination for the pack entries
+        visible_blocks: Blocks that should stay visible
+        registry: Block registry to generate from
+        vanilla: Client jar to copy shaders and textures from
+        pack_format: Only count blocks that exist in this pack format
+        verbose: Print progress messages
+        progress: Report progress messages here instead of printing them
+
+    Returns:
+        Tuple of (invisible_block_count, visible_block_count)
+    """
+    progress = progress_reporter(progress, verbose)
+    shader_count = 0
+    for name in TERRAIN_SHADERS:
+        path = f"shaders/core/{name}.fsh"
+        if not vanilla.has_asset(path):
+            continue
+        source = vanilla.read_asset(path).decode('utf-8')
+        sink.write_entry(f"assets/minecraft/{path}", patch_fragment_shader(source).encode('utf-8'))
+        shader_count += 1
+    if progress is not None:
+        progress(STAGE_SHADERS, f"Patched {shader_count} terrain shaders")
+
+    available_mask = registry.available_mask(pack_format)
+    visible_mask = available_mask & registry.mask_of(
+        block for block in visible_blocks if block in registry
+    )
+
+    visible_textures: set[str] = set()
+    for block in registry.iter_blocks(visible_mask):
+        visible_textures.update(vanilla.block_textures(block))
+    textures: set[str] = set()
+    for block in registry.iter_blocks(available_mask & ~visible_mask):
+        textures.update(vanilla.block_textures(block))
+    textures -= visible_textures
+
+    marked = 0
+    for path in sorted(textures):
+        try:
+            texture = mark_texture(vanilla.read_asset(path))
+        except (ValueError, zlib.error):
+            # Unsupported PNG (16-bit, interlaced, ...): left unmarked, so drawn
+            continue
+        sink.write_entry(f"assets/minecraft/{path}", texture)
+        marked += 1
+        # Animated textures need their metadata in the same pack as the image
+        if vanilla.has_asset(f"{path}.mcmeta"):
+            sink.write_entry(f"assets/minecraft/{path}.mcmeta", vanilla.read_asset(f"{path}.mcmeta"))
+    if progress is not None:
+        progress(STAGE_SHADERS, f"Marked {marked} textures of hidden blocks")
+
+    return registry.count(available_mask & ~visible_mask), registry.count(visible_mask)
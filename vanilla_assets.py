@@ -0,0 +1,410 @@
+"""
+Vanilla Client Assets for Minecraft X-Ray Resource Pack Generator
+=================================================================
+
+Reads vanilla assets from a local Minecraft client jar (e.g.
+.minecraft/versions/1.21.4/1.21.4.jar; nothing is downloaded):
+
+    - blockstates, so invisible blockstates can use exactly the variant keys
+      and multipart shape of the original block instead of a single ""
+      variant,
+    - block models and textures, to find which textures a block is drawn
+      with,
+    - core shaders, for the shader backend (see shader_backend).
+
+A jar only describes its own version: the resource pack format it was built
+for is read from its version.json, and builds for another format refuse the
+jar (see check_pack_format) instead of copying the wrong blockstates,
+shaders or textures.
+
+Opening a jar hashes it and looks up an index of its asset entries in the
+index directory, keyed by the jar's SHA-1. Only the first open of a jar
+parses its central directory; later opens load the small index file. Entry
+data is read lazily from a memory map of the jar, one asset at a time.
+"""
+
+import os
+import json
+import mmap
+import zlib
+import struct
+import hashlib
+import zipfile
+from functools import lru_cache
+from typing import Optional
+
+from pack_writer import ZIP_DEFLATED, ZIP_STORED, PrecompressedEntry, write_file_atomic
+
+
+# Bump when the index file layout changes
+INDEX_VERSION = 3
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "xray_pack_generator")
+
+ASSETS_PREFIX = "assets/minecraft/"
+
+# Asset folders (below ASSETS_PREFIX) that are indexed
+INDEXED_FOLDERS = ("blockstates/", "models/block/", "textures/block/", "shaders/")
+
+DEFAULT_INVISIBLE_MODEL = "block/xray/xray_invisible"
+
+# Fixed part of a local file header: signature through extra field length
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+# =============================================================================
+# BLOCKSTATE CONVERSION
+# =============================================================================
+
+def make_invisible_blockstate(blockstate: dict, model: str = DEFAULT_INVISIBLE_MODEL) -> dict:
+    """
+    Replace every model of a vanilla blockstate with the invisible model.
+
+    Variant keys and multipart "when" conditions are kept as they are, so
+    every block state the client can produce still resolves to a model.
+
+    Raises:
+        ValueError: If the blockstate has neither variants nor multipart
+    """
+    invisible = {"model": model}
+
+    if "variants" in blockstate:
+        return {"variants": {key: dict(invisible) for key in blockstate["variants"]}}
+
+    if "multipart" in blockstate:
+        parts = []
+        for part in blockstate["multipart"]:
+            converted = {"apply": dict(invisible)}
+            if "when" in part:
+                converted["when"] = part["when"]
+            parts.append(converted)
+        return {"multipart": parts}
+
+    raise ValueError("blockstate has neither 'variants' nor 'multipart'")
+
+
+# =============================================================================
+# VERSION
+# =============================================================================
+
+def read_pack_format(version_json: bytes) -> int:
+    """
+    Return the resource pack format from a client jar's version.json.
+
+    Handles "pack_version" as a number (1.14 - 1.17) and as an object with
+    "resource" (1.18+) or "resource_major" (1.21.9+).
+
+    Raises:
+        ValueError: If the document has no resource pack format
+    """
+    pack_version = json.loads(version_json).get("pack_version")
+    if isinstance(pack_version, dict):
+        pack_version = pack_version.get("resource", pack_version.get("resource_major"))
+    if not isinstance(pack_version, int) or isinstance(pack_version, bool):
+        raise ValueError("version.json has no resource pack format")
+    return pack_version
+
+
+def check_pack_format(vanilla: Optional["VanillaAssets"], pack_format: int) -> None:
+    """
+    Make sure a client jar belongs to the pack format being built.
+
+    A jar without a readable version.json is accepted as is.
+
+    Raises:
+        ValueError: If the jar is for another pack format
+    """
+    if vanilla is not None and vanilla.pack_format not in (None, pack_format):
+        raise ValueError(
+            f"client jar {vanilla.jar_path} is for pack format {vanilla.pack_format}, "
+            f"not {pack_format}"
+        )
+
+
+# =============================================================================
+# CLIENT JAR
+# =============================================================================
+
+class VanillaAssets:
+    """
+    Lazily read blockstates, models, textures and shaders from a vanilla client jar.
+
+    Construction raises OSError if the jar cannot be opened and ValueError if
+    it is empty or not a zip archive.
+
+    Attributes:
+        jar_path: Path of the client jar
+        jar_sha1: Hex SHA-1 of the jar (also the key of its cached index)
+        pack_format: Resource pack format of the jar's version (None if the
+            jar has no readable version.json)
+    """
+
+    def __init__(
+        self,
+        jar_path: str,
+        index_dir: str = DEFAULT_INDEX_DIR,
+        model: str = DEFAULT_INVISIBLE_MODEL
+    ) -> None:
+        self.jar_path = jar_path
+        self.model = model
+        self._file = open(jar_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+        self.jar_sha1 = hashlib.sha1(self._map).hexdigest()
+        self._index, self.pack_format = self._load_index(index_dir)
+        self._entries: dict[str, Optional[PrecompressedEntry]] = {}
+        self._payloads: dict[bytes, PrecompressedEntry] = {}
+
+    # -------------------------------------------------------------------------
+    # Index
+    # -------------------------------------------------------------------------
+
+    def _load_index(self, index_dir: str) -> tuple[dict[str, list[int]], Optional[int]]:
+        """
+        Load the cached index for this jar, building and saving it on a miss.
+
+        Returns:
+            Tuple of (entries, pack_format)
+        """
+        index_path = os.path.join(index_dir, f"{self.jar_sha1}.json")
+        try:
+            with open(index_path, 'r') as file:
+                cached = json.load(file)
+            if cached.get("index_version") == INDEX_VERSION:
+                return cached["entries"], cached["pack_format"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        entries, pack_format = self._build_index()
+
+        # An index that cannot be written (read-only home directory) only
+        # costs parsing the jar again next time
+        content = {"index_version": INDEX_VERSION, "pack_format": pack_format, "entries": entries}
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            write_file_atomic(index_path, json.dumps(content).encode('utf-8'))
+        except OSError:
+            pass
+
+        return entries, pack_format
+
+    def _build_index(self) -> tuple[dict[str, list[int]], Optional[int]]:
+        """
+        Parse the jar's central directory for the indexed asset folders.
+
+        Returns:
+            Tuple of (entries, pack_format): entries maps asset paths below
+            assets/minecraft/ to [header_offset, compress_size, file_size,
+            compress_type]; pack_format is read from version.json
+
+        Raises:
+            ValueError: If the file is not a zip archive
+        """
+        try:
+            archive = zipfile.ZipFile(self._file)
+        except zipfile.BadZipFile:
+            raise ValueError(f"{self.jar_path} is not a valid client jar")
+
+        entries = {}
+        with archive:
+            try:
+                pack_format = read_pack_format(archive.read("version.json"))
+            except (KeyError, ValueError, zipfile.BadZipFile, zlib.error):
+                pack_format = None
+            for info in archive.infolist():
+                name = info.filename
+                if not name.startswith(ASSETS_PREFIX) or name.endswith('/'):
+                    continue
+                path = name[len(ASSETS_PREFIX):]
+                if not path.startswith(INDEXED_FOLDERS):
+                    continue
+                entries[path] = [
+                    info.header_offset, info.compress_size, info.file_size, info.compress_type
+                ]
+        return entries, pack_format
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        """Number of blockstates in the jar."""
+        return sum(1 for path in self._index if path.startswith("blockstates/"))
+
+    def __contains__(self, block: str) -> bool:
+        """Whether the jar has a blockstate for a block."""
+        return f"blockstates/{block}.json" in self._index
+
+    def has_asset(self, path: str) -> bool:
+        """Whether the jar has an asset (path below assets/minecraft/)."""
+        return path in self._index
+
+    def read_asset(self, path: str) -> bytes:
+        """
+        Read an asset, inflating it if needed.
+
+        Args:
+            path: Asset path below assets/minecraft/, e.g. "blockstates/stone.json"
+
+        Raises:
+            KeyError: If the jar has no such asset
+            zipfile.BadZipFile: If the entry is corrupt or uses an
+                unsupported compression method
+        """
+        offset, compress_size, file_size, compress_type = self._index[path]
+
+        header = _LOCAL_HEADER.unpack_from(self._map, offset)
+        if header[0] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Bad local header for {path!r}")
+        start = offset + _LOCAL_HEADER.size + header[9] + header[10]
+        data = self._map[start:start + compress_size]
+
+        if compress_type == ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        elif compress_type != ZIP_STORED:
+            raise zipfile.BadZipFile(f"Unsupported compression for {path!r}")
+        if len(data) != file_size:
+            raise zipfile.BadZipFile(f"Truncated asset {path!r}")
+
+        return data
+
+    def read_blockstate(self, block: str) -> dict:
+        """
+        Read and parse the vanilla blockstate of a block.
+
+        Raises:
+            KeyError: If the jar has no blockstate for the block
+            zipfile.BadZipFile: If the entry is corrupt
+        """
+        return json.loads(self.read_asset(f"blockstates/{block}.json"))
+
+    def block_models(self, block: str) -> list[str]:
+        """
+        List the models a block's blockstate can select.
+
+        Returns:
+            Sorted model references as written in the blockstate, e.g.
+            ["minecraft:block/stone"]; empty if the jar has no blockstate
+            for the block
+        """
+        try:
+            blockstate = self.read_blockstate(block)
+        except (KeyError, ValueError, zipfile.BadZipFile, zlib.error):
+            return []
+
+        models = []
+        for variant in blockstate.get("variants", {}).values():
+            models.extend(variant if isinstance(variant, list) else [variant])
+        for part in blockstate.get("multipart", []):
+            apply = part.get("apply", [])
+            models.extend(apply if isinstance(apply, list) else [apply])
+
+        return sorted({
+            model.get("model") for model in models
+            if isinstance(model, dict) and isinstance(model.get("model"), str)
+        })
+
+    def block_textures(self, block: str) -> list[str]:
+        """
+        Find the textures a block is drawn with.
+
+        Every model the block's blockstate can select is resolved through its
+        parent chain, and texture variables ("#side") are followed to the
+        texture they name.
+
+        Returns:
+            Sorted texture asset paths that exist in the jar, e.g.
+            ["textures/block/stone.png"]; empty if the jar has no blockstate
+            for the block
+        """
+        textures: set[str] = set()
+        for model in self.block_models(block):
+            textures.update(self.model_texture_variables(model).values())
+        return sorted(path for path in textures if self.has_asset(path))
+
+    def model_texture_variables(self, model: str) -> dict[str, str]:
+        """
+        Resolve the texture variables of a model and its parents.
+
+        Returns:
+            Texture asset path of every variable that names a texture, e.g.
+            {"all": "textures/block/stone.png", "particle": ...}; the path
+            may be missing from the jar
+        """
+        variables: dict[str, str] = {}
+        seen: set[str] = set()
+        name: Optional[str] = model
+
+        # Walk up the parent chain; child definitions win over parents
+        while name and name not in seen:
+            seen.add(name)
+            path = f"models/{name.split(':')[-1]}.json"
+            if not self.has_asset(path):
+                break
+            try:
+                definition = json.loads(self.read_asset(path))
+            except (ValueError, zipfile.BadZipFile, zlib.error):
+                break
+            for key, value in definition.get("textures", {}).items():
+                variables.setdefault(key, value)
+            name = definition.get("parent")
+
+        textures = {}
+        for key, value in variables.items():
+            hops = 0
+            while isinstance(value, str) and value.startswith('#') and hops < len(variables):
+                value = variables.get(value[1:])
+                hops += 1
+            if isinstance(value, str) and not value.startswith('#'):
+                textures[key] = f"textures/{value.split(':')[-1]}.png"
+        return textures
+
+    def invisible_entry(self, block: str) -> Optional[PrecompressedEntry]:
+        """
+        Return the invisible blockstate entry for a block, shaped like vanilla.
+
+        Blocks with identical shapes (all fences, all stairs, ...) share one
+        compressed payload. Results are remembered per block.
+
+        Returns:
+            The entry, or None if the jar has no usable blockstate for the block
+        """
+        if block in self._entries:
+            return self._entries[block]
+
+        entry = None
+        if block in self:
+            try:
+                blockstate = make_invisible_blockstate(self.read_blockstate(block), self.model)
+            except (ValueError, zipfile.BadZipFile, zlib.error):
+                blockstate = None
+            if blockstate is not None:
+                # Same serialization as the rest of the pack
+                data = json.dumps(blockstate, indent=4, sort_keys=True).encode('utf-8')
+                entry = self._payloads.get(data)
+                if entry is None:
+                    entry = self._payloads[data] = PrecompressedEntry(data)
+
+        self._entries[block] = entry
+        return entry
+
+    def close(self) -> None:
+        """Release the memory map and the file."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "VanillaAssets":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+@lru_cache(maxsize=None)
+def load_client_jar(jar_path: str) -> VanillaAssets:
+    """Return the assets of a client jar, opened once per process and path."""
+    return VanillaAssets(jar_path)
@@ -6,22 +6,82 @@ Creates Minecraft resource packs that make blocks invisible (x-ray effect).
 Users can select which Minecraft version to target and which blocks to keep visible.
 
 Usage:
-    python xray_pack_generator.py
+    python xray_pack_generator.py [--select EXPR] [--plain]
+    python xray_pack_generator.py --version 1.21.4 [--preset KEY] [--blocks A,B]
+                                  [--category NAME] [--select EXPR] [--name NAME]
+                                  [OUTPUT.zip | - | --fd N]
+    python xray_pack_generator.py --batch manifest.json [--workers N] [--output-dir DIR]
+                                  [--cache-dir DIR] [--reproducible] [--incremental]
+                                  [--content-addressed]
+
+With --version a single pack is built without prompts. OUTPUT "-" streams
+the archive to stdout (e.g. "... --version 1.21.4 - | upload") and --fd N to
+an already open descriptor such as a socket or pipe; progress then goes to
+stderr. The archive is written strictly sequentially, so the output never
+needs to be seekable.
+
+Any mode accepts --metrics-json FILE and --metrics-textfile FILE to write
+per-stage build measurements (see pack_metrics).
+
+With --client-jar JAR, --backend ghost keeps hidden blocks as faint
+see-through copies of their real textures instead of hiding them completely;
+--ghost-alpha ALPHA sets their opacity (see ghost_backend).
 
 The generated .zip file can be placed directly in Minecraft's resourcepacks folder.
 """
 
+import io
 import os
+import sys
+import argparse
 import json
 import base64
-import shutil
-from typing import Optional
-
-from block_data import (
-    VERSION_TO_PACK_FORMAT,
-    BLOCK_CATEGORIES,
-    PILLAR_BLOCKS,
-    PRESETS,
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from block_registry import BlockRegistry, get_registry
+from block_search import KIND_CATEGORY, get_search_index
+from block_selection import compile_selection
+from pack_metrics import (
+    STAGE_BLOCKSTATES,
+    STAGE_GHOST,
+    STAGE_METADATA,
+    STAGE_MODEL,
+    STAGE_SETUP,
+    STAGE_SHADERS,
+    STAGE_TEXTURE,
+    STAGE_UNIVERSAL,
+    BuildMetrics,
+    MeteredSink,
+    ProgressCallback,
+    add_metrics_hook,
+    metrics_enabled,
+    progress_reporter,
+    publish_metrics,
+    remove_metrics_hook,
+    stage,
+    write_metrics_reports,
+)
+from ghost_backend import (
+    DEFAULT_GHOST_ALPHA,
+    MAX_GHOST_ALPHA,
+    MIN_GHOST_ALPHA,
+    supports_ghost_backend,
+    validate_ghost_alpha,
+    write_ghost_assets,
+)
+from shader_backend import supports_shader_backend, write_shader_assets
+from vanilla_assets import VanillaAssets, check_pack_format
+from pack_writer import (
+    PackSink,
+    PrecompressedEntry,
+    ZipPackSink,
+    AtomicZipPackSink,
+    AtomicDirectoryPackSink,
+    MemoryPackSink,
+    same_payload,
+    write_file_atomic,
 )
 
 
@@ -31,7 +91,11 @@ from block_data import (
 
 def clear_screen() -> None:
     """Clear the terminal screen (cross-platform)."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        # ANSI home + erase; avoids forking a shell for every menu redraw
+        print("\033[H\033[2J", end="", flush=True)
 
 
 def print_header() -> None:
@@ -47,24 +111,109 @@ def print_separator() -> None:
     print("-" * 50)
 
 
-def get_all_blocks() -> set[str]:
+def get_all_blocks(registry: Optional[BlockRegistry] = None) -> set[str]:
     """Return a set of all block IDs from all categories."""
-    all_blocks = set()
-    for blocks in BLOCK_CATEGORIES.values():
-        all_blocks.update(blocks)
-    return all_blocks
+    if registry is None:
+        registry = get_registry()
+    return set(registry.block_ids)
+
+
+def get_preset_blocks(preset_key: str, registry: Optional[BlockRegistry] = None) -> set[str]:
+    """Return the set of block IDs made visible by a preset."""
+    if registry is None:
+        registry = get_registry()
+    return registry.blocks_of(registry.preset_masks[preset_key])
+
+
+def resolve_selection(
+    preset_key: Optional[str] = None,
+    blocks: Iterable[str] = (),
+    categories: Iterable[str] = (),
+    registry: Optional[BlockRegistry] = None,
+    expression: Optional[str] = None
+) -> set[str]:
+    """
+    Combine a preset, explicit blocks, whole categories and a selection
+    expression (see block_selection) into one selection.
+
+    Used by the non-interactive front ends (batch manifests, HTTP service).
+
+    Returns:
+        Union of all referenced blocks
+
+    Raises:
+        ValueError: If a preset, block or category does not exist, or the
+            expression is invalid
+    """
+    if registry is None:
+        registry = get_registry()
+    selection = 0
+
+    if expression is not None:
+        selection |= compile_selection(expression).mask(registry)
+
+    if preset_key is not None:
+        if preset_key not in registry.preset_masks:
+            raise ValueError(f"unknown preset {preset_key!r}")
+        selection |= registry.preset_masks[preset_key]
 
+    for category in categories:
+        if category not in registry.category_masks:
+            raise ValueError(f"unknown category {category!r}")
+        selection |= registry.category_masks[category]
 
-def count_blocks_in_category(category: str, visible_blocks: set[str]) -> tuple[int, int]:
+    blocks = list(blocks)
+    unknown = [block for block in blocks if block not in registry]
+    if unknown:
+        raise ValueError(f"unknown blocks {', '.join(unknown)}")
+    selection |= registry.mask_of(blocks)
+
+    return registry.blocks_of(selection)
+
+
+def count_pack_blocks(
+    visible_blocks: set[str],
+    pack_format: Optional[int] = None,
+    registry: Optional[BlockRegistry] = None
+) -> tuple[int, int]:
+    """
+    Count the blocks a pack would make invisible and keep visible.
+
+    Blocks listed in several categories are counted once. With a pack format,
+    only blocks that exist in that format are counted.
+
+    Returns:
+        Tuple of (invisible_count, visible_count)
+    """
+    if registry is None:
+        registry = get_registry()
+    available_mask = registry.available_mask(pack_format)
+    visible_mask = registry.mask_of(block for block in visible_blocks if block in registry)
+    return (
+        registry.count(available_mask & ~visible_mask),
+        registry.count(available_mask & visible_mask),
+    )
+
+
+def count_blocks_in_category(
+    category: str,
+    selection: int,
+    registry: Optional[BlockRegistry] = None
+) -> tuple[int, int]:
     """
     Count visible and total blocks in a category.
 
+    Args:
+        category: Category name
+        selection: Bitmask of visible blocks (see block_registry)
+        registry: Block registry the selection refers to (defaults to block_data)
+
     Returns:
         Tuple of (visible_count, total_count)
     """
-    blocks = BLOCK_CATEGORIES[category]
-    visible_count = len(set(blocks) & visible_blocks)
-    return visible_count, len(blocks)
+    if registry is None:
+        registry = get_registry()
+    return registry.count_in_category(category, selection)
 
 
 def parse_number_selection(input_string: str, max_value: int) -> list[int]:
@@ -118,9 +267,10 @@ def prompt_version_selection() -> Optional[tuple[str, int]]:
     print("\nSELECT MINECRAFT VERSION")
     print_separator()
 
-    versions = list(VERSION_TO_PACK_FORMAT.items())
+    versions = list(get_registry().pack_formats.items())
     for index, (version, pack_format) in enumerate(versions, start=1):
         print(f"  [{index:2}] {version} (pack format {pack_format})")
+    print(f"  [ U] All versions, one universal pack ({get_universal_version_range()})")
 
     print()
 
@@ -129,6 +279,10 @@ def prompt_version_selection() -> Optional[tuple[str, int]]:
         if choice.lower() == 'q':
             return None
 
+        if choice.lower() == 'u':
+            print(f"\n-> Selected: universal pack ({get_universal_version_range()})")
+            return UNIVERSAL_VERSION, resolve_version(UNIVERSAL_VERSION)
+
         selected_index = int(choice) - 1
         if 0 <= selected_index < len(versions):
             selected_version = versions[selected_index]
@@ -147,17 +301,26 @@ def prompt_version_selection() -> Optional[tuple[str, int]]:
 # USER INTERFACE: Block Selection
 # =============================================================================
 
-def prompt_block_selection() -> Optional[set[str]]:
+def prompt_block_selection(
+    registry: Optional[BlockRegistry] = None,
+    selection: int = 0
+) -> Optional[set[str]]:
     """
     Main menu for selecting which blocks should remain visible.
 
     By default, all blocks are invisible. Users select categories/blocks
-    to mark as VISIBLE (not affected by x-ray).
+    to mark as VISIBLE (not affected by x-ray). The selection is kept as a
+    registry bitmask while the menus are open.
+
+    Args:
+        registry: Block registry to select from (defaults to block_data)
+        selection: Bitmask of blocks that start out visible
 
     Returns:
         Set of block IDs that should remain visible, or None if cancelled
     """
-    visible_blocks: set[str] = set()
+    if registry is None:
+        registry = get_registry()
 
     while True:
         clear_screen()
@@ -169,9 +332,9 @@ def prompt_block_selection() -> Optional[set[str]]:
         print()
 
         # Display categories with visibility status
-        categories = list(BLOCK_CATEGORIES.keys())
+        categories = list(registry.categories.keys())
         for index, category in enumerate(categories, start=1):
-            visible_count, total_count = count_blocks_in_category(category, visible_blocks)
+            visible_count, total_count = count_blocks_in_category(category, selection, registry)
 
             if visible_count == total_count:
                 status = "[ALL VISIBLE]"
@@ -187,6 +350,8 @@ def prompt_block_selection() -> Optional[set[str]]:
         print("  [A]  Make ALL blocks visible (disable x-ray)")
         print("  [C]  Clear all (reset to all invisible)")
         print("  [P]  Show preset options")
+        print("  [E]  Enter a selection expression (e.g. *_ore - @Ores (Nether))")
+        print("  [S]  Search blocks and categories")
         print("  [D]  Done - Generate resource pack")
         print("  [Q]  Quit without generating")
         print()
@@ -197,22 +362,35 @@ def prompt_block_selection() -> Optional[set[str]]:
             return None
 
         if choice == 'd':
-            return visible_blocks
+            return registry.blocks_of(selection)
 
         if choice == 'a':
-            visible_blocks = get_all_blocks()
+            selection = registry.all_mask
             print("\n-> All blocks set to visible!")
             input("Press Enter to continue...")
 
         elif choice == 'c':
-            visible_blocks.clear()
+            selection = 0
             print("\n-> All blocks set to invisible!")
             input("Press Enter to continue...")
 
         elif choice == 'p':
-            preset_result = prompt_preset_selection()
+            preset_result = prompt_preset_selection(registry)
             if preset_result is not None:
-                visible_blocks = preset_result
+                selection = preset_result
+
+        elif choice == 's':
+            selection = prompt_search(selection, registry)
+
+        elif choice == 'e':
+            expression = input("Expression: ").strip()
+            if expression:
+                try:
+                    selection = compile_selection(expression).mask(registry)
+                    print(f"\n-> {registry.count(selection)} blocks set to visible!")
+                except ValueError as error:
+                    print(f"\nERROR: {error}")
+                input("Press Enter to continue...")
 
         else:
             # Try to parse as category number
@@ -220,20 +398,18 @@ def prompt_block_selection() -> Optional[set[str]]:
                 category_index = int(choice) - 1
                 if 0 <= category_index < len(categories):
                     category = categories[category_index]
-                    prompt_blocks_in_category(category, visible_blocks)
+                    selection = prompt_blocks_in_category(category, selection, registry)
             except ValueError:
                 print("ERROR: Invalid choice. Press Enter to continue...")
                 input()
 
-    return visible_blocks
 
-
-def prompt_preset_selection() -> Optional[set[str]]:
+def prompt_preset_selection(registry: Optional[BlockRegistry] = None) -> Optional[int]:
     """
     Display preset options and apply user selection.
 
     Returns:
-        Set of visible blocks from the preset, or None if cancelled
+        Bitmask of visible blocks from the preset, or None if cancelled
     """
     clear_screen()
     print_header()
@@ -241,9 +417,11 @@ def prompt_preset_selection() -> Optional[set[str]]:
     print_separator()
     print()
 
-    preset_keys = list(PRESETS.keys())
+    if registry is None:
+        registry = get_registry()
+    preset_keys = list(registry.presets.keys())
     for index, key in enumerate(preset_keys, start=1):
-        preset = PRESETS[key]
+        preset = registry.presets[key]
         print(f"  [{index}] {preset['name']}")
         print(f"      {preset['description']}")
         print()
@@ -260,17 +438,11 @@ def prompt_preset_selection() -> Optional[set[str]]:
         preset_index = int(choice) - 1
         if 0 <= preset_index < len(preset_keys):
             preset_key = preset_keys[preset_index]
-            preset = PRESETS[preset_key]
-
-            # Collect all blocks from preset categories
-            visible = set()
-            for category_name in preset["categories"]:
-                if category_name in BLOCK_CATEGORIES:
-                    visible.update(BLOCK_CATEGORIES[category_name])
+            preset = registry.presets[preset_key]
 
             print(f"\n-> Applied preset: {preset['name']}")
             input("Press Enter to continue...")
-            return visible
+            return registry.preset_masks[preset_key]
 
     except ValueError:
         pass
@@ -278,17 +450,26 @@ def prompt_preset_selection() -> Optional[set[str]]:
     return None
 
 
-def prompt_blocks_in_category(category: str, visible_blocks: set[str]) -> None:
+def prompt_blocks_in_category(
+    category: str,
+    selection: int,
+    registry: Optional[BlockRegistry] = None
+) -> int:
     """
     Display individual blocks within a category for selection.
 
-    Modifies visible_blocks in place based on user selections.
-
     Args:
         category: Category name to display
-        visible_blocks: Set to modify with user selections
+        selection: Bitmask of currently visible blocks
+        registry: Block registry the selection refers to (defaults to block_data)
+
+    Returns:
+        The updated selection bitmask
     """
-    blocks = BLOCK_CATEGORIES[category]
+    if registry is None:
+        registry = get_registry()
+    blocks = registry.categories[category]
+    category_mask = registry.category_masks[category]
 
     while True:
         clear_screen()
@@ -298,7 +479,7 @@ def prompt_blocks_in_category(category: str, visible_blocks: set[str]) -> None:
 
         # Display blocks with visibility status
         for index, block in enumerate(blocks, start=1):
-            if block in visible_blocks:
+            if selection & registry.bit(block):
                 status = "[VISIBLE]"
             else:
                 status = ""
@@ -321,118 +502,459 @@ def prompt_blocks_in_category(category: str, visible_blocks: set[str]) -> None:
 
         if choice == 'a':
             # Toggle all: if all visible, make invisible; otherwise make visible
-            all_visible = all(block in visible_blocks for block in blocks)
-            if all_visible:
-                visible_blocks.difference_update(blocks)
+            if selection & category_mask == category_mask:
+                selection &= ~category_mask
             else:
-                visible_blocks.update(blocks)
+                selection |= category_mask
 
         elif choice == 'v':
-            visible_blocks.update(blocks)
+            selection |= category_mask
 
         elif choice == 'i':
-            visible_blocks.difference_update(blocks)
+            selection &= ~category_mask
 
         else:
             # Parse block number selections
             try:
                 indices = parse_number_selection(choice, len(blocks))
                 for idx in indices:
-                    block = blocks[idx]
-                    if block in visible_blocks:
-                        visible_blocks.discard(block)
-                    else:
-                        visible_blocks.add(block)
+                    selection ^= registry.bit(blocks[idx])
             except (ValueError, IndexError):
                 print("ERROR: Invalid selection. Press Enter to continue...")
                 input()
 
+    return selection
+
+
+def prompt_search(selection: int, registry: Optional[BlockRegistry] = None) -> int:
+    """
+    Search blocks and categories by name and toggle the hits.
+
+    Hits come ranked from the registry's search index (see block_search).
+    Toggling a category hit toggles the whole category.
+
+    Args:
+        selection: Bitmask of currently visible blocks
+        registry: Block registry the selection refers to (defaults to block_data)
+
+    Returns:
+        The updated selection bitmask
+    """
+    if registry is None:
+        registry = get_registry()
+    index = get_search_index(registry)
+    query = input("Search: ").strip()
+
+    while query:
+        hits = index.search(query)
+
+        clear_screen()
+        print_header()
+        print(f"SEARCH: {query}")
+        print_separator()
+
+        if not hits:
+            print("  No matches.")
+        for number, hit in enumerate(hits, start=1):
+            if hit.kind == KIND_CATEGORY:
+                visible_count, total_count = registry.count_in_category(hit.name, selection)
+                status = f"[{visible_count}/{total_count} visible]"
+                print(f"  [{number:2}] @ {hit.name:<38} {status}")
+            else:
+                status = "[VISIBLE]" if selection & registry.bit(hit.name) else ""
+                category = index.block_categories.get(hit.name, "")
+                print(f"  [{number:2}] {hit.name:<40} {status:<10} {category}")
+
+        print()
+        print_separator()
+        print("Enter hit number(s) to toggle (e.g. 1,3-5), new search text,")
+        print("or press Enter to go back.")
+        print()
+
+        choice = input("Choice: ").strip()
+        if not choice:
+            break
+
+        try:
+            indices = parse_number_selection(choice, len(hits))
+        except ValueError:
+            query = choice
+            continue
+
+        for idx in indices:
+            hit = hits[idx]
+            if hit.kind == KIND_CATEGORY:
+                category_mask = registry.category_masks[hit.name]
+                if selection & category_mask == category_mask:
+                    selection &= ~category_mask
+                else:
+                    selection |= category_mask
+            else:
+                selection ^= registry.bit(hit.name)
+
+    return selection
+
 
 # =============================================================================
 # RESOURCE PACK GENERATION
 # =============================================================================
 
+# Bump whenever the bytes produced for a given selection change, so cached
+# packs built by an older generator are not served again.
+GENERATOR_VERSION = 4
+
+# Paths inside the pack (always forward slashes, as stored in the archive)
+ASSETS_DIR = "assets/minecraft"
+BLOCKSTATES_DIR = f"{ASSETS_DIR}/blockstates"
+MODELS_DIR = f"{ASSETS_DIR}/models/block/xray"
+TEXTURES_DIR = f"{ASSETS_DIR}/textures/block/xray"
+
+# Model reference used by every invisible blockstate
+INVISIBLE_MODEL = "block/xray/xray_invisible"
+
+# How blocks are hidden: one invisible blockstate per block, patched core
+# shaders plus marked textures (see shader_backend), or see-through copies of
+# the real blocks (see ghost_backend)
+BACKEND_BLOCKSTATES = "blockstates"
+BACKEND_SHADER = "shader"
+BACKEND_GHOST = "ghost"
+BACKENDS = (BACKEND_BLOCKSTATES, BACKEND_SHADER, BACKEND_GHOST)
+
+DEFAULT_PACK_NAME = "XRay_Pack"
+
+
+def backend_fingerprint(backend: str, ghost_alpha: int = DEFAULT_GHOST_ALPHA) -> Optional[str]:
+    """
+    Identify a backend and its options in selection fingerprints.
+
+    Returns:
+        None for the default backend, so existing fingerprints stay valid
+    """
+    if backend == BACKEND_BLOCKSTATES:
+        return None
+    if backend == BACKEND_GHOST:
+        return f"{backend}:{ghost_alpha}"
+    return backend
+
+
+@dataclass
+class PackBuildResult:
+    """Outcome of a pack build."""
+    output_path: Optional[str]
+    invisible_count: int
+    visible_count: int
+    entry_count: int
+    size: int
+    sha1: Optional[str] = None
+    reused_entries: int = 0
+
+
 def generate_resource_pack(
     pack_name: str,
     version_string: str,
     pack_format: int,
-    visible_blocks: set[str]
-) -> tuple[int, int]:
+    visible_blocks: set[str],
+    output_mode: str = "zip",
+    reproducible: bool = False,
+    write_sha1_file: bool = False,
+    incremental: bool = False,
+    vanilla: Optional[VanillaAssets] = None,
+    registry: Optional[BlockRegistry] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    metrics: Optional[BuildMetrics] = None,
+    output_dir: Optional[str] = None,
+    content_addressed: bool = False,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> PackBuildResult:
     """
-    Generate the resource pack files and create a ZIP archive.
+    Generate the resource pack and write it to the current directory.
+
+    Entries are streamed into a private temporary file (or folder) next to
+    the destination, which is renamed into place once complete, so builds
+    running concurrently in the same directory never corrupt or delete each
+    other's output (see AtomicZipPackSink).
 
     Args:
         pack_name: Name for the resource pack (used for folder and zip name)
         version_string: Minecraft version string for description
         pack_format: Resource pack format number
         visible_blocks: Set of block IDs that should NOT be made invisible
+        output_mode: "zip" to write <pack_name>.zip, "directory" to write an
+            unpacked folder named <pack_name>
+        reproducible: Produce a byte-identical ZIP for identical inputs
+            (fixed timestamps, sorted entries)
+        write_sha1_file: Also write <pack_name>.zip.sha1 next to the archive
+        incremental: Patch the existing <pack_name>.zip from its recorded
+            build manifest instead of rebuilding every entry (zip mode only)
+        vanilla: Client jar blockstates to copy variant keys from
+        registry: Block registry to generate from (defaults to block_data)
+        backend: One of BACKENDS (see write_pack_assets)
+        metrics: Record per-stage measurements here (see pack_metrics); the
+            caller finishes and publishes them
+        output_dir: Directory to write to instead of the current directory
+        content_addressed: Publish the archive as <pack_name>-<sha1>.zip
+            (zip mode without incremental only)
+        ghost_alpha: Alpha of hidden blocks with the ghost backend
+
+    Returns:
+        Block counts plus the archive's size, entry count and SHA-1 (computed
+        while the archive is written; None for directory output)
+    """
+    base_path = os.path.join(output_dir, pack_name) if output_dir else pack_name
+
+    if output_mode == "zip" and incremental:
+        from pack_incremental import incremental_build
+        output_path = f"{base_path}.zip"
+        print(f"\nUpdating ZIP archive: '{output_path}'...")
+        result = incremental_build(
+            output_path, pack_name, version_string, pack_format, visible_blocks,
+            reproducible=reproducible, verbose=True, registry=registry, vanilla=vanilla,
+            backend=backend, metrics=metrics, ghost_alpha=ghost_alpha
+        )
+        print(f"  - Created {output_path}")
+        if write_sha1_file:
+            write_file_atomic(f"{output_path}.sha1", f"{result.sha1}\n".encode('ascii'))
+            print(f"  - Created {output_path}.sha1")
+        return result
+
+    with stage(metrics, STAGE_SETUP):
+        if output_mode == "zip":
+            print(f"\nCreating ZIP archive: '{base_path}.zip'...")
+            sink = AtomicZipPackSink(
+                f"{base_path}.zip", reproducible=reproducible, content_addressed=content_addressed
+            )
+        elif output_mode == "directory":
+            print(f"\nCreating folder structure: '{base_path}'...")
+            sink = AtomicDirectoryPackSink(base_path)
+        else:
+            raise ValueError(f"Unknown output mode: {output_mode!r}")
+
+    with (MeteredSink(sink, metrics) if metrics is not None else sink) as target:
+        invisible_count, visible_count = write_pack_entries(
+            target, pack_name, version_string, pack_format, visible_blocks,
+            verbose=True, registry=registry, vanilla=vanilla, backend=backend,
+            metrics=metrics, ghost_alpha=ghost_alpha
+        )
+
+    output_path = sink.path
+    print(f"  - Created {output_path}")
+
+    sha1 = sink.sha1 if isinstance(sink, ZipPackSink) else None
+    if sha1 is not None and write_sha1_file:
+        write_file_atomic(f"{output_path}.sha1", f"{sha1}\n".encode('ascii'))
+        print(f"  - Created {output_path}.sha1")
+
+    return PackBuildResult(
+        output_path=output_path,
+        invisible_count=invisible_count,
+        visible_count=visible_count,
+        entry_count=sink.entry_count,
+        size=sink.size,
+        sha1=sha1,
+    )
+
+
+def build_pack_bytes(
+    pack_name: str,
+    version_string: str,
+    pack_format: int,
+    visible_blocks: set[str],
+    reproducible: bool = False,
+    vanilla: Optional[VanillaAssets] = None,
+    backend: str = BACKEND_BLOCKSTATES
+) -> bytes:
+    """
+    Build the resource pack ZIP entirely in memory.
+
+    Returns:
+        The complete ZIP archive as bytes
+    """
+    buffer = io.BytesIO()
+    with ZipPackSink(buffer, reproducible=reproducible) as sink:
+        write_pack_entries(
+            sink, pack_name, version_string, pack_format, visible_blocks,
+            vanilla=vanilla, backend=backend
+        )
+    return buffer.getvalue()
+
+
+def write_pack_entries(
+    sink: PackSink,
+    pack_name: str,
+    version_string: str,
+    pack_format: int,
+    visible_blocks: set[str],
+    verbose: bool = False,
+    registry: Optional[BlockRegistry] = None,
+    vanilla: Optional[VanillaAssets] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    metrics: Optional[BuildMetrics] = None,
+    progress: Optional[ProgressCallback] = None,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> tuple[int, int]:
+    """
+    Stream every resource pack entry into a sink.
+
+    Args:
+        sink: Destination for the pack entries
+        pack_name: Name for the resource pack (used in the description)
+        version_string: Minecraft version string for description
+        pack_format: Resource pack format number
+        visible_blocks: Set of block IDs that should NOT be made invisible
+        verbose: Print progress messages
+        registry: Block registry to generate from (defaults to block_data)
+        vanilla: Client jar blockstates to copy variant keys from (None uses
+            the generic simple/pillar blockstates)
+        backend: One of BACKENDS (see write_pack_assets); universal packs
+            always use blockstates
+        metrics: Record per-stage measurements here (see pack_metrics); pass
+            a MeteredSink to also measure the closing write of the archive
+        progress: Report (stage, message) progress here instead of printing
+        ghost_alpha: Alpha of hidden blocks with the ghost backend
 
     Returns:
         Tuple of (invisible_block_count, visible_block_count)
     """
-    # Define file paths
-    base_path = pack_name
-    assets_path = os.path.join(base_path, "assets", "minecraft")
-    blockstates_path = os.path.join(assets_path, "blockstates")
-    models_path = os.path.join(assets_path, "models", "block", "xray")
-    textures_path = os.path.join(assets_path, "textures", "block", "xray")
-
-    # Clean up any previous build
-    if os.path.exists(base_path):
-        shutil.rmtree(base_path)
-    if os.path.exists(f"{base_path}.zip"):
-        os.remove(f"{base_path}.zip")
-
-    # Create directory structure
-    print(f"\nCreating folder structure: '{base_path}'...")
-    os.makedirs(blockstates_path, exist_ok=True)
-    os.makedirs(models_path, exist_ok=True)
-    os.makedirs(textures_path, exist_ok=True)
+    progress = progress_reporter(progress, verbose)
+    if metrics is not None and not isinstance(sink, MeteredSink):
+        sink = MeteredSink(sink, metrics)
+
+    if version_string == UNIVERSAL_VERSION:
+        with stage(metrics, STAGE_UNIVERSAL):
+            return write_universal_pack_entries(
+                sink, pack_name, visible_blocks, registry=registry, vanilla=vanilla,
+                progress=progress
+            )
 
     # Write pack.mcmeta
-    write_pack_metadata(base_path, pack_format, pack_name, version_string)
-    print("  - Created pack.mcmeta")
+    with stage(metrics, STAGE_METADATA):
+        write_pack_metadata(sink, pack_format, pack_name, version_string)
+    if progress is not None:
+        progress(STAGE_METADATA, "Created pack.mcmeta")
+
+    return write_pack_assets(
+        sink, pack_format, visible_blocks, registry=registry, vanilla=vanilla,
+        backend=backend, metrics=metrics, progress=progress, ghost_alpha=ghost_alpha
+    )
+
+
+def write_pack_assets(
+    sink: PackSink,
+    pack_format: int,
+    visible_blocks: set[str],
+    verbose: bool = False,
+    registry: Optional[BlockRegistry] = None,
+    vanilla: Optional[VanillaAssets] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    metrics: Optional[BuildMetrics] = None,
+    progress: Optional[ProgressCallback] = None,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> tuple[int, int]:
+    """
+    Write everything except pack.mcmeta.
+
+    The blockstate backend writes the transparent texture, the invisible
+    model and one blockstate per hidden block. The shader backend writes
+    patched terrain shaders and marked textures instead. The ghost backend
+    writes see-through copies of the hidden blocks the client jar has, at
+    ghost_alpha, and invisible blockstates for the rest. The shader and
+    ghost backends need a client jar and pack format SHADER_MIN_FORMAT or
+    later, and fall back to blockstates otherwise.
+
+    Returns:
+        Tuple of (invisible_block_count, visible_block_count); ghost blocks
+        count as invisible
+
+    Raises:
+        ValueError: If the backend is unknown, the ghost alpha is out of
+            range or the client jar is for another pack format
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}")
+    check_pack_format(vanilla, pack_format)
+    if backend == BACKEND_GHOST:
+        validate_ghost_alpha(ghost_alpha)
+    progress = progress_reporter(progress, verbose)
+
+    if backend == BACKEND_SHADER:
+        if supports_shader_backend(pack_format, vanilla):
+            if registry is None:
+                registry = get_registry()
+            with stage(metrics, STAGE_SHADERS):
+                return write_shader_assets(
+                    sink, visible_blocks, registry, vanilla, pack_format, progress=progress
+                )
+        if progress is not None:
+            progress(STAGE_SHADERS, "Shader backend needs a client jar and 1.17+; using blockstates")
+
+    ghosts: set[str] = set()
+    if backend == BACKEND_GHOST:
+        if supports_ghost_backend(pack_format, vanilla):
+            if registry is None:
+                registry = get_registry()
+            with stage(metrics, STAGE_GHOST):
+                ghosts = write_ghost_assets(
+                    sink, visible_blocks, registry, vanilla, ghost_alpha, pack_format,
+                    progress=progress
+                )
+        elif progress is not None:
+            progress(STAGE_GHOST, "Ghost backend needs a client jar and 1.17+; using blockstates")
 
     # Create transparent texture
-    write_transparent_texture(textures_path)
-    print("  - Created transparent texture")
+    with stage(metrics, STAGE_TEXTURE):
+        write_transparent_texture(sink)
+    if progress is not None:
+        progress(STAGE_TEXTURE, "Created transparent texture")
 
     # Create invisible model
-    write_invisible_model(models_path)
-    print("  - Created invisible block model")
+    with stage(metrics, STAGE_MODEL):
+        write_invisible_model(sink)
+    if progress is not None:
+        progress(STAGE_MODEL, "Created invisible block model")
 
-    # Generate blockstate files
-    print("\nGenerating blockstate files...")
-    invisible_count, visible_count = write_blockstate_files(blockstates_path, visible_blocks)
-    print(f"  - {invisible_count} blocks set to invisible")
-    print(f"  - {visible_count} blocks kept visible")
+    # Generate blockstate files (ghost blocks already have theirs)
+    with stage(metrics, STAGE_BLOCKSTATES):
+        invisible_count, visible_count = write_blockstate_files(
+            sink, visible_blocks | ghosts, registry, pack_format, vanilla
+        )
+    visible_count -= len(ghosts)
+    if progress is not None:
+        progress(STAGE_BLOCKSTATES, f"{invisible_count} blocks set to invisible")
+        progress(STAGE_BLOCKSTATES, f"{visible_count} blocks kept visible")
 
-    # Create ZIP archive
-    print("\nCreating ZIP archive...")
-    shutil.make_archive(pack_name, 'zip', pack_name)
-    shutil.rmtree(pack_name)
-    print(f"  - Created {pack_name}.zip")
+    return invisible_count + len(ghosts), visible_count
 
-    return invisible_count, visible_count
 
+def serialize_json(content: dict) -> bytes:
+    """Serialize a JSON document the way it is stored in the pack."""
+    # Sorted keys keep the bytes stable regardless of how the dict was built
+    return json.dumps(content, indent=4, sort_keys=True).encode('utf-8')
 
-def write_pack_metadata(base_path: str, pack_format: int, pack_name: str, version_string: str) -> None:
-    """Write the pack.mcmeta file."""
+
+def write_json_entry(sink: PackSink, arcname: str, content: dict) -> None:
+    """Serialize a JSON document and write it to the sink."""
+    sink.write_entry(arcname, serialize_json(content))
+
+
+def build_pack_metadata(pack_format: int, pack_name: str, version_string: str) -> dict:
+    """Return the contents of pack.mcmeta."""
     description = f"{pack_name.replace('_', ' ')} - X-Ray pack for {version_string}"
 
-    mcmeta_content = {
+    return {
         "pack": {
             "pack_format": pack_format,
             "description": description
         }
     }
 
-    filepath = os.path.join(base_path, "pack.mcmeta")
-    with open(filepath, 'w') as file:
-        json.dump(mcmeta_content, file, indent=4)
+
+def write_pack_metadata(sink: PackSink, pack_format: int, pack_name: str, version_string: str) -> None:
+    """Write the pack.mcmeta file."""
+    mcmeta_content = build_pack_metadata(pack_format, pack_name, version_string)
+    write_json_entry(sink, "pack.mcmeta", mcmeta_content)
 
 
-def write_transparent_texture(textures_path: str) -> None:
+def write_transparent_texture(sink: PackSink) -> None:
     """Create a 1x1 transparent PNG texture file."""
     # Base64-encoded 1x1 transparent PNG
     transparent_png_base64 = (
@@ -441,12 +963,10 @@ def write_transparent_texture(textures_path: str) -> None:
     )
     png_data = base64.b64decode(transparent_png_base64)
 
-    filepath = os.path.join(textures_path, "transparent.png")
-    with open(filepath, 'wb') as file:
-        file.write(png_data)
+    sink.write_entry(f"{TEXTURES_DIR}/transparent.png", png_data)
 
 
-def write_invisible_model(models_path: str) -> None:
+def write_invisible_model(sink: PackSink) -> None:
     """Create the invisible block model JSON file."""
     # This model has zero-size elements, making the block invisible
     # while still having a valid texture reference (prevents purple/black errors)
@@ -467,76 +987,512 @@ def write_invisible_model(models_path: str) -> None:
         ]
     }
 
-    filepath = os.path.join(models_path, "xray_invisible.json")
-    with open(filepath, 'w') as file:
-        json.dump(model_content, file, indent=4)
+    write_json_entry(sink, f"{MODELS_DIR}/xray_invisible.json", model_content)
 
 
-def write_blockstate_files(blockstates_path: str, visible_blocks: set[str]) -> tuple[int, int]:
+def blockstate_path(block: str) -> str:
     """
-    Generate blockstate JSON files for all invisible blocks.
+    Return the archive path of a block's blockstate.
+
+    Namespaced (modded) block IDs go under assets/<namespace>/; bare IDs are
+    vanilla blocks in the minecraft namespace.
+    """
+    namespace, _, name = block.rpartition(':')
+    if not namespace or namespace == "minecraft":
+        return f"{BLOCKSTATES_DIR}/{name}.json"
+    return f"assets/{namespace}/blockstates/{name}.json"
 
-    Args:
-        blockstates_path: Directory to write blockstate files
-        visible_blocks: Blocks that should NOT have invisible blockstates
+
+@lru_cache(maxsize=None)
+def build_blockstate_payloads() -> tuple[PrecompressedEntry, PrecompressedEntry]:
+    """
+    Serialize and compress the two invisible blockstate payloads.
+
+    The payloads never change, so this runs once per process.
 
     Returns:
-        Tuple of (invisible_count, visible_count)
+        Tuple of (simple_entry, pillar_entry)
     """
     # Blockstate for simple blocks (no rotation)
     simple_blockstate = {
         "variants": {
-            "": {"model": "block/xray/xray_invisible"}
+            "": {"model": INVISIBLE_MODEL}
         }
     }
 
     # Blockstate for pillar/axis blocks (logs, etc.)
     pillar_blockstate = {
         "variants": {
-            "axis=y": {"model": "block/xray/xray_invisible"},
-            "axis=z": {"model": "block/xray/xray_invisible", "x": 90},
-            "axis=x": {"model": "block/xray/xray_invisible", "x": 90, "y": 90}
+            "axis=y": {"model": INVISIBLE_MODEL},
+            "axis=z": {"model": INVISIBLE_MODEL, "x": 90},
+            "axis=x": {"model": INVISIBLE_MODEL, "x": 90, "y": 90}
         }
     }
 
-    invisible_count = 0
-    visible_count = 0
+    return (
+        PrecompressedEntry(serialize_json(simple_blockstate)),
+        PrecompressedEntry(serialize_json(pillar_blockstate)),
+    )
 
-    # Process all blocks in all categories
-    for category, blocks in BLOCK_CATEGORIES.items():
-        for block in blocks:
-            if block in visible_blocks:
-                # Skip visible blocks - they use default textures
-                visible_count += 1
-            else:
-                # Create invisible blockstate
-                if block in PILLAR_BLOCKS:
-                    blockstate_data = pillar_blockstate
-                else:
-                    blockstate_data = simple_blockstate
 
-                filepath = os.path.join(blockstates_path, f"{block}.json")
-                with open(filepath, 'w') as file:
-                    json.dump(blockstate_data, file, indent=4)
+def write_blockstate_files(
+    sink: PackSink,
+    visible_blocks: set[str],
+    registry: Optional[BlockRegistry] = None,
+    pack_format: Optional[int] = None,
+    vanilla: Optional[VanillaAssets] = None
+) -> tuple[int, int]:
+    """
+    Generate blockstate JSON files for all invisible blocks.
 
-                invisible_count += 1
+    Every invisible block uses one of two payloads, so each payload is
+    serialized and compressed once and shared by all entries that use it
+    (see build_blockstate_payloads). With a client jar, blocks get the
+    variant keys or multipart shape of their vanilla blockstate instead;
+    blocks the jar does not have keep the generic payloads.
 
-    return invisible_count, visible_count
+    Args:
+        sink: Destination for the blockstate entries
+        visible_blocks: Blocks that should NOT have invisible blockstates
+        registry: Block registry to generate from (defaults to block_data)
+        pack_format: Only write blocks that exist in this pack format
+            (None writes every registry block)
+        vanilla: Client jar blockstates to copy variant keys from
+
+    Returns:
+        Tuple of (invisible_count, visible_count)
+    """
+    simple_entry, pillar_entry = build_blockstate_payloads()
+
+    # Visible blocks are skipped - they use default textures
+    if registry is None:
+        registry = get_registry()
+    available_mask = registry.available_mask(pack_format)
+    visible_mask = registry.mask_of(block for block in visible_blocks if block in registry)
+    visible_mask &= available_mask
+    invisible_mask = available_mask & ~visible_mask
+    pillar_blocks = registry.blocks_of(invisible_mask & registry.pillar_mask)
+
+    # Create invisible blockstates (each registry block appears once)
+    for block in registry.iter_blocks(invisible_mask):
+        blockstate_entry = vanilla.invisible_entry(block) if vanilla is not None else None
+        if blockstate_entry is None:
+            blockstate_entry = pillar_entry if block in pillar_blocks else simple_entry
+
+        sink.write_shared_entry(blockstate_path(block), blockstate_entry)
+
+    return registry.count(invisible_mask), registry.count(visible_mask)
+
+
+# =============================================================================
+# UNIVERSAL (MULTI-VERSION) PACKS
+# =============================================================================
+
+# Version key that selects a single pack for every version in the registry's pack_formats
+UNIVERSAL_VERSION = "universal"
+
+# First pack format (1.20.2) whose clients read supported_formats and overlays.
+# Older clients only see the pack root.
+OVERLAY_MIN_FORMAT = 18
+
+
+def get_universal_version_range() -> str:
+    """Return the human-readable version span of a universal pack, e.g. '1.15 - 1.21.4'."""
+    by_format = sorted(get_registry().pack_formats.items(), key=lambda item: item[1])
+    oldest = by_format[0][0].split(' - ')[0]
+    newest = by_format[-1][0].split(' - ')[-1]
+    return f"{oldest} - {newest}"
+
+
+def resolve_version(version_string: str, registry: Optional[BlockRegistry] = None) -> int:
+    """
+    Return the pack format for a version key (including UNIVERSAL_VERSION).
+
+    Args:
+        version_string: Version key of the registry's pack_formats
+        registry: Block registry to look the version up in (defaults to block_data)
+
+    Raises:
+        ValueError: If the version key is unknown
+    """
+    if registry is None:
+        registry = get_registry()
+    pack_formats = registry.pack_formats
+    if version_string == UNIVERSAL_VERSION:
+        return max(pack_formats.values())
+    if version_string not in pack_formats:
+        raise ValueError(f"unknown version {version_string!r}")
+    return pack_formats[version_string]
+
+
+def write_universal_pack_entries(
+    sink: PackSink,
+    pack_name: str,
+    visible_blocks: set[str],
+    verbose: bool = False,
+    registry: Optional[BlockRegistry] = None,
+    vanilla: Optional[VanillaAssets] = None,
+    progress: Optional[ProgressCallback] = None
+) -> tuple[int, int]:
+    """
+    Write one pack that serves every format in the registry's pack_formats.
+
+    The assets are generated once per format. Entries shared by all formats
+    are stored once in the pack root. Formats from OVERLAY_MIN_FORMAT on get
+    an overlay directory holding only the entries that differ from the root;
+    consecutive formats with identical differences share one overlay. Formats
+    older than that cannot read overlays and use the root as-is. A client jar
+    only shapes the blockstates of its own format; the other formats get the
+    generic ones.
+
+    Returns:
+        Tuple of (invisible_block_count, visible_block_count) for the newest format
+    """
+    progress = progress_reporter(progress, verbose)
+    if registry is None:
+        registry = get_registry()
+    formats = sorted(set(registry.pack_formats.values()))
+
+    per_format: dict[int, dict[str, PrecompressedEntry]] = {}
+    counts = (0, 0)
+    for pack_format in formats:
+        memory_sink = MemoryPackSink()
+        format_vanilla = vanilla
+        if vanilla is not None and vanilla.pack_format not in (None, pack_format):
+            format_vanilla = None
+        counts = write_pack_assets(
+            memory_sink, pack_format, visible_blocks, registry=registry, vanilla=format_vanilla
+        )
+        per_format[pack_format] = memory_sink.entries
+
+    # Root: what pre-overlay clients see (the newest legacy format wins conflicts)
+    legacy_formats = [pack_format for pack_format in formats if pack_format < OVERLAY_MIN_FORMAT]
+    root: dict[str, PrecompressedEntry] = {}
+    for pack_format in legacy_formats or formats[:1]:
+        root.update(per_format[pack_format])
+
+    # Overlays: per-format differences, merged across consecutive formats
+    overlays: list[tuple[int, int, dict[str, PrecompressedEntry]]] = []
+    for pack_format in formats:
+        if pack_format < OVERLAY_MIN_FORMAT:
+            continue
+        differences = {
+            name: entry
+            for name, entry in per_format[pack_format].items()
+            if not same_payload(root.get(name), entry)
+        }
+        if not differences:
+            continue
+
+        if overlays:
+            first_format, _, previous = overlays[-1]
+            if previous.keys() == differences.keys() and all(
+                same_payload(previous[name], differences[name]) for name in differences
+            ):
+                overlays[-1] = (first_format, pack_format, previous)
+                continue
+        overlays.append((pack_format, pack_format, differences))
+
+    # pack.mcmeta declares the full range and the overlay directories
+    description = f"{pack_name.replace('_', ' ')} - X-Ray pack for {get_universal_version_range()}"
+    mcmeta_content: dict = {
+        "pack": {
+            "pack_format": formats[-1],
+            "supported_formats": {"min_inclusive": formats[0], "max_inclusive": formats[-1]},
+            "description": description
+        }
+    }
+    if overlays:
+        mcmeta_content["overlays"] = {
+            "entries": [
+                {
+                    "formats": {"min_inclusive": first_format, "max_inclusive": last_format},
+                    "directory": f"xray_{first_format}_{last_format}"
+                }
+                for first_format, last_format, _ in overlays
+            ]
+        }
+    write_json_entry(sink, "pack.mcmeta", mcmeta_content)
+
+    for name, entry in root.items():
+        sink.write_shared_entry(name, entry)
+    for first_format, last_format, differences in overlays:
+        for name, entry in differences.items():
+            sink.write_shared_entry(f"xray_{first_format}_{last_format}/{name}", entry)
+
+    if progress is not None:
+        progress(STAGE_UNIVERSAL, f"Created universal pack for formats {formats[0]}-{formats[-1]}")
+        progress(STAGE_UNIVERSAL, f"{len(root)} shared entries, {len(overlays)} overlays")
+
+    return counts
 
 
 # =============================================================================
 # MAIN ENTRY POINT
 # =============================================================================
 
-def main() -> None:
+def parse_arguments(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Generate Minecraft x-ray resource packs.",
+    )
+    parser.add_argument(
+        "--batch", metavar="MANIFEST",
+        help="build every pack listed in a JSON or TOML manifest without prompting",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="maximum number of parallel build processes in batch mode",
+    )
+    parser.add_argument(
+        "--output-dir", default=None,
+        help="directory for batch output (overrides the manifest)",
+    )
+    parser.add_argument(
+        "--cache-dir", default=None,
+        help="reuse previously built packs from this cache directory",
+    )
+    parser.add_argument(
+        "--reproducible", action="store_true",
+        help="write byte-identical archives for identical selections",
+    )
+    parser.add_argument(
+        "--content-addressed", action="store_true",
+        help="name batch archives <name>-<sha1>.zip (ignored with --incremental)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="patch existing batch output instead of rebuilding it (ignored with --cache-dir)",
+    )
+    parser.add_argument(
+        "--client-jar", metavar="JAR", default=None,
+        help="copy blockstate variants from a local vanilla client jar",
+    )
+    parser.add_argument(
+        "--mods-dir", metavar="DIR", default=None,
+        help="also hide the blocks of the mod jars in this folder",
+    )
+    parser.add_argument(
+        "--select", metavar="EXPR", default=None,
+        help="start with the blocks matched by a selection expression visible, "
+             "e.g. '*_ore | @Storage - preset:nether_xray' (with --version: add them)",
+    )
+    parser.add_argument(
+        "--plain", action="store_true",
+        help="use numbered prompts instead of the full-screen terminal UI",
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default=None,
+        help="hide blocks with blockstate overrides (default), core shaders or see-through "
+             "ghosts of the real blocks (shader and ghost need --client-jar)",
+    )
+    parser.add_argument(
+        "--ghost-alpha", type=int, metavar="ALPHA", default=None,
+        help=f"with --backend ghost: opacity of hidden blocks, "
+             f"{MIN_GHOST_ALPHA}-{MAX_GHOST_ALPHA} (default: {DEFAULT_GHOST_ALPHA})",
+    )
+    parser.add_argument(
+        "--version", default=None,
+        help="build one pack for this version without prompts (or 'universal')",
+    )
+    parser.add_argument(
+        "--preset", default=None,
+        help="with --version: keep the blocks of this preset visible",
+    )
+    parser.add_argument(
+        "--blocks", metavar="LIST", default=None,
+        help="with --version: comma-separated block IDs to keep visible",
+    )
+    parser.add_argument(
+        "--category", metavar="NAME", action="append", default=[],
+        help="with --version: keep a whole category visible (repeatable)",
+    )
+    parser.add_argument(
+        "--name", default=DEFAULT_PACK_NAME,
+        help="with --version: pack name (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--fd", type=int, metavar="N", default=None,
+        help="with --version: write the archive to this open file descriptor",
+    )
+    parser.add_argument(
+        "output", nargs="?", default=None,
+        help="with --version: archive path, or '-' for stdout (default: NAME.zip)",
+    )
+    parser.add_argument(
+        "--metrics-json", metavar="FILE", default=None,
+        help="write per-stage build timings and sizes to a JSON report",
+    )
+    parser.add_argument(
+        "--metrics-textfile", metavar="FILE", default=None,
+        help="write build metrics as a Prometheus textfile (node_exporter textfile collector)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
     """Main program entry point."""
+    args = parse_arguments(argv)
+    if not (args.metrics_json or args.metrics_textfile):
+        return run_command(args)
+
+    builds: list[BuildMetrics] = []
+    add_metrics_hook(builds.append)
+    try:
+        return run_command(args)
+    finally:
+        remove_metrics_hook(builds.append)
+        write_metrics_reports(builds, args.metrics_json, args.metrics_textfile)
+
+
+def run_command(args: argparse.Namespace) -> int:
+    """Run the batch, terminal UI or prompt mode selected on the command line."""
+    if args.ghost_alpha is not None:
+        try:
+            validate_ghost_alpha(args.ghost_alpha)
+        except ValueError as error:
+            print(f"ERROR: {error}", file=sys.stderr)
+            return 2
+
+    if args.batch:
+        from pack_batch import main_batch
+        return main_batch(
+            args.batch, args.workers, args.output_dir, args.cache_dir,
+            args.reproducible, args.incremental, args.client_jar, args.mods_dir,
+            args.backend, args.content_addressed, args.ghost_alpha
+        )
+
+    if args.version is not None:
+        return run_build(args)
+
+    vanilla = None
+    if args.client_jar:
+        try:
+            vanilla = VanillaAssets(args.client_jar)
+        except (OSError, ValueError) as error:
+            print(f"ERROR: cannot read client jar: {error}")
+            return 2
+
+    registry = None
+    if args.mods_dir:
+        try:
+            registry = get_registry(args.mods_dir)
+        except OSError as error:
+            print(f"ERROR: cannot scan mods folder: {error}")
+            return 2
+
+    selection = 0
+    if args.select:
+        try:
+            selection = compile_selection(args.select).mask(registry)
+        except ValueError as error:
+            print(f"ERROR: invalid selection: {error}")
+            return 2
+
+    backend = args.backend or BACKEND_BLOCKSTATES
+    ghost_alpha = args.ghost_alpha if args.ghost_alpha is not None else DEFAULT_GHOST_ALPHA
+    if not args.plain:
+        from pack_tui import main_tui, tui_available
+        if tui_available():
+            return main_tui(vanilla, registry, backend, selection, ghost_alpha)
+
+    run_interactive(vanilla, registry, backend, selection, ghost_alpha)
+    return 0
+
+
+def print_stderr_progress(stage_name: str, message: str) -> None:
+    """Progress printer for builds whose stdout may carry the archive."""
+    print(f"  - {message}", file=sys.stderr)
+
+
+def run_build(args: argparse.Namespace) -> int:
+    """
+    Build one pack from command line options, without prompts.
+
+    Everything but the archive goes to stderr, so stdout can be piped.
+
+    Returns:
+        Process exit code
+    """
+    from pack_api import PackSpec, build_pack
+
+    if args.output == "-" and args.fd is not None:
+        print("ERROR: give either '-' or --fd, not both", file=sys.stderr)
+        return 2
+    if args.output == "-" and sys.stdout.isatty():
+        print("ERROR: refusing to write a ZIP archive to a terminal", file=sys.stderr)
+        return 2
+
+    try:
+        registry = get_registry(args.mods_dir)
+    except OSError as error:
+        print(f"ERROR: cannot scan mods folder: {error}", file=sys.stderr)
+        return 2
+
+    spec = PackSpec(
+        version=args.version,
+        name=args.name.replace(' ', '_'),
+        preset=args.preset,
+        blocks=[block.strip() for block in (args.blocks or "").split(',') if block.strip()],
+        categories=args.category,
+        select=args.select,
+        backend=args.backend or BACKEND_BLOCKSTATES,
+        ghost_alpha=args.ghost_alpha if args.ghost_alpha is not None else DEFAULT_GHOST_ALPHA,
+        reproducible=args.reproducible,
+        client_jar=args.client_jar,
+        registry=registry,
+    )
+
+    if args.fd is not None:
+        output = os.fdopen(args.fd, 'wb', closefd=False)
+    elif args.output == "-":
+        sys.stdout.flush()
+        output = sys.stdout.buffer
+    else:
+        output = args.output or f"{spec.name}.zip"
+
+    metrics = None
+    if metrics_enabled():
+        metrics = BuildMetrics(build_labels(spec.name, spec.version, spec.backend, "cli"))
+    try:
+        result = build_pack(spec, output, print_stderr_progress, metrics)
+        if not isinstance(output, str):
+            output.flush()
+    except ValueError as error:
+        print(f"ERROR: {error}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        if output is sys.stdout.buffer:
+            # The reader went away; keep the interpreter from failing on exit too
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        print("ERROR: output closed before the pack was complete", file=sys.stderr)
+        return 1
+    except OSError as error:
+        print(f"ERROR: cannot write pack: {error}", file=sys.stderr)
+        return 1
+    if metrics is not None:
+        publish_metrics(metrics.finish())
+
+    destination = result.output_path or ("stdout" if args.fd is None else f"fd {args.fd}")
+    print(f"  - Created {destination} ({result.size} bytes, SHA-1 {result.sha1})", file=sys.stderr)
+    return 0
+
+
+def run_interactive(
+    vanilla: Optional[VanillaAssets] = None,
+    registry: Optional[BlockRegistry] = None,
+    backend: str = BACKEND_BLOCKSTATES,
+    selection: int = 0,
+    ghost_alpha: int = DEFAULT_GHOST_ALPHA
+) -> None:
+    """Run the interactive, prompt-driven pack builder."""
     clear_screen()
     print_header()
 
     # Step 1: Get pack name
     pack_name = input("Enter a name for your resource pack: ").strip()
     if not pack_name:
-        pack_name = "XRay_Pack"
+        pack_name = DEFAULT_PACK_NAME
     pack_name = pack_name.replace(' ', '_')
 
     # Step 2: Select Minecraft version
@@ -546,9 +1502,15 @@ def main() -> None:
         return
 
     version_string, pack_format = version_result
+    if version_string != UNIVERSAL_VERSION:
+        try:
+            check_pack_format(vanilla, pack_format)
+        except ValueError as error:
+            print(f"\nERROR: {error}")
+            return
 
     # Step 3: Select which blocks to keep visible
-    visible_blocks = prompt_block_selection()
+    visible_blocks = prompt_block_selection(registry, selection)
     if visible_blocks is None:
         print("\nExiting.")
         return
@@ -561,10 +1523,8 @@ def main() -> None:
     print(f"  Pack Name:         {pack_name}")
     print(f"  Minecraft Version: {version_string}")
     print(f"  Pack Format:       {pack_format}")
-    print(f"  Visible Blocks:    {len(visible_blocks)}")
-
-    total_blocks = sum(len(blocks) for blocks in BLOCK_CATEGORIES.values())
-    invisible_count = total_blocks - len(visible_blocks)
+    invisible_count, visible_count = count_pack_blocks(visible_blocks, pack_format, registry)
+    print(f"  Visible Blocks:    {visible_count}")
     print(f"  Invisible Blocks:  {invisible_count}")
     print()
 
@@ -574,14 +1534,36 @@ def main() -> None:
         return
 
     # Step 5: Generate the pack
-    generate_resource_pack(pack_name, version_string, pack_format, visible_blocks)
+    metrics = None
+    if metrics_enabled():
+        metrics = BuildMetrics(build_labels(pack_name, version_string, backend, "interactive"))
+    result = generate_resource_pack(
+        pack_name, version_string, pack_format, visible_blocks,
+        vanilla=vanilla, registry=registry, backend=backend, metrics=metrics,
+        ghost_alpha=ghost_alpha
+    )
+    if metrics is not None:
+        publish_metrics(metrics.finish())
 
     # Step 6: Show completion message
+    print_completion(pack_name, result)
+
+
+def build_labels(pack_name: str, version_string: str, backend: str, mode: str) -> dict[str, str]:
+    """Labels identifying a build in metrics reports."""
+    return {"pack": pack_name, "version": version_string, "backend": backend, "mode": mode}
+
+
+def print_completion(pack_name: str, result: PackBuildResult) -> None:
+    """Print the success message and next steps after an interactive build."""
     print()
     print("=" * 60)
     print("  RESOURCE PACK GENERATED SUCCESSFULLY")
     print("=" * 60)
     print()
+    print(f"  Size:  {result.size} bytes ({result.entry_count} files)")
+    print(f"  SHA-1: {result.sha1}")
+    print()
     print("Next Steps:")
     print(f"  1. Move '{pack_name}.zip' to your Minecraft resourcepacks folder")
     print("  2. Launch Minecraft -> Options -> Resource Packs")
@@ -590,4 +1572,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())